@@ -4,29 +4,68 @@
 
 import os
 import json
+import logging
 import glob
+import time
 import uuid
 import datetime
 import numpy as np
 import pandas as pd
 import streamlit as st
 from datetime import datetime
-from shared.utils import (tokenizer, 
-                          carregar_dados, 
+from shared.utils import (tokenizer,
+                          paginar_candidatos,
+                          tabela_explicacao,
+                          tabela_funil,
+                          tabela_latencia,
+                          tabela_funil_por,
+                          score_candidato, 
+                          carregar_dados_cache,
                           salvar_dados, 
                           encerrar_vaga, 
                           reabrir_vaga, 
                           parse_date_safe, 
-                          ler_jsons,
-                          processar_curriculos)
-
-from model.model import (calcular_fator_tecnico,
-                         calcular_fator_idioma,
-                         calcular_fator_salarial,
-                         calcular_fator_engajamento,
-                         calcular_fator_cultural,
-                         calcular_fator_experiencia_final,
-                         calcular_match_score)
+                          iterar_curriculos,
+                          salvar_arquivo_stream,
+                          carregar_json,
+                          texto_curriculo,
+                          salvar_candidato,
+                          registrar_status,
+                          compactar_eventos,
+                          ler_eventos_cache,
+                          carregar_estatisticas_cache,
+                          reconstruir_estatisticas_vagas,
+                          chave_id_candidato,
+                          identificar_candidato,
+                          salvar_candidatura_identidade)
+
+from model.model import (calcular_fatores,
+                         calcular_score_fatores,
+                         versao_score,
+                         inicializar,
+                         stem)
+from model.reranker import obter_reranker, pontuar_candidatos
+
+from shared.jobs import FilaJobs
+from shared.busca import IndiceBusca
+from shared.estatisticas import estatisticas_vazias, tabela_desatualizada, totais
+from shared.funil import funis_por, somar_funis
+from shared.identidade import ja_candidatou
+from shared.eventos import novo_evento, aplicar_eventos_pendentes, iniciar_compactacao_periodica
+from shared.exportacao import (FORMATOS_EXPORTACAO,
+                               ExportacaoMuitoGrande,
+                               arquivos_curriculos,
+                               colunas_exportacao,
+                               filtrar_candidatos,
+                               gerar_exportacao,
+                               gravar_exportacao_temporaria,
+                               descartar_exportacao)
+
+logger = logging.getLogger(__name__)
+
+# Avisos de todos os módulos e o relatório de tempos da inicialização
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logging.getLogger("shared.recursos").setLevel(logging.INFO)
 
 # Configuração da página
 st.set_page_config(page_title="SeleAI - Sistema de Triagem", page_icon="🤖", layout="wide")
@@ -35,10 +74,24 @@ st.set_page_config(page_title="SeleAI - Sistema de Triagem", page_icon="🤖", l
 VAGAS_PATH = "dados_app/vagas/"
 CANDIDATOS_PATH = "dados_app/candidatos/"
 CURRICULOS_PATH = "dados_app/curriculos/"
+CACHE_CURRICULOS_PATH = "dados_app/cache_curriculos/"
+JOBS_DB_PATH = "dados_app/jobs.db"
+BUSCA_DB_PATH = "dados_app/busca.db"
+ESTATISTICAS_PATH = "dados_app/estatisticas_vagas.json"
+IDENTIDADES_PATH = "dados_app/identidades/"
+EVENTOS_PATH = "dados_app/eventos/"
 
 os.makedirs(VAGAS_PATH, exist_ok=True)
 os.makedirs(CANDIDATOS_PATH, exist_ok=True)
 os.makedirs(CURRICULOS_PATH, exist_ok=True)
+os.makedirs(IDENTIDADES_PATH, exist_ok=True)
+
+# Resultados: opções de candidatos por página
+TAMANHOS_PAGINA = [10, 20, 50, 100]
+
+# Fila de processamento: poucos workers para não saturar o encoder
+NUM_WORKERS_FILA = 2
+MAX_CANDIDATURAS_NA_FILA = 200
 
 # =============================================================================
 # LOGINS E AUTENTICAÇÃO
@@ -57,16 +110,95 @@ def login():
         else:
             st.sidebar.error("Senha incorreta")
 
+# =============================================================================
+# PROCESSAMENTO EM SEGUNDO PLANO
+# =============================================================================
+
+def processar_candidatura(payload):
+    """Job da fila: extrai o texto do currículo, calcula fatores/score e atualiza o candidato"""
+    arquivo_candidato = payload['arquivo_candidato']
+    candidato = carregar_json(CANDIDATOS_PATH, arquivo_candidato)
+    vaga = carregar_json(VAGAS_PATH, f"vaga_{payload['id_vaga']}.json")
+    if candidato is None or vaga is None:
+        raise ValueError(f"Candidato ou vaga não encontrados: {arquivo_candidato}")
+
+    resultado = {}
+    if candidato.get('cv_file'):
+        try:
+            candidato['cv_pt'], candidato['cv_hash'] = texto_curriculo(os.path.join(CURRICULOS_PATH, candidato['cv_file']), CACHE_CURRICULOS_PATH)
+        except Exception as e:
+            # Currículo ilegível não impede o cálculo do score pelos dados do formulário
+            logger.warning("Não foi possível extrair o currículo %s: %s", candidato['cv_file'], e)
+
+    # cv_pt só é usado no cálculo (fator currículo) e na busca; o texto fica no cache de currículos
+    explicacao = {}
+    fatores = calcular_fatores(candidato, vaga, explicacao)
+    try:
+        obter_indice_busca().indexar(arquivo_candidato, candidato)
+    except Exception as e:
+        # Índice de busca desatualizado não impede o score (scripts/indexar_candidatos.py reconstrói)
+        logger.warning("Não foi possível indexar %s para a busca: %s", arquivo_candidato, e)
+    resultado['cv_hash'] = candidato.get('cv_hash')
+    resultado['fatores'] = fatores
+    resultado['explicacao'] = explicacao
+    resultado['score_match'] = calcular_score_fatores(fatores, vaga['pesos'])
+    resultado['versao_score'] = versao_score(vaga['pesos'])
+    resultado['status_processamento'] = 'concluido'
+    resultado['erro_processamento'] = None
+
+    # Relê o registro antes de salvar para não sobrescrever alterações feitas nesse meio tempo
+    candidato = carregar_json(CANDIDATOS_PATH, arquivo_candidato) or candidato
+    candidato.pop('cv_pt', None)
+    candidato.update(resultado)
+    salvar_candidato(CANDIDATOS_PATH, arquivo_candidato, candidato, ESTATISTICAS_PATH, EVENTOS_PATH)
+
+
+def marcar_erro_candidatura(payload, erro):
+    """Job sem mais tentativas: o registro sai de 'pendente' e aparece como erro em Resultados"""
+    candidato = carregar_json(CANDIDATOS_PATH, payload['arquivo_candidato'])
+    if candidato is None:
+        return
+    candidato['status_processamento'] = 'erro'
+    candidato['erro_processamento'] = erro
+    salvar_candidato(CANDIDATOS_PATH, payload['arquivo_candidato'], candidato, ESTATISTICAS_PATH, EVENTOS_PATH)
+
+
+@st.cache_resource
+def obter_fila():
+    """Fila de jobs única por processo, compartilhada por todas as sessões"""
+    return FilaJobs(
+        JOBS_DB_PATH,
+        processar_candidatura,
+        num_workers=NUM_WORKERS_FILA,
+        max_pendentes=MAX_CANDIDATURAS_NA_FILA,
+        ao_falhar=marcar_erro_candidatura
+    ).iniciar()
+
+@st.cache_resource(show_spinner=False)
+def obter_indice_busca():
+    """Índice de busca textual dos candidatos, compartilhado pelas sessões e pela fila"""
+    return IndiceBusca(BUSCA_DB_PATH, stem=stem)
+
+@st.cache_resource
+def iniciar_compactacao_eventos():
+    """Thread única por processo que grava periodicamente o log de eventos nos candidatos"""
+    return iniciar_compactacao_periodica(lambda: compactar_eventos(EVENTOS_PATH, CANDIDATOS_PATH))
+
+@st.cache_resource
+def inicializar_recursos():
+    """Carrega NLTK, stemmer e modelo uma vez por processo (de caminhos locais se provisionados) e loga os tempos"""
+    return inicializar()
+
 # =============================================================================
 # MENUS E PÁGINAS
 # =============================================================================
 
 def main():
     st.sidebar.title("🎯 SeleAI Navigation")
-    page = st.sidebar.radio("Navegação", ["🏠 Dashboard", "📊 Resultados", "📋 Nova Vaga", "👤 Novo Candidato"])
+    page = st.sidebar.radio("Navegação", ["🏠 Dashboard", "📊 Resultados", "🔎 Buscar Candidatos", "📋 Nova Vaga", "👤 Novo Candidato"])
 
     # Páginas restritas
-    restricted_pages = ["🏠 Dashboard", "📋 Nova Vaga", "📊 Resultados"]
+    restricted_pages = ["🏠 Dashboard", "📋 Nova Vaga", "📊 Resultados", "🔎 Buscar Candidatos"]
 
     if page in restricted_pages and not st.session_state["authenticated"]:
         st.warning("🔒 Área restrita. Faça login para acessar.")
@@ -79,6 +211,8 @@ def main():
         criar_vaga()
     elif page == "📊 Resultados":
         mostrar_resultados()
+    elif page == "🔎 Buscar Candidatos":
+        buscar_candidatos()
     elif page == "👤 Novo Candidato":
         cadastrar_candidato()
 
@@ -89,9 +223,12 @@ def main():
 def show_dashboard():
     st.title("🏠 Dashboard SeleAI")
     
-    # Carregar dados
-    vagas = carregar_dados(VAGAS_PATH)
-    candidatos = carregar_dados(CANDIDATOS_PATH)
+    # Carregar dados: vagas + tabela de estatísticas (os candidatos não são lidos aqui)
+    vagas = carregar_dados_cache(VAGAS_PATH, "vaga")
+    estatisticas = carregar_estatisticas_cache(ESTATISTICAS_PATH)
+    if estatisticas is None or tabela_desatualizada(estatisticas):
+        estatisticas = reconstruir_estatisticas_vagas(CANDIDATOS_PATH, ESTATISTICAS_PATH, EVENTOS_PATH)
+    totais_candidatos = totais(estatisticas)
     
     # Métricas
     col1, col2, col3, col4 = st.columns(4)
@@ -102,12 +239,11 @@ def show_dashboard():
         vagas_encerradas = len([v for v in vagas if v.get('status') == 'encerrada'])
         st.metric("Vagas Encerradas", vagas_encerradas)
     with col3:
-        st.metric("Total Candidatos", len(candidatos))
+        st.metric("Total Candidatos", totais_candidatos['candidatos'])
     with col4:
-        st.metric(
-        "Matches Realizados",
-        len([c for c in candidatos if c.get('score_match') and c['score_match'] >= 0.7])
-)
+        st.metric("Matches Realizados", totais_candidatos['matches'])
+
+    st.button("🔄 Recalcular estatísticas", on_click=reconstruir_estatisticas_vagas, args=(CANDIDATOS_PATH, ESTATISTICAS_PATH, EVENTOS_PATH))
 
     # Lista de vagas recentes (mais seguro converter datas)
     st.subheader("📋 Vagas Recentes")
@@ -120,62 +256,128 @@ def show_dashboard():
         reverse=True
     )[:5]
 
+    # Os registros carregados ficam na sessão; cada card (fragment) altera só o seu
+    st.session_state["vagas_dashboard"] = {v['id']: v for v in vagas_ordenadas}
     for vaga in vagas_ordenadas:
-        status = vaga.get('status', 'ativa')
-        if status == 'encerrada':
-            status_icon = "❌"
-            status_color = "red"
-            status_text = "Encerrada"
-        else:
-            status_icon = "✅"
-            status_color = "green"
-            status_text = "Ativa"
-        
+        card_vaga(vaga['id'], estatisticas.get(vaga['id']) or estatisticas_vazias())
+
+    mostrar_funil(vagas, estatisticas)
+
+
+def mostrar_funil(vagas, estatisticas):
+    """Funil de contratação e tempo até a decisão, lidos só dos agregados da tabela de estatísticas"""
+    import altair as alt
+
+    st.subheader("📈 Funil de Contratação")
+    por_consultor = funis_por(estatisticas, vagas, "consultor_responsavel")
+    opcoes = ["Todos os consultores"] + sorted(por_consultor)
+    consultor = st.selectbox("Consultor", opcoes, key="funil_consultor")
+    funil = somar_funis(por_consultor.values()) if consultor == opcoes[0] else por_consultor[consultor]
+
+    col_f1, col_f2 = st.columns(2)
+    with col_f1:
+        etapas = tabela_funil(funil)
+        st.altair_chart(
+            alt.Chart(etapas).mark_bar().encode(
+                x=alt.X("Quantidade:Q"),
+                y=alt.Y("Etapa:N", sort=None),
+                tooltip=["Etapa", "Quantidade", alt.Tooltip("Das candidaturas:Q", format=".0%")]
+            ),
+            use_container_width=True
+        )
+        st.dataframe(
+            etapas,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "Da etapa anterior": st.column_config.NumberColumn(format="%.2f"),
+                "Das candidaturas": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="%.2f")
+            }
+        )
+    with col_f2:
+        st.altair_chart(
+            alt.Chart(tabela_latencia(funil)).mark_bar().encode(
+                x=alt.X("Tempo até a decisão:N", sort=None),
+                y=alt.Y("Decisões:Q")
+            ),
+            use_container_width=True
+        )
+        st.caption(f"{funil['decisoes']} decisão(ões) registrada(s) no histórico de status")
+
+    if por_consultor:
+        st.markdown("**Por consultor**")
+        st.dataframe(
+            tabela_funil_por(por_consultor, "Consultor"),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "Qualificação (% das avaliadas)": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="%.2f")
+            }
+        )
+
+
+def alterar_status_vaga(vaga_id, acao):
+    """Callback de Encerrar/Reabrir: grava só esta vaga e atualiza o registro da sessão"""
+    sucesso, mensagem = acao(vaga_id, VAGAS_PATH)
+    vagas_sessao = st.session_state["vagas_dashboard"]
+    if sucesso:
+        vagas_sessao[vaga_id] = carregar_json(VAGAS_PATH, f"vaga_{vaga_id}.json") or vagas_sessao[vaga_id]
+    st.session_state[f"mensagem_vaga_{vaga_id}"] = (sucesso, mensagem)
+
+
+@st.experimental_fragment
+def card_vaga(vaga_id, estatisticas_vaga):
+    """Card de uma vaga no dashboard; as ações re-renderizam apenas este card"""
+    vaga = st.session_state["vagas_dashboard"][vaga_id]
+    mensagem = st.session_state.pop(f"mensagem_vaga_{vaga_id}", None)
+
+    status = vaga.get('status', 'ativa')
+    if status == 'encerrada':
+        status_icon = "❌"
+        status_color = "red"
+        status_text = "Encerrada"
+    else:
+        status_icon = "✅"
+        status_color = "green"
+        status_text = "Ativa"
+    
+    with st.expander(
+        f"{status_icon} #{vaga['id']} - {vaga.get('titulo_vaga','(sem título)')} - {status_text}",
+        expanded=mensagem is not None
+    ):
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**Empresa:** {vaga.get('empresa_contratante', 'N/A')}")
+            st.write(f"**Nível:** {vaga.get('nivel_profissional', 'N/A')}")
+            st.write(f"**Data Abertura:** {vaga.get('data_abertura', 'N/A')}")
+            st.write(f"**Data Fechamento:** {vaga.get('data_fechamento', 'N/A')}")
+            st.write(f"**Consultor:** {vaga.get('consultor_responsavel', 'N/A')}")
         
-        with st.expander(f"{status_icon} #{vaga['id']} - {vaga.get('titulo_vaga','(sem título)')} - {status_text}"):
-
-            col1, col2 = st.columns(2)
-            with col1:
-                st.write(f"**Empresa:** {vaga.get('empresa_contratante', 'N/A')}")
-                st.write(f"**Nível:** {vaga.get('nivel_profissional', 'N/A')}")
-                st.write(f"**Data Abertura:** {vaga.get('data_abertura', 'N/A')}")
-                st.write(f"**Data Fechamento:** {vaga.get('data_fechamento', 'N/A')}")
-                st.write(f"**Consultor:** {vaga.get('consultor_responsavel', 'N/A')}")
+        with col2:
+            melhor_candidato = estatisticas_vaga['melhor_candidato']
             
-            with col2:
-                candidatos_vaga = [c for c in candidatos if c.get('id_vaga') == vaga['id']]
-    
-                total_candidatos = len(candidatos_vaga)
-                total_matches = len([c for c in candidatos_vaga if c.get('score_match') and c['score_match'] >= 0.7])
-                
-                melhor_candidato = None
-                if candidatos_vaga:
-                    melhor_candidato = max(candidatos_vaga, key=lambda c: c.get('score_match', 0))
-                
-                st.write(f"**Candidatos:** {total_candidatos}")
-                st.write(f"**Matches:** {total_matches}")
-                st.write(f"**Melhor candidato:** {melhor_candidato['codigo_candidato'] + ': ' + melhor_candidato['nome'] if melhor_candidato else 'N/A'}")
-                st.markdown(
-                    f"**Status:** <span style='color:{status_color}; font-weight:bold'>{status_text}</span>",
-                    unsafe_allow_html=True
-                )
+            st.write(f"**Candidatos:** {estatisticas_vaga['candidatos']}")
+            st.write(f"**Matches:** {estatisticas_vaga['matches']}")
+            st.write(f"**Melhor candidato:** {melhor_candidato + ': ' + (estatisticas_vaga['melhor_nome'] or '') if melhor_candidato else 'N/A'}")
+            st.markdown(
+                f"**Status:** <span style='color:{status_color}; font-weight:bold'>{status_text}</span>",
+                unsafe_allow_html=True
+            )
 
-            if status != 'encerrada':
-                if st.button("❌ Encerrar Vaga", key=f"encerrar_{vaga['id']}"):
-                    success, message = encerrar_vaga(vaga['id'])
-                    if success:
-                        st.success(message)
-                        st.experimental_rerun()
-                    else:
-                        st.error(message)
+        if mensagem is not None:
+            sucesso, texto = mensagem
+            if sucesso:
+                st.success(texto)
             else:
-                if st.button("🔄 Reabrir Vaga", key=f"reabrir_{vaga['id']}"):
-                    success, message = reabrir_vaga(vaga['id'])
-                    if success:
-                        st.success(message)
-                        st.experimental_rerun()
-                    else:
-                        st.error(message)
+                st.error(texto)
+
+        if status != 'encerrada':
+            st.button("❌ Encerrar Vaga", key=f"encerrar_{vaga_id}",
+                      on_click=alterar_status_vaga, args=(vaga_id, encerrar_vaga))
+        else:
+            st.button("🔄 Reabrir Vaga", key=f"reabrir_{vaga_id}",
+                      on_click=alterar_status_vaga, args=(vaga_id, reabrir_vaga))
 
 # =============================================================================
 # CRIAR VAGA
@@ -258,16 +460,18 @@ def criar_vaga():
         peso_idioma = st.slider("Peso Idioma", 0, 10, 1)
         peso_salarial = st.slider("Peso Salarial", 0, 10, 1)
         peso_experiencia = st.slider("Peso Experiência", 0, 10, 1)
+        peso_curriculo = st.slider("Peso Currículo (texto do CV x habilidades técnicas)", 0, 10, 0)
 
         # Normalizar para que somem 100%
-        soma_pesos = peso_tecnico + peso_cultural + peso_engajamento + peso_idioma + peso_salarial + peso_experiencia
+        soma_pesos = peso_tecnico + peso_cultural + peso_engajamento + peso_idioma + peso_salarial + peso_experiencia + peso_curriculo
         pesos = {
             "tecnico": peso_tecnico / soma_pesos,
             "cultural": peso_cultural / soma_pesos,
             "engajamento": peso_engajamento / soma_pesos,
             "idioma": peso_idioma / soma_pesos,
             "experiencia": peso_experiencia / soma_pesos,
-            "salarial": peso_salarial / soma_pesos
+            "salarial": peso_salarial / soma_pesos,
+            "curriculo": peso_curriculo / soma_pesos
             
 }
         
@@ -313,7 +517,7 @@ def criar_vaga():
 def cadastrar_candidato():
     st.title("👤 Cadastrar Candidato")
     
-    vagas = carregar_dados(VAGAS_PATH)
+    vagas = carregar_dados_cache(VAGAS_PATH, "vaga")
     vagas_ativas = [v for v in vagas if v.get('status') == 'ativa']
     
     if not vagas_ativas:
@@ -391,10 +595,24 @@ def cadastrar_candidato():
         submit = st.form_submit_button("📤 Enviar Candidatura")
 
         if submit:
+            fila = obter_fila()
+            if not fila.tem_capacidade():
+                st.error("⏳ Estamos recebendo muitas candidaturas agora. Tente novamente em alguns minutos.")
+                return
+            if not email.strip():
+                st.error("❌ Informe o email.")
+                return
+
+            # Código estável do candidato (o mesmo em todas as candidaturas deste email)
+            identidade = identificar_candidato(IDENTIDADES_PATH, email, chave_id_candidato())
+            if ja_candidatou(identidade, vaga_selecionada['id']):
+                st.warning("⚠️ Este email já se candidatou a esta vaga.")
+                return
+
             novo_candidato = {
                 "id_vaga": vaga_selecionada['id'],
                 "nome": nome,
-                "email": email.lower(),
+                "email": identidade['email'],
                 "contato": contato,
                 "pais": pais,  
                 "estado": estado,
@@ -415,52 +633,147 @@ def cadastrar_candidato():
                 "pretencao_salarial": pretencao_salarial,
                 "data_candidatura": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
-            novo_candidato['codigo_candidato'] = f"CAND{hash(email.lower()) % 10000:04d}"
+            novo_candidato['codigo_candidato'] = identidade['codigo_candidato']
 
             # Salvar currículo
             if uploaded_cv is not None:
                 if uploaded_cv.size > 2 * 1024 * 1024:  # 2MB
                     st.error("❌ O arquivo é muito grande. Máximo 2MB.")
                     return
-                cv_filename = f"curriculo_{novo_candidato['codigo_candidato'].replace('@','_')}_{vaga_selecionada['id']}.pdf"
+                cv_filename = f"curriculo_{novo_candidato['codigo_candidato']}_{vaga_selecionada['id']}.pdf"
                 cv_path = os.path.join(CURRICULOS_PATH, cv_filename)
-                with open(cv_path, "wb") as f:
-                    f.write(uploaded_cv.getbuffer())
+                salvar_arquivo_stream(uploaded_cv, cv_path)
                 novo_candidato["cv_file"] = cv_filename
+            elif identidade.get("cv_file") and os.path.isfile(os.path.join(CURRICULOS_PATH, identidade["cv_file"])):
+                # Sem novo envio: reaproveita o último currículo da pessoa (texto e embeddings já em cache)
+                novo_candidato["cv_file"] = identidade["cv_file"]
             else:
                 novo_candidato["cv_file"] = ""
 
-            # Calcular score
-            score = calcular_match_score(novo_candidato, vaga_selecionada, vaga_selecionada['pesos'])
-            novo_candidato['score_match'] = score
-
-            fatores = {
-                'salarial': calcular_fator_salarial(novo_candidato, vaga_selecionada),
-                'engajamento': calcular_fator_engajamento(novo_candidato, vaga_selecionada),
-                'cultural': calcular_fator_cultural(novo_candidato, vaga_selecionada),
-                'tecnico': calcular_fator_tecnico(novo_candidato, vaga_selecionada),
-                'idioma': calcular_fator_idioma(novo_candidato, vaga_selecionada),
-                'experiencia': calcular_fator_experiencia_final(novo_candidato, vaga_selecionada)
-            }
-
-            novo_candidato['fatores'] = fatores
-
-            salvar_dados(
-                CANDIDATOS_PATH, 
-                f"candidato_{novo_candidato['codigo_candidato']}_{vaga_selecionada['id']}.json", 
-                novo_candidato
+            # Score e fatores são calculados pela fila de jobs
+            novo_candidato['score_match'] = None
+            novo_candidato['fatores'] = {}
+            novo_candidato['versao_score'] = None
+            novo_candidato['status_processamento'] = 'pendente'
+
+            arquivo_candidato = f"candidato_{novo_candidato['codigo_candidato']}_{vaga_selecionada['id']}.json"
+            salvar_candidato(CANDIDATOS_PATH, arquivo_candidato, novo_candidato, ESTATISTICAS_PATH, EVENTOS_PATH)
+            salvar_candidatura_identidade(IDENTIDADES_PATH, novo_candidato['codigo_candidato'], vaga_selecionada['id'], novo_candidato["cv_file"])
+            fila.enfileirar(
+                "candidatura",
+                {"arquivo_candidato": arquivo_candidato, "id_vaga": vaga_selecionada['id']},
+                grupo=vaga_selecionada['id']
             )
-            st.success(f"✅ Candidatura enviada! Score de match: {score:.2%}, {fatores}")
+            st.success("✅ Candidatura enviada! Seu perfil está sendo analisado.")
 
 # =============================================================================
 # RESULTADOS E MATCHMAKING
 # =============================================================================
 
+def nome_arquivo_candidato(candidato):
+    return f"candidato_{candidato['codigo_candidato']}_{candidato['id_vaga']}.json"
+
+
+def avaliar_candidato(arquivo, novo_status, comentario_key):
+    """Callback de Qualificar/Desqualificar: grava só um evento no log (o JSON do candidato não é reescrito)"""
+    candidato = st.session_state["candidatos_resultados"][arquivo]
+    comentario = st.session_state.get(comentario_key, "")
+    st.session_state[f"aberto_{arquivo}"] = True  # o card continua aberto depois da ação
+    if comentario.strip() == "":
+        acao = "qualificar" if novo_status == "Qualificado" else "desqualificar"
+        st.session_state[f"aviso_{arquivo}"] = f"Por favor, adicione um comentário antes de {acao}."
+        return
+
+    evento = novo_evento(arquivo, candidato, novo_status, comentario)
+    atual = registrar_status(EVENTOS_PATH, CANDIDATOS_PATH, ESTATISTICAS_PATH, evento)
+    if atual is None:
+        st.session_state[f"aviso_{arquivo}"] = "Esta candidatura não existe mais."
+        return
+    st.session_state["candidatos_resultados"][arquivo] = atual
+    st.session_state[comentario_key] = ""
+
+
+@st.experimental_fragment
+def card_candidato(arquivo, posicao):
+    """Card de um candidato em Resultados; as ações re-renderizam apenas este card"""
+    candidato = st.session_state["candidatos_resultados"][arquivo]
+    id_vaga = candidato['id_vaga']
+    aviso = st.session_state.pop(f"aviso_{arquivo}", None)
+
+    status_atual = candidato.get('status_atual', 'Pendente')
+    status_icon = '🟡' if status_atual == 'Pendente' else ('✅' if status_atual == 'Qualificado' else '❌')
+    
+    if candidato.get('status_processamento') == 'pendente':
+        score_label = "⏳ em processamento"
+    elif candidato.get('status_processamento') == 'erro':
+        score_label = "⚠️ erro na análise"
+    else:
+        score_label = f"{score_candidato(candidato):.2%}"
+        score_aprendido = st.session_state.get("scores_reranker", {}).get(arquivo)
+        if score_aprendido is not None:
+            score_label += f" (aprendido: {score_aprendido:.2%})"
+
+    expander_label = (
+        f"#{posicao} - {candidato['nome']} - Score: {score_label} - Status: **{status_icon} {status_atual}**"
+    )
+    comentario_key = f"comentario_{candidato['codigo_candidato']}_{id_vaga}"
+    
+    with st.expander(expander_label, expanded=st.session_state.get(f"aberto_{arquivo}", False)):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**Email:** {candidato['email']}")
+            st.write(f"**Contato:** {candidato['contato']}")
+            st.write(f"**Área:** {candidato['areas_atuacao']}")
+            st.write(f"**Experiência:** {candidato['tempo_experiencia']} anos")
+        with col2:
+            st.write(f"**Inglês:** {candidato['nivel_ingles']}")
+            st.write(f"**Pretensão:** R$ {candidato['pretencao_salarial']:,.2f}")
+            st.write(f"**Modelo Trabalho:** {candidato['modelo_trabalho']}")
+            st.write(f"**Fatores de avaliação:** {candidato.get('fatores') or 'em processamento'}")
+
+        if candidato.get('status_processamento') == 'erro':
+            st.error(
+                f"Não foi possível analisar esta candidatura ({candidato.get('erro_processamento')}). "
+                "Rode scripts/recalcular_scores.py para tentar de novo."
+            )
+
+        if candidato.get('explicacao'):
+            st.markdown("**Correspondência de habilidades:**")
+            st.dataframe(
+                tabela_explicacao(candidato['explicacao']),
+                hide_index=True,
+                use_container_width=True,
+                column_config={"Similaridade": st.column_config.ProgressColumn(format="%.2f", min_value=0, max_value=1)}
+            )
+            
+        st.markdown("---")
+        
+        st.text_area("Adicionar Comentários", key=comentario_key)
+        if aviso:
+            st.warning(aviso)
+
+        col_b1, col_b2 = st.columns(2)
+        with col_b1:
+            st.button("✅ Qualificar", key=f"qualify_{candidato['codigo_candidato']}_{id_vaga}",
+                      on_click=avaliar_candidato, args=(arquivo, "Qualificado", comentario_key))
+        with col_b2:
+            st.button("❌ Desqualificar", key=f"disqualify_{candidato['codigo_candidato']}_{id_vaga}",
+                      on_click=avaliar_candidato, args=(arquivo, "Desqualificado", comentario_key))
+
+        if 'historico_status' in candidato:
+            st.markdown("**Histórico de Avaliações:**")
+            historico_vaga = [h for h in candidato['historico_status'] if h.get('vaga_id') == id_vaga]
+            for hist in historico_vaga:
+                data = datetime.fromisoformat(hist['data']).strftime('%d/%m/%Y %H:%M') 
+                st.info(f"[{data}] Status: **{hist['status']}** | Comentário: *{hist['comentario']}*")
+
+
 def mostrar_resultados():
     st.title("📊 Resultados e Matchmaking")
     
-    vagas = ler_jsons(VAGAS_PATH).to_dict(orient="records")
-    candidatos = ler_jsons(CANDIDATOS_PATH).to_dict(orient="records")
+    vagas = carregar_dados_cache(VAGAS_PATH, "vaga")
+    candidatos = carregar_dados_cache(CANDIDATOS_PATH, "candidato")
+    aplicar_eventos_pendentes(candidatos, ler_eventos_cache(EVENTOS_PATH))  # status ainda não compactados
     
     vagas_ordenadas = sorted(
         vagas, 
@@ -473,140 +786,226 @@ def mostrar_resultados():
         format_func=lambda x: f"#{x['id']} - {x['titulo_vaga']} - {'❌ Encerrada' if x.get('status') != 'ativa' else '✅ Ativa'}"
     )
         
-    def atualizar_e_salvar_candidato(candidato_data, novo_status, comentario):
-        if 'historico_status' not in candidato_data:
-            candidato_data['historico_status'] = []
-            
-        # Determina o nome do arquivo JSON
-        filename = f"candidato_{candidato_data['codigo_candidato']}_{candidato_data['id_vaga']}.json"
-
-        # Adiciona o novo status e comentário ao histórico
-        candidato_data['historico_status'].append({
-            'data': datetime.datetime.now().isoformat(),
-            'status': novo_status,
-            'comentario': comentario,
-            'vaga_id': candidato_data['id_vaga']
-        })
-        
-        # Define o status atual (opcional, mas útil para visualização)
-        candidato_data['status_atual'] = novo_status 
-        
-        # Salva o dicionário atualizado no JSON
-        salvar_dados(CANDIDATOS_PATH, filename, candidato_data)
-        
-        # Força o Streamlit a re-executar para atualizar a interface
-        st.experimental_rerun()
-        
     if vaga_selecionada:
         candidatos_vaga = [c for c in candidatos if c.get('id_vaga') == vaga_selecionada['id']]
         
         st.subheader(f"Candidatos para Vaga #{vaga_selecionada['id']}")
         st.write(f"**Total de candidatos:** {len(candidatos_vaga)}")
+
+        # Progresso das candidaturas ainda na fila de processamento
+        progresso = obter_fila().progresso(grupo=vaga_selecionada['id'])
+        em_fila = progresso['pendente'] + progresso['processando']
+        if em_fila:
+            total_jobs = sum(progresso.values())
+            st.progress(
+                (total_jobs - em_fila) / total_jobs,
+                text=f"⏳ {em_fila} candidatura(s) sendo analisada(s)"
+            )
+        if progresso['erro']:
+            st.warning(f"⚠️ {progresso['erro']} candidatura(s) não puderam ser analisadas.")
         
         if candidatos_vaga:
-            candidatos_vaga.sort(key=lambda x: x.get('score_match', 0), reverse=True)
-            
-            for i, candidato in enumerate(candidatos_vaga, 1):
-                # 🌟 Exibir status atual
-                status_atual = candidato.get('status_atual', 'Pendente')
-                status_icon = '🟡' if status_atual == 'Pendente' else ('✅' if status_atual == 'Qualificado' else '❌')
-                
-                expander_label = (
-                    f"#{i} - {candidato['nome']} - Score: {candidato.get('score_match', 0):.2%} - Status: **{status_icon} {status_atual}**"
-                )
-                
-                with st.expander(expander_label):
-                    col1, col2 = st.columns(2)
-                    # ... (colunas de informações continuam iguais) ...
-                    with col1:
-                        st.write(f"**Email:** {candidato['email']}")
-                        st.write(f"**Contato:** {candidato['contato']}")
-                        st.write(f"**Área:** {candidato['areas_atuacao']}")
-                        st.write(f"**Experiência:** {candidato['tempo_experiencia']} anos")
-                    with col2:
-                        st.write(f"**Inglês:** {candidato['nivel_ingles']}")
-                        st.write(f"**Pretensão:** R$ {candidato['pretencao_salarial']:,.2f}")
-                        st.write(f"**Modelo Trabalho:** {candidato['modelo_trabalho']}")
-                        st.write(f"**Fatores de avaliação:** {candidato['fatores']}")
-                        
-                    st.markdown("---")
-                    
-                    # 1. Campo de Comentário
-                    comentario_key = f"comentario_{candidato['codigo_candidato']}_{vaga_selecionada['id']}"
-                    comentario = st.text_area("Adicionar Comentários", key=comentario_key)
-                    
-                    col_b1, col_b2, col_b3 = st.columns([1, 1, 3])
-                    
-                    # 2. Botão Qualificar
-                    st.markdown("""
-                        <style>
-                        div[data-testid="column"] button {
-                            width: 100% !important;
-                        }
-                        </style>
-                    """, unsafe_allow_html=True)
-
-                    col_b1, col_b2 = st.columns(2)
-
-                    with col_b1:
-                        if st.button("✅ Qualificar", key=f"qualify_{i}"):
-                            if comentario.strip() == "":
-                                st.warning("Por favor, adicione um comentário antes de qualificar.")
-                            else:
-                                atualizar_e_salvar_candidato(candidato, "Qualificado", comentario)
-
-                    with col_b2:
-                        if st.button("❌ Desqualificar", key=f"disqualify_{i}"):
-                            if comentario.strip() == "":
-                                st.warning("Por favor, adicione um comentário antes de desqualificar.")
-                            else:
-                                atualizar_e_salvar_candidato(candidato, "Desqualificado", comentario)
-
-                    # 3. Exibir histórico de status (se existir)
-                    if 'historico_status' in candidato:
-                        st.markdown("**Histórico de Avaliações:**")
-                        # Filtra apenas o histórico para a vaga atuals
-                        historico_vaga = [h for h in candidato['historico_status'] if h.get('vaga_id') == vaga_selecionada['id']]
-                        for hist in historico_vaga:
-                            data = datetime.fromisoformat(hist['data']).strftime('%d/%m/%Y %H:%M') 
-                            st.info(f"[{data}] Status: **{hist['status']}** | Comentário: *{hist['comentario']}*")
-
-
-                # BLOCO DE EXPORTAÇÃO GERAL
-                st.markdown("---")
-                st.subheader("📥 Exportar Resultados Gerais")
-
-                # Converte listas para DataFrames
-                df_candidatos = pd.DataFrame(candidatos)
-                df_vagas = pd.DataFrame(vagas)
-
-                # Merge
-                df_final = pd.merge(
-                    df_candidatos,
-                    df_vagas,
-                    left_on="id_vaga",
-                    right_on="id",
-                    how="left",
-                    suffixes=("_candidato", "_vaga")
+            # Filtros aplicados antes de renderizar; só a página visível vira widget
+            st.markdown("**Filtros**")
+            col_f1, col_f2, col_f3 = st.columns(3)
+            with col_f1:
+                filtro_status = st.multiselect("Status", ["Pendente", "Qualificado", "Desqualificado"], key="filtro_status")
+            with col_f2:
+                filtro_score = st.slider("Score", 0.0, 1.0, (0.0, 1.0), step=0.05, key="filtro_score")
+            with col_f3:
+                filtro_habilidades = st.text_input("Habilidades (separadas por vírgula)", key="filtro_habilidades")
+
+            col_p1, col_p2, col_p3 = st.columns(3)
+            with col_p1:
+                tamanho_pagina = st.selectbox("Candidatos por página", TAMANHOS_PAGINA, key="tamanho_pagina")
+
+            # Re-ranker opcional: scores da vaga inteira em uma chamada, a partir dos fatores gravados
+            reranker = obter_reranker()
+            ordenacao = "Score (pesos)"
+            if reranker is not None:
+                with col_p3:
+                    ordenacao = st.selectbox("Ordenar por", ["Score (pesos)", "Score aprendido"], key="ordenacao_resultados")
+            chave_ordenacao = score_candidato
+            st.session_state["scores_reranker"] = {}
+            if ordenacao == "Score aprendido":
+                scores = pontuar_candidatos(candidatos_vaga, reranker)
+                st.session_state["scores_reranker"] = {
+                    nome_arquivo_candidato(c): float(s) for c, s in zip(candidatos_vaga, scores)
+                }
+                chave_ordenacao = lambda c: st.session_state["scores_reranker"][nome_arquivo_candidato(c)]
+
+            filtros = dict(
+                tamanho_pagina=tamanho_pagina,
+                status=filtro_status,
+                score_min=filtro_score[0],
+                score_max=filtro_score[1],
+                habilidades=tokenizer(filtro_habilidades),
+                chave=chave_ordenacao
+            )
+            pagina = st.session_state.get("pagina_resultados", 1)
+            pagina_candidatos, total_filtrado = paginar_candidatos(candidatos_vaga, pagina=pagina, **filtros)
+            total_paginas = max(1, -(-total_filtrado // tamanho_pagina))
+            if pagina > total_paginas:
+                # Os filtros reduziram o total: volta para a última página existente
+                pagina = st.session_state["pagina_resultados"] = total_paginas
+                pagina_candidatos, total_filtrado = paginar_candidatos(candidatos_vaga, pagina=pagina, **filtros)
+            with col_p2:
+                st.number_input("Página", min_value=1, max_value=total_paginas, key="pagina_resultados")
+            st.caption(f"{total_filtrado} candidato(s) após filtros - página {pagina} de {total_paginas}")
+
+            # Só os registros da página ficam na sessão; cada card (fragment) altera só o seu
+            st.session_state["candidatos_resultados"] = {
+                nome_arquivo_candidato(c): c for c in pagina_candidatos
+            }
+            st.markdown("""
+                <style>
+                div[data-testid="column"] button {
+                    width: 100% !important;
+                }
+                </style>
+            """, unsafe_allow_html=True)
+
+            offset = (pagina - 1) * tamanho_pagina
+            for i, candidato in enumerate(pagina_candidatos, offset + 1):
+                card_candidato(nome_arquivo_candidato(candidato), i)
+
+    # BLOCO DE EXPORTAÇÃO (só roda quando alguém pede; o arquivo vai direto para o navegador)
+    st.markdown("---")
+    st.subheader("📥 Exportar Resultados")
+
+    col_e1, col_e2 = st.columns(2)
+    with col_e1:
+        formato = st.selectbox("Formato", list(FORMATOS_EXPORTACAO), format_func=str.upper, key="exportacao_formato")
+        escopo = st.radio("Recorte", ["Vaga selecionada", "Período", "Tudo"], horizontal=True, key="exportacao_escopo")
+    with col_e2:
+        periodo = ()
+        if escopo == "Período":
+            periodo = st.date_input("Data de candidatura (início e fim)", value=(), key="exportacao_periodo")
+        colunas = st.multiselect(
+            "Colunas (vazio = todas)",
+            colunas_exportacao(vagas),
+            key="exportacao_colunas"
+        )
+
+    # Arquivo gerado com outros filtros não vale mais: sai da sessão e do disco
+    filtros_exportacao = [formato, escopo, list(periodo), colunas, vaga_selecionada['id'] if vaga_selecionada else None]
+    if st.session_state.get("exportacao", {}).get("filtros", filtros_exportacao) != filtros_exportacao:
+        descartar_exportacao_sessao()
+
+    # Sem vaga, filtrar_candidatos não filtraria nada e o arquivo "da vaga" teria todos os candidatos
+    sem_vaga = escopo == "Vaga selecionada" and vaga_selecionada is None
+    if sem_vaga:
+        st.info("Selecione uma vaga acima para exportar as candidaturas dela.")
+
+    if st.button("⚙️ Gerar arquivo", disabled=sem_vaga):
+        descartar_exportacao_sessao()
+        if escopo == "Vaga selecionada":
+            selecionados = filtrar_candidatos(candidatos, id_vaga=vaga_selecionada['id'])
+            sufixo = f"vaga_{vaga_selecionada['id']}"
+        elif escopo == "Período":
+            inicio, fim = (list(periodo) + [None, None])[:2]
+            selecionados = filtrar_candidatos(candidatos, data_inicio=inicio, data_fim=fim or inicio)
+            sufixo = f"{inicio or ''}_{fim or inicio or ''}"
+        else:
+            selecionados = candidatos
+            sufixo = "geral"
+
+        # Só os currículos das candidaturas exportadas, e só se a coluna cv_pt for pedida
+        curriculos = ()
+        if not colunas or "cv_pt" in colunas:
+            curriculos = iterar_curriculos(CURRICULOS_PATH, CACHE_CURRICULOS_PATH, arquivos=arquivos_curriculos(selecionados))
+
+        barra = st.progress(0.0, text="Preparando exportação...")
+        try:
+            with gerar_exportacao(
+                formato,
+                selecionados,
+                vagas,
+                curriculos=curriculos,
+                colunas=colunas or None,
+                progresso=lambda feitas, total: barra.progress(feitas / total, text=f"Exportando {feitas}/{total} candidatos...")
+            ) as arquivo:
+                st.session_state["exportacao"] = {
+                    "caminho": gravar_exportacao_temporaria(arquivo, formato),
+                    "nome": f"dados_matchmaking_{sufixo}.{formato}",
+                    "mime": FORMATOS_EXPORTACAO[formato],
+                    "filtros": filtros_exportacao
+                }
+        except (ImportError, ExportacaoMuitoGrande) as e:
+            st.error(f"❌ {e}")
+        barra.empty()
+
+    if "exportacao" in st.session_state:
+        exportacao = st.session_state["exportacao"]
+        try:
+            with open(exportacao["caminho"], "rb") as arquivo:
+                st.download_button(
+                    label=f"📥 Baixar {exportacao['nome']}",
+                    data=arquivo,
+                    file_name=exportacao["nome"],
+                    mime=exportacao["mime"],
+                    key="download_exportacao",
+                    on_click=descartar_exportacao_sessao
                 )
+        except FileNotFoundError:
+            # Apagado pela limpeza de exportações antigas: é preciso gerar de novo
+            st.session_state.pop("exportacao", None)
 
-                df_curriculos = processar_curriculos(CURRICULOS_PATH)
 
-                if not df_curriculos.empty:
-                    df_final = pd.merge(
-                        df_final, 
-                        df_curriculos, 
-                        on="codigo_candidato", 
-                        how="left" 
-                    )
-                else:
-                    df_final = df_final
-                    df_final['cv_pt'] = None 
+def descartar_exportacao_sessao():
+    """Tira a exportação da sessão e apaga o arquivo (após o download ou com filtros novos)"""
+    descartar_exportacao(st.session_state.pop("exportacao", {}).get("caminho"))
+
+# =============================================================================
+# BUSCA DE CANDIDATOS
+# =============================================================================
+
+def buscar_candidatos():
+    st.title("🔎 Buscar Candidatos")
+    st.caption(
+        'Busca no currículo e nas habilidades de todas as candidaturas. Todos os termos precisam aparecer; '
+        'use "aspas" para frase exata, OR para alternativas e -termo (ou NOT termo) para excluir. '
+        'Ex: "engenharia de dados" python OR scala -estagio'
+    )
+
+    vagas = carregar_dados_cache(VAGAS_PATH, "vaga")
+    titulos = {str(v['id']): v.get('titulo_vaga', '') for v in vagas}
+
+    col_b1, col_b2, col_b3 = st.columns([3, 2, 1])
+    with col_b1:
+        consulta = st.text_input("Buscar", key="consulta_busca")
+    with col_b2:
+        vaga_filtro = st.selectbox(
+            "Vaga",
+            [None] + list(titulos),
+            format_func=lambda v: "Todas as vagas" if v is None else f"#{v} - {titulos[v]}",
+            key="vaga_busca"
+        )
+    with col_b3:
+        limite = st.selectbox("Resultados", [20, 50, 100], key="limite_busca")
+
+    indice = obter_indice_busca()
+    if not consulta.strip():
+        st.info(f"{indice.total_documentos()} candidato(s) indexado(s).")
+        return
+
+    inicio = time.perf_counter()
+    resultados, total = indice.buscar(consulta, limite=limite, id_vaga=vaga_filtro)
+    st.caption(f"{total} candidato(s) encontrado(s) em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+    if resultados:
+        st.dataframe(
+            pd.DataFrame([{
+                "Nome": r['nome'],
+                "Código": r['codigo_candidato'],
+                "Vaga": f"#{r['id_vaga']} - {titulos.get(str(r['id_vaga']), '')}",
+                "Relevância": r['score']
+            } for r in resultados]),
+            hide_index=True,
+            use_container_width=True
+        )
 
-                if st.button("📤 Exportar todos os dados para Excel"):
-                    filename = "dados_matchmaking.xlsx"
-                    df_final.to_excel(filename, index=False)
-                    st.success(f"✅ Arquivo {filename} exportado!")
 
 if __name__ == "__main__":
+    inicializar_recursos()
+    iniciar_compactacao_eventos()
     main()
\ No newline at end of file
@@ -1,25 +1,164 @@
 # =============================================================================
 # IMPORTAÇÕES E CONFIGURAÇÃO
 # =============================================================================
+import os
+import re
+import json
+import hashlib
+import tempfile
+import logging
+import threading
+from functools import lru_cache
 import numpy as np
-import nltk
-try:
-    nltk.data.find('stemmers/rslp')
-except LookupError:
-    nltk.download('rslp')
 
-# Agora, o resto do seu código
-from nltk.stem import RSLPStemmer
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from shared.recursos import (caminho_modelo, configurar_ambiente, garantir_nltk, medir_etapa, nome_arquivo_modelo,
+                             registrar_tempos)
 
 # =============================================================================
 # IMPORTAÇÕES E CONFIGURAÇÃO
 # =============================================================================
+#
+# sentence-transformers, sklearn e NLTK são importados só no primeiro cálculo:
+# importar este módulo (scripts, fila de jobs, testes) não carrega o modelo.
+# Pesos e dados do NLTK vêm de caminhos locais quando provisionados
+# (scripts/provisionar.py), sem acesso à rede.
 
+logger = logging.getLogger(__name__)
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
-stemmer = RSLPStemmer()
+NOME_MODELO = "all-MiniLM-L6-v2"
+
+# Com o serviço local de embeddings no ar (model/servico_embeddings.py), todos os
+# processos da máquina usam o mesmo modelo em vez de carregar uma cópia cada
+SOCKET_EMBEDDINGS = os.environ.get("SELEAI_EMBEDDINGS_SOCKET")
+
+_model = None
+_stemmer = None
+_carregamento_lock = threading.Lock()
+
+def obter_modelo():
+    """
+    Modelo de embeddings, criado uma única vez no primeiro uso: o cliente do
+    serviço local se SELEAI_EMBEDDINGS_SOCKET estiver definido e o serviço
+    responder, senão um SentenceTransformer próprio do processo.
+    """
+    global _model
+    if _model is None:
+        with _carregamento_lock:
+            if _model is None and SOCKET_EMBEDDINGS:
+                from model.servico_embeddings import ClienteEmbeddings
+                cliente = ClienteEmbeddings(SOCKET_EMBEDDINGS)
+                if cliente.disponivel():
+                    _model = cliente
+                else:
+                    logger.warning("Serviço de embeddings indisponível em %s; carregando o modelo local", SOCKET_EMBEDDINGS)
+            if _model is None:
+                _model = criar_modelo_local()
+    return _model
+
+def criar_modelo_local():
+    """SentenceTransformer do processo, da cópia local do modelo se provisionada"""
+    configurar_ambiente()  # antes do import: o modo offline do hub é lido no import
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(caminho_modelo(NOME_MODELO))
+
+def usar_modelo(nome_modelo):
+    """
+    Troca o modelo de embeddings do processo (scripts/avaliar_ranking.py).
+    Vocabulário e cache de embeddings dos currículos são separados por nome
+    de modelo, então nada calculado com o modelo anterior é reaproveitado.
+    """
+    global NOME_MODELO, _model, _vocabulario
+    with _carregamento_lock:
+        NOME_MODELO = nome_modelo
+        _model = criar_modelo_local()
+        _vocabulario = None
+    return _model
+
+def obter_stemmer():
+    """RSLPStemmer (baixa os dados do NLTK se necessário) carregado no primeiro uso"""
+    global _stemmer
+    if _stemmer is None:
+        with _carregamento_lock:
+            if _stemmer is None:
+                garantir_nltk('rslp')
+                from nltk.stem import RSLPStemmer
+                _stemmer = RSLPStemmer()
+    return _stemmer
+
+@lru_cache(maxsize=100_000)
+def stem(termo):
+    """Stem RSLP de um termo, memoizado (os mesmos termos se repetem entre currículos)"""
+    return obter_stemmer().stem(termo)
+
+def inicializar(carregar_modelo=True):
+    """
+    Carrega de uma vez o que o cálculo do score usa (dados do NLTK, stemmer e
+    modelo) e loga quanto tempo cada etapa levou. Os apps chamam na subida
+    para que o primeiro usuário não pague o carregamento.
+
+    Returns:
+        dict: {etapa: ms}
+    """
+    from shared.texto import tokenizer
+
+    tempos = {}
+    with medir_etapa(tempos, "ambiente"):
+        configurar_ambiente()
+    with medir_etapa(tempos, "tokenizer"):
+        tokenizer("aquecimento do tokenizer")
+    with medir_etapa(tempos, "stemmer"):
+        obter_stemmer()
+    if carregar_modelo:
+        with medir_etapa(tempos, "modelo"):
+            modelo = obter_modelo()
+        with medir_etapa(tempos, "primeiro_encode"):
+            modelo.encode(["aquecimento"], normalize_embeddings=True)
+    registrar_tempos(tempos)
+    return tempos
+
+_vocabulario = None
+
+def obter_vocabulario():
+    """Vocabulário de habilidades com a matriz top-k (model/vocabulario.py), aberto no primeiro uso"""
+    global _vocabulario
+    if _vocabulario is None:
+        with _carregamento_lock:
+            if _vocabulario is None:
+                from model.vocabulario import VocabularioSkills
+                _vocabulario = VocabularioSkills(
+                    lambda termos: obter_modelo().encode(termos, normalize_embeddings=True),
+                    NOME_MODELO
+                )
+    return _vocabulario
+
+# Explicação dos fatores semânticos: para cada termo da vaga, o termo do candidato
+# (ou trecho do CV) mais parecido e a similaridade, gravados junto com os fatores
+CASAS_EXPLICACAO = 3
+TAMANHO_TRECHO_EXPLICACAO = 80
+
+def _stems(termos):
+    return [stem(str(t)) for t in termos]
+
+def _media_melhores_matches(termos_vaga, termos_candidato, explicacao=None, fator=None):
+    """
+    Média, entre os termos da vaga, da maior similaridade com algum termo do candidato
+    (comparando os stems). Se `explicacao` for um dict, guarda em explicacao[fator]
+    as linhas [termo da vaga, termo do candidato, similaridade].
+    """
+    sims, posicoes = obter_vocabulario().melhores_matches(_stems(termos_vaga), _stems(termos_candidato))
+    if explicacao is not None:
+        explicacao[fator] = [
+            [str(termo), str(termos_candidato[p]), round(float(sim), CASAS_EXPLICACAO)]
+            for termo, p, sim in zip(termos_vaga, posicoes, sims)
+        ]
+    return float(np.mean(sims))
+
+# Fator currículo: o texto do CV é dividido em janelas de palavras com sobreposição
+# e codificado em lotes de tamanho fixo; os embeddings ficam em disco por hash do CV
+CACHE_EMBEDDINGS_PATH = "dados_app/cache_embeddings/"
+PALAVRAS_POR_CHUNK = 64
+SOBREPOSICAO_CHUNK = 16
+TAMANHO_LOTE_ENCODE = 32
 
 def calcular_fator_salarial(candidato, vaga):
     """Calcula fator salarial (0-1)"""
@@ -39,29 +178,20 @@ def calcular_fator_salarial(candidato, vaga):
         return 0.0
 
 
-def calcular_fator_experiencia_final(candidato, vaga, max_anos=20):
+def calcular_fator_experiencia_final(candidato, vaga, max_anos=20, explicacao=None):
     """
     Calcula o fator de experiência do candidato para a vaga,
     considerando área de atuação (com stemming), tempo de experiência e nível da vaga.
     Retorna um valor entre 0 e 1.
     """
-    # Stem das áreas de atuação
+    # Áreas de atuação comparadas pelos stems
     cand_areas = candidato.get('areas_atuacao', [])
     vaga_area = vaga.get('area_atuacao', [])
     
     if not cand_areas or not vaga_area:
         sim_score = 0.0
     else:
-        cand_areas_stem = [stemmer.stem(str(w)) for w in cand_areas]
-        vaga_area_stem = [stemmer.stem(str(w)) for w in vaga_area]
-        
-        cand_vecs = model.encode(cand_areas_stem)
-        vaga_vecs = model.encode(vaga_area_stem)
-        scores = []
-        for v_vec in vaga_vecs:
-            sims = cosine_similarity([v_vec], cand_vecs)[0]
-            scores.append(max(sims))
-        sim_score = float(np.mean(scores))
+        sim_score = _media_melhores_matches(vaga_area, cand_areas, explicacao, 'experiencia')
 
     # Ajuste pelo tempo de experiência e nível da vaga
     tempo = candidato.get('tempo_experiencia', 0)
@@ -112,7 +242,7 @@ def calcular_fator_engajamento(candidato, vaga):
     return score / 2.5  # Normalizar para 0-1
 
 
-def calcular_fator_cultural(candidato, vaga):
+def calcular_fator_cultural(candidato, vaga, explicacao=None):
     """Calcula similaridade cultural usando stemming"""
     cand_comp = candidato.get('hab_comportamentais', [])
     vaga_comp = vaga.get('hab_comportamentais', [])
@@ -120,25 +250,12 @@ def calcular_fator_cultural(candidato, vaga):
     if not cand_comp or not vaga_comp:
         return 0.0
 
-    # Stem das habilidades
-    cand_stem = [stemmer.stem(w) for w in cand_comp]
-    vaga_stem = [stemmer.stem(w) for w in vaga_comp]
-
-    # Embeddings
-    cand_vecs = model.encode(cand_stem)
-    vaga_vecs = model.encode(vaga_stem)
-    
-    scores = []
-    for v_vec in vaga_vecs:
-        sims = cosine_similarity([v_vec], cand_vecs)[0]
-        best_match = np.max(sims)   # melhor similaridade do candidato para cada skill da vaga
-        scores.append(best_match)
-
+    # Melhor similaridade (entre stems) do candidato para cada skill da vaga
     # Score final = média dos melhores matches
-    return float(np.mean(scores))
+    return _media_melhores_matches(vaga_comp, cand_comp, explicacao, 'cultural')
 
 
-def calcular_fator_tecnico(candidato, vaga, threshold=0.6):
+def calcular_fator_tecnico(candidato, vaga, threshold=0.6, explicacao=None):
     """Calcula similaridade técnica usando embeddings com stemming"""
     cand_skills = candidato.get('hab_tecnicas', [])
     vaga_skills = vaga.get('hab_tecnicas', [])
@@ -146,22 +263,125 @@ def calcular_fator_tecnico(candidato, vaga, threshold=0.6):
     if not cand_skills or not vaga_skills:
         return 0.0
 
-    # Stem das skills
-    cand_stem = [stemmer.stem(w) for w in cand_skills]
-    vaga_stem = [stemmer.stem(w) for w in vaga_skills]
+    # Melhor similaridade (entre stems) do candidato para cada skill da vaga
+    # Score final = média dos melhores matches
+    return _media_melhores_matches(vaga_skills, cand_skills, explicacao, 'tecnico')
 
-    # Embeddings
-    cand_vecs = model.encode(cand_stem)
-    vaga_vecs = model.encode(vaga_stem)
-    
-    scores = []
-    for v_vec in vaga_vecs:
-        sims = cosine_similarity([v_vec], cand_vecs)[0]
-        best_match = np.max(sims)   # melhor similaridade do candidato para cada skill da vaga
-        scores.append(best_match)
 
-    # Score final = média dos melhores matches
-    return float(np.mean(scores))
+def _chunks_texto(texto, tamanho=PALAVRAS_POR_CHUNK, sobreposicao=SOBREPOSICAO_CHUNK):
+    """Gera janelas de `tamanho` palavras, com `sobreposicao` palavras repetidas entre janelas"""
+    passo = tamanho - sobreposicao
+    janela = []
+    gerou = False
+    for m in re.finditer(r"\S+", texto):
+        janela.append(m.group())
+        if len(janela) == tamanho:
+            yield " ".join(janela)
+            gerou = True
+            janela = janela[passo:]
+    # Sobra final com palavras ainda não cobertas (ou texto menor que uma janela)
+    if janela and (not gerou or len(janela) > sobreposicao):
+        yield " ".join(janela)
+
+
+def _lotes(iteravel, tamanho):
+    """Agrupa um iterável em listas de até `tamanho` itens"""
+    lote = []
+    for item in iteravel:
+        lote.append(item)
+        if len(lote) == tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _embeddings_curriculo(cv_pt, cv_hash=None):
+    """
+    Gera, lote a lote, os embeddings normalizados dos chunks do currículo.
+
+    Com `cv_hash`, os embeddings são gravados em disco (float16) na primeira vez e
+    lidos via memmap nas próximas, sem chamar o modelo. A memória usada é sempre
+    de um lote, independente do tamanho do CV.
+    """
+    caminho = None
+    if cv_hash:
+        caminho = os.path.join(CACHE_EMBEDDINGS_PATH, f"{cv_hash}_{nome_arquivo_modelo(NOME_MODELO)}.f16")
+        if os.path.exists(caminho):
+            dim = obter_modelo().get_sentence_embedding_dimension()
+            if os.path.getsize(caminho) == 0:
+                return
+            vetores = np.memmap(caminho, dtype=np.float16, mode="r").reshape(-1, dim)
+            for inicio in range(0, len(vetores), TAMANHO_LOTE_ENCODE):
+                yield np.asarray(vetores[inicio:inicio + TAMANHO_LOTE_ENCODE], dtype=np.float32)
+            return
+
+    arquivo = None
+    if caminho:
+        # Temporário único por gravação: duas sessões gerando o mesmo CV não
+        # escrevem no mesmo arquivo; a última a terminar fica com o cache
+        os.makedirs(CACHE_EMBEDDINGS_PATH, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=CACHE_EMBEDDINGS_PATH, suffix=".tmp")
+        arquivo = os.fdopen(fd, "wb")
+    try:
+        for lote in _lotes(_chunks_texto(cv_pt), TAMANHO_LOTE_ENCODE):
+            vetores = obter_modelo().encode(lote, batch_size=TAMANHO_LOTE_ENCODE, normalize_embeddings=True)
+            if arquivo:
+                arquivo.write(vetores.astype(np.float16).tobytes())
+            yield vetores
+    except BaseException:
+        if arquivo:
+            arquivo.close()
+            os.remove(temporario)
+        raise
+    if arquivo:
+        arquivo.close()
+        os.replace(temporario, caminho)
+
+
+def _trecho_chunk(cv_pt, indice):
+    """Início do chunk `indice` do CV, para a explicação do fator currículo"""
+    for i, chunk in enumerate(_chunks_texto(cv_pt)):
+        if i == indice:
+            if len(chunk) > TAMANHO_TRECHO_EXPLICACAO:
+                return chunk[:TAMANHO_TRECHO_EXPLICACAO].rsplit(" ", 1)[0] + "…"
+            return chunk
+    return ""
+
+
+def calcular_fator_curriculo(candidato, vaga, explicacao=None):
+    """
+    Similaridade entre as habilidades técnicas da vaga e o texto do currículo (cv_pt).
+    Para cada skill da vaga pega o chunk do CV mais parecido (max-pooling)
+    e retorna a média desses melhores matches.
+    """
+    cv_pt = candidato.get('cv_pt')
+    vaga_skills = vaga.get('hab_tecnicas', [])
+
+    if not cv_pt or not vaga_skills:
+        return 0.0
+
+    vaga_vecs = obter_vocabulario().vetores_termos(_stems(vaga_skills))
+
+    melhores = np.full(len(vaga_vecs), -1.0, dtype=np.float32)
+    melhores_chunks = np.zeros(len(vaga_vecs), dtype=np.int64)
+    inicio = 0
+    for lote in _embeddings_curriculo(cv_pt, candidato.get('cv_hash')):
+        sims = vaga_vecs @ lote.T   # (skills da vaga, chunks do lote)
+        maximos = sims.max(axis=1)
+        melhorou = maximos > melhores
+        melhores_chunks[melhorou] = inicio + sims.argmax(axis=1)[melhorou]
+        np.maximum(melhores, maximos, out=melhores)
+        inicio += len(lote)
+
+    if np.all(melhores < -0.5):  # Nenhum chunk (CV sem palavras)
+        return 0.0
+    if explicacao is not None:
+        explicacao['curriculo'] = [
+            [str(skill), _trecho_chunk(cv_pt, int(indice)), round(float(sim), CASAS_EXPLICACAO)]
+            for skill, indice, sim in zip(vaga_skills, melhores_chunks, melhores)
+        ]
+    return float(np.mean(melhores))
 
 
 def calcular_fator_idioma(candidato, vaga):
@@ -191,18 +411,54 @@ def calcular_fator_idioma(candidato, vaga):
     
     return score / 2  # Normalizar para 0-1
 
-def calcular_match_score(candidato, vaga, pesos):
-    """Calcula score final de match considerando todos os fatores"""
-    
+def calcular_fatores(candidato, vaga, explicacao=None):
+    """
+    Calcula todos os fatores de avaliação (0-1) do candidato para a vaga.
+    O fator 'curriculo' é opcional: só é calculado se a vaga tiver peso para ele.
+
+    Se `explicacao` for um dict, recebe, para cada fator semântico (tecnico,
+    cultural, experiencia, curriculo), as linhas [termo da vaga, melhor
+    correspondência do candidato, similaridade] usadas no cálculo.
+    """
     fatores = {
         'salarial': calcular_fator_salarial(candidato, vaga),
         'engajamento': calcular_fator_engajamento(candidato, vaga),
-        'cultural': calcular_fator_cultural(candidato, vaga),
-        'tecnico': calcular_fator_tecnico(candidato, vaga),
+        'cultural': calcular_fator_cultural(candidato, vaga, explicacao=explicacao),
+        'tecnico': calcular_fator_tecnico(candidato, vaga, explicacao=explicacao),
         'idioma': calcular_fator_idioma(candidato, vaga),
-        'experiencia': calcular_fator_experiencia_final(candidato, vaga)
+        'experiencia': calcular_fator_experiencia_final(candidato, vaga, explicacao=explicacao)
     }
+    if vaga.get('pesos', {}).get('curriculo', 0) > 0:
+        fatores['curriculo'] = calcular_fator_curriculo(candidato, vaga, explicacao=explicacao)
+    return fatores
+
+
+def calcular_score_fatores(fatores, pesos):
+    """Soma ponderada de fatores já calculados (só usa os pesos definidos)"""
+    return sum(pesos.get(k, 0) * fatores[k] for k in fatores)
+
+
+# Versão da lógica dos fatores: aumente sempre que calcular_fatores (ou uma
+# função que ele chama) mudar de comportamento, para que os scores gravados
+# com a lógica antiga sejam recalculados (scripts/recalcular_scores.py)
+VERSAO_CALCULO = "1"
+
+
+def hash_pesos(pesos):
+    """Hash curto e estável dos pesos de uma vaga (independe da ordem das chaves)"""
+    return hashlib.sha256(json.dumps(pesos or {}, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def versao_score(pesos):
+    """Com o que um score foi calculado: modelo de embeddings, lógica dos fatores e pesos da vaga"""
+    return {"modelo": NOME_MODELO, "calculo": VERSAO_CALCULO, "pesos": hash_pesos(pesos)}
+
+
+def calcular_match_score(candidato, vaga, pesos):
+    """Calcula score final de match considerando todos os fatores"""
+    
+    fatores = calcular_fatores(candidato, vaga)
     
     # Garantir que só use os pesos definidos
-    score_final = sum(pesos.get(k, 0) * fatores[k] for k in fatores)
+    score_final = calcular_score_fatores(fatores, pesos)
     return score_final
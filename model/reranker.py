@@ -0,0 +1,106 @@
+# =============================================================================
+# RE-RANKING APRENDIDO (OPCIONAL)
+# =============================================================================
+#
+# Segundo estágio sobre os fatores que o score por pesos já usa: um
+# classificador (LightGBM ou XGBoost) treinado com os resultados históricos
+# (scripts/treinar_reranker.py) estima a chance de o candidato ser aprovado.
+# O score por pesos continua sendo calculado, gravado e exibido; o score
+# aprendido só muda a ordem quando escolhido em Resultados.
+#
+# A inferência é em lote: os fatores gravados de todos os candidatos de uma
+# vaga viram uma matriz (candidatos x fatores) e o modelo é chamado uma vez.
+# O arquivo do modelo é lido uma vez por processo (e de novo só se mudar).
+
+import os
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RERANKER_PATH = os.environ.get("SELEAI_RERANKER_PATH", "dados_app/modelos/reranker.joblib")
+
+# Colunas da matriz, na ordem usada no treino; fator ausente vira NaN
+# (ex: 'curriculo' quando a vaga não tem peso para ele)
+FATORES_RERANKER = ['salarial', 'engajamento', 'cultural', 'tecnico', 'idioma', 'experiencia', 'curriculo']
+
+# Resultado positivo: decisão do recrutador no app ou, em dados históricos da
+# Decision, a situação final do prospect. Negativo só reprovação ou desistência
+# definitiva; etapas em andamento (Prospect, Encaminhado ao Requisitante,
+# Entrevista..., Documentação...) não são rótulo nenhum
+STATUS_POSITIVOS = {"Qualificado", "Contratado pela Decision", "Contratado como Hunting", "Aprovado", "Proposta Aceita"}
+STATUS_NEGATIVOS = {
+    "Desqualificado", "Não Aprovado pelo Cliente", "Não Aprovado pelo RH", "Não Aprovado pelo Requisitante",
+    "Desistiu", "Desistiu da Contratação", "Recusado", "Sem interesse nesta vaga",
+}
+
+_reranker = None
+_reranker_mtime = None
+_reranker_lock = threading.Lock()
+
+
+def rotulo_candidato(candidato):
+    """1 (aprovado), 0 (reprovado ou desistiu) ou None (processo em andamento ou status desconhecido)"""
+    status = candidato.get('situacao_candidado') or candidato.get('status_atual')
+    if status in STATUS_POSITIVOS:
+        return 1
+    if status in STATUS_NEGATIVOS:
+        return 0
+    return None
+
+
+def matriz_fatores(lista_fatores, nomes=FATORES_RERANKER):
+    """Empilha dicts de fatores em uma matriz float32 (linhas x nomes), NaN onde faltar"""
+    matriz = np.full((len(lista_fatores), len(nomes)), np.nan, dtype=np.float32)
+    for i, fatores in enumerate(lista_fatores):
+        for j, nome in enumerate(nomes):
+            valor = (fatores or {}).get(nome)
+            if isinstance(valor, (int, float)):
+                matriz[i, j] = valor
+    return matriz
+
+
+def obter_reranker(caminho=RERANKER_PATH):
+    """
+    Modelo treinado ({'modelo', 'fatores', 'algoritmo', 'metricas', ...}) ou None
+    se ainda não houver um. Lido do disco na primeira chamada e recarregado só
+    quando o arquivo é substituído por um novo treino.
+    """
+    global _reranker, _reranker_mtime
+    try:
+        mtime = os.path.getmtime(caminho)
+    except OSError:
+        return None
+    if _reranker is None or mtime != _reranker_mtime:
+        with _reranker_lock:
+            if _reranker is None or mtime != _reranker_mtime:
+                import joblib
+                _reranker = joblib.load(caminho)
+                _reranker_mtime = mtime
+                logger.info("Re-ranker %s carregado de %s", _reranker.get('algoritmo'), caminho)
+    return _reranker
+
+
+def pontuar_fatores(lista_fatores, reranker):
+    """Score aprendido (0-1) para cada dict de fatores, em uma única chamada ao modelo"""
+    matriz = matriz_fatores(lista_fatores, reranker['fatores'])
+    scores = np.zeros(len(matriz), dtype=np.float64)
+    calculados = ~np.isnan(matriz).all(axis=1)  # candidaturas ainda na fila ficam com 0
+    if calculados.any():
+        scores[calculados] = reranker['modelo'].predict_proba(matriz[calculados])[:, 1]
+    return scores
+
+
+def pontuar_candidatos(candidatos, reranker=None):
+    """
+    Score aprendido de todos os candidatos (normalmente os de uma vaga) a partir
+    dos fatores gravados, sem recalcular embeddings.
+
+    Returns:
+        np.ndarray | None: Um score por candidato, ou None sem modelo treinado.
+    """
+    reranker = reranker or obter_reranker()
+    if reranker is None:
+        return None
+    return pontuar_fatores([c.get('fatores') for c in candidatos], reranker)
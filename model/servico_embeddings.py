@@ -0,0 +1,275 @@
+# =============================================================================
+# SERVIÇO LOCAL DE EMBEDDINGS (UNIX SOCKET + MICRO-LOTES)
+# =============================================================================
+#
+# Um único processo por máquina carrega o SentenceTransformer e atende todas
+# as réplicas do Streamlit e a fila de jobs por um Unix socket. Pedidos que
+# chegam juntos (de sessões ou processos diferentes) são agrupados em
+# micro-lotes: o lote é enviado ao modelo quando chega a `max_lote` textos
+# ou quando o primeiro pedido já esperou `espera_ms`.
+#
+# Servidor:
+#   python -m model.servico_embeddings --socket /tmp/seleai_embeddings.sock
+#
+# Cliente: defina SELEAI_EMBEDDINGS_SOCKET com o mesmo caminho e o
+# model/model.py passa a usar o serviço (ver `obter_modelo`).
+#
+# Protocolo: cada mensagem é um frame de 4 bytes (tamanho, big-endian) seguido
+# do conteúdo. Pedido: JSON {"op": "encode" | "dimensao", "textos": [...],
+# "normalizar": bool}. Resposta: JSON {"ok", "formato" | "dimensao" | "erro"}
+# e, para "encode", um segundo frame com os vetores em float32.
+
+import os
+import json
+import time
+import queue
+import socket
+import struct
+import logging
+import argparse
+import threading
+import socketserver
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SOCKET_PADRAO = "/tmp/seleai_embeddings.sock"
+MAX_LOTE = 64
+ESPERA_MS = 5
+TIMEOUT_CLIENTE = 60  # segundos
+
+
+# =============================================================================
+# FRAMES
+# =============================================================================
+
+def _enviar_frame(sock, dados):
+    sock.sendall(struct.pack(">I", len(dados)) + dados)
+
+def _receber_exato(sock, tamanho):
+    partes = []
+    while tamanho:
+        parte = sock.recv(min(tamanho, 1024 * 1024))
+        if not parte:
+            raise ConnectionError("Conexão encerrada no meio da mensagem")
+        partes.append(parte)
+        tamanho -= len(parte)
+    return b"".join(partes)
+
+def _receber_frame(sock):
+    (tamanho,) = struct.unpack(">I", _receber_exato(sock, 4))
+    return _receber_exato(sock, tamanho)
+
+
+# =============================================================================
+# SERVIDOR
+# =============================================================================
+
+class _Pedido:
+    """Um pedido de encode aguardando o resultado do micro-lote"""
+
+    def __init__(self, textos, normalizar):
+        self.textos = textos
+        self.normalizar = normalizar
+        self.vetores = None
+        self.erro = None
+        self.pronto = threading.Event()
+
+
+class AgrupadorLotes:
+    """
+    Junta pedidos concorrentes em micro-lotes e chama o modelo uma vez por lote.
+
+    Args:
+        modelo: Objeto com `encode(textos, batch_size=...)` (SentenceTransformer).
+        max_lote (int): Máximo de textos por chamada ao modelo.
+        espera_ms (float): Quanto o primeiro pedido do lote espera por outros.
+    """
+
+    def __init__(self, modelo, max_lote=MAX_LOTE, espera_ms=ESPERA_MS):
+        self.modelo = modelo
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="agrupador-embeddings", daemon=True)
+        self._thread.start()
+
+    def encode(self, textos, normalizar=False):
+        """Chamado pelas threads das conexões: bloqueia até o lote do pedido ser processado"""
+        pedido = _Pedido(textos, normalizar)
+        self._fila.put(pedido)
+        pedido.pronto.wait()
+        if pedido.erro is not None:
+            raise pedido.erro
+        return pedido.vetores
+
+    def _proximo_lote(self):
+        lote = [self._fila.get()]
+        total = len(lote[0].textos)
+        limite = time.monotonic() + self.espera
+        while total < self.max_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                pedido = self._fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            lote.append(pedido)
+            total += len(pedido.textos)
+        return lote
+
+    def _loop(self):
+        while True:
+            lote = self._proximo_lote()
+            textos = [t for pedido in lote for t in pedido.textos]
+            try:
+                vetores = np.asarray(self.modelo.encode(textos, batch_size=self.max_lote), dtype=np.float32)
+            except Exception as e:
+                logger.exception("Erro ao gerar embeddings para um lote de %d textos", len(textos))
+                for pedido in lote:
+                    pedido.erro = e
+                    pedido.pronto.set()
+                continue
+
+            inicio = 0
+            for pedido in lote:
+                fim = inicio + len(pedido.textos)
+                parte = vetores[inicio:fim]
+                if pedido.normalizar:
+                    normas = np.linalg.norm(parte, axis=1, keepdims=True)
+                    parte = parte / np.maximum(normas, 1e-12)
+                pedido.vetores = parte
+                pedido.pronto.set()
+                inicio = fim
+
+
+class _ConexaoHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        agrupador = self.server.agrupador
+        while True:
+            try:
+                pedido = json.loads(_receber_frame(self.request))
+            except (ConnectionError, struct.error):
+                return  # cliente fechou a conexão
+            try:
+                if pedido.get("op") == "dimensao":
+                    _enviar_frame(self.request, json.dumps({"ok": True, "dimensao": self.server.dimensao}).encode())
+                    continue
+                vetores = agrupador.encode(pedido["textos"], bool(pedido.get("normalizar")))
+                resposta = {"ok": True, "formato": list(vetores.shape)}
+                _enviar_frame(self.request, json.dumps(resposta).encode())
+                _enviar_frame(self.request, np.ascontiguousarray(vetores, dtype=np.float32).tobytes())
+            except Exception as e:
+                _enviar_frame(self.request, json.dumps({"ok": False, "erro": f"{type(e).__name__}: {e}"}).encode())
+
+
+class ServidorEmbeddings(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # várias réplicas conectando ao mesmo tempo
+
+    def __init__(self, caminho_socket, modelo, max_lote=MAX_LOTE, espera_ms=ESPERA_MS):
+        if os.path.exists(caminho_socket):
+            os.remove(caminho_socket)  # socket de uma execução anterior
+        super().__init__(caminho_socket, _ConexaoHandler)
+        self.agrupador = AgrupadorLotes(modelo, max_lote, espera_ms)
+        self.dimensao = modelo.get_sentence_embedding_dimension()
+
+
+# =============================================================================
+# CLIENTE
+# =============================================================================
+
+class ClienteEmbeddings:
+    """
+    Cliente do serviço com a mesma interface usada do SentenceTransformer
+    (`encode` e `get_sentence_embedding_dimension`). Cada thread mantém sua
+    própria conexão, então o cliente pode ser compartilhado.
+    """
+
+    def __init__(self, caminho_socket=SOCKET_PADRAO, timeout=TIMEOUT_CLIENTE):
+        self.caminho_socket = caminho_socket
+        self.timeout = timeout
+        self._local = threading.local()
+        self._dimensao = None
+
+    def _conexao(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.caminho_socket)
+            self._local.sock = sock
+        return sock
+
+    def _fechar(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _chamar(self, pedido):
+        try:
+            sock = self._conexao()
+            _enviar_frame(sock, json.dumps(pedido, ensure_ascii=False).encode("utf-8"))
+            resposta = json.loads(_receber_frame(sock))
+            if not resposta["ok"]:
+                raise RuntimeError(f"Serviço de embeddings: {resposta['erro']}")
+            if pedido["op"] == "encode":
+                linhas, dim = resposta["formato"]
+                return np.frombuffer(_receber_frame(sock), dtype=np.float32).reshape(linhas, dim)
+            return resposta
+        except (OSError, ConnectionError):
+            self._fechar()  # a próxima chamada reconecta
+            raise
+
+    def encode(self, textos, batch_size=None, normalize_embeddings=False, **kwargs):
+        """Mesmo contrato do SentenceTransformer.encode para listas de textos (ou um texto)"""
+        unico = isinstance(textos, str)
+        lista = [textos] if unico else list(textos)
+        if not lista:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        vetores = self._chamar({"op": "encode", "textos": lista, "normalizar": bool(normalize_embeddings)})
+        return vetores[0] if unico else vetores
+
+    def get_sentence_embedding_dimension(self):
+        if self._dimensao is None:
+            self._dimensao = self._chamar({"op": "dimensao"})["dimensao"]
+        return self._dimensao
+
+    def disponivel(self):
+        """Indica se o serviço está no ar (usado para decidir entre serviço e modelo local)"""
+        try:
+            self.get_sentence_embedding_dimension()
+            return True
+        except (OSError, ConnectionError, RuntimeError):
+            return False
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço local de embeddings do SeleAI")
+    parser.add_argument("--socket", default=os.environ.get("SELEAI_EMBEDDINGS_SOCKET", SOCKET_PADRAO))
+    parser.add_argument("--max-lote", type=int, default=MAX_LOTE, help="Máximo de textos por chamada ao modelo")
+    parser.add_argument("--espera-ms", type=float, default=ESPERA_MS, help="Espera máxima para completar um lote")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from model.model import NOME_MODELO, criar_modelo_local
+
+    modelo = criar_modelo_local()
+    with ServidorEmbeddings(args.socket, modelo, args.max_lote, args.espera_ms) as servidor:
+        logger.info("Serviço de embeddings (%s) ouvindo em %s", NOME_MODELO, args.socket)
+        try:
+            servidor.serve_forever()
+        finally:
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
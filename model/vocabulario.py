@@ -0,0 +1,316 @@
+# =============================================================================
+# VOCABULÁRIO DE HABILIDADES E MATRIZ DE SIMILARIDADE TOP-K
+# =============================================================================
+#
+# Habilidades, áreas e competências são palavras tokenizadas e com stemming,
+# então o conjunto de termos é limitado e os mesmos pares são comparados o
+# tempo todo. Este módulo guarda em disco, em um único arquivo por modelo
+# (vocabulario_<modelo>.npz, trocado de uma vez a cada gravação):
+#   - termos: vocabulário (id = posição na lista);
+#   - vetores: embedding normalizado de cada termo (float32);
+#   - ids/sims: para cada termo, os TOP_K termos mais parecidos (ids e
+#     similaridades), ou seja, uma matriz esparsa termo x termo.
+# Termos e vetores no mesmo arquivo: a linha i dos vetores é sempre a do
+# termo i, mesmo com vários modelos gravando na mesma pasta.
+#
+# O fator semântico de uma vaga x candidato vira consulta: para cada termo da
+# vaga, se algum termo do candidato está entre os vizinhos top-k, o melhor deles
+# é o máximo exato; senão o máximo sai do produto com os embeddings guardados.
+# O modelo só é chamado para termos novos, que entram no vocabulário (e na
+# matriz) de forma incremental; a gravação é feita em lotes de termos novos
+# (e na saída do processo), não a cada termo.
+#
+# Construção offline a partir dos dados locais:
+#   python -m model.vocabulario --vagas dados_app/vagas --candidatos dados_app/candidatos
+
+import os
+import json
+import glob
+import time
+import atexit
+import logging
+import argparse
+import threading
+
+import numpy as np
+
+from shared.recursos import nome_arquivo_modelo
+
+logger = logging.getLogger(__name__)
+
+PASTA_VOCABULARIO = "dados_app/vocabulario/"
+TOP_K = 20
+LINHAS_POR_BLOCO = 1024  # linhas da matriz calculadas por vez na construção completa
+GRAVAR_A_CADA_TERMOS = 200    # termos novos acumulados antes de regravar o arquivo
+GRAVAR_A_CADA_SEGUNDOS = 60   # ou tempo desde a última gravação com termos pendentes
+CAMPOS_TERMOS = ("hab_tecnicas", "hab_comportamentais", "areas_atuacao", "area_atuacao")
+
+_SEM_VIZINHO = -1
+
+
+def _top_k(similaridades, k, excluir=None):
+    """
+    Os k maiores valores de cada linha (ids e valores, em ordem decrescente).
+    `excluir` (array de colunas, uma por linha) remove o próprio termo.
+    """
+    similaridades = similaridades.copy()
+    if excluir is not None:
+        similaridades[np.arange(len(similaridades)), excluir] = -np.inf
+    n_colunas = similaridades.shape[1]
+    k_efetivo = min(k, n_colunas)
+    ids = np.full((len(similaridades), k), _SEM_VIZINHO, dtype=np.int32)
+    valores = np.full((len(similaridades), k), -np.inf, dtype=np.float32)
+    if k_efetivo == 0:
+        return ids, valores
+    parte = np.argpartition(-similaridades, k_efetivo - 1, axis=1)[:, :k_efetivo]
+    parte_valores = np.take_along_axis(similaridades, parte, axis=1)
+    ordem = np.argsort(-parte_valores, axis=1)
+    ids[:, :k_efetivo] = np.take_along_axis(parte, ordem, axis=1)
+    valores[:, :k_efetivo] = np.take_along_axis(parte_valores, ordem, axis=1)
+    ids[~np.isfinite(valores)] = _SEM_VIZINHO
+    return ids, valores
+
+
+class VocabularioSkills:
+    """
+    Vocabulário persistido com embeddings e vizinhos top-k de cada termo.
+
+    Args:
+        codificar (callable): Recebe uma lista de termos e devolve os embeddings
+            normalizados (ex: modelo.encode(termos, normalize_embeddings=True)).
+        nome_modelo (str): Entra no nome dos arquivos; trocar o modelo gera outro vocabulário.
+        pasta (str): Onde os arquivos ficam.
+        k (int): Vizinhos guardados por termo.
+    """
+
+    def __init__(self, codificar, nome_modelo, pasta=PASTA_VOCABULARIO, k=TOP_K):
+        self.codificar = codificar
+        self.nome_modelo = nome_modelo
+        self.pasta = pasta
+        self.k = k
+        self.termos = []
+        self.ids = {}
+        self.vetores = None
+        self.vizinhos_ids = np.zeros((0, k), dtype=np.int32)
+        self.vizinhos_sims = np.zeros((0, k), dtype=np.float32)
+        self._lock = threading.RLock()
+        self._pendentes = 0
+        self._ultima_gravacao = time.monotonic()
+        self._carregar()
+        atexit.register(self.gravar_pendentes)
+
+    # -------------------------------------------------------------------------
+    # Persistência
+    # -------------------------------------------------------------------------
+
+    @property
+    def arquivo(self):
+        return os.path.join(self.pasta, f"vocabulario_{nome_arquivo_modelo(self.nome_modelo)}.npz")
+
+    def _carregar(self):
+        try:
+            with np.load(self.arquivo, allow_pickle=False) as dados:
+                termos = dados["termos"].tolist()
+                vetores, ids, sims = dados["vetores"], dados["ids"], dados["sims"]
+        except (FileNotFoundError, ValueError, KeyError, OSError):
+            return  # vocabulário novo; os termos entram conforme aparecem
+        if not (len(termos) == len(vetores) == len(set(termos))) or ids.shape != (len(termos), self.k) \
+                or sims.shape != ids.shape:
+            logger.warning("Vocabulário %s inconsistente; começando do zero", self.arquivo)
+            return
+        self.termos = termos
+        self.ids = {termo: i for i, termo in enumerate(termos)}
+        self.vetores = vetores.astype(np.float32, copy=False)
+        self.vizinhos_ids = ids
+        self.vizinhos_sims = sims
+
+    def salvar(self):
+        """Grava termos, vetores e vizinhos em um único arquivo, trocado de uma vez"""
+        with self._lock:
+            if self.vetores is None:
+                return
+            os.makedirs(self.pasta, exist_ok=True)
+            temporario = f"{self.arquivo}.{os.getpid()}.tmp"
+            with open(temporario, "wb") as f:
+                np.savez(f, termos=np.array(self.termos, dtype=str), vetores=self.vetores,
+                         ids=self.vizinhos_ids, sims=self.vizinhos_sims)
+            os.replace(temporario, self.arquivo)
+            self._pendentes = 0
+            self._ultima_gravacao = time.monotonic()
+
+    def gravar_pendentes(self):
+        """Grava se houver termos novos ainda não gravados"""
+        if self._pendentes:
+            self.salvar()
+
+    # -------------------------------------------------------------------------
+    # Construção e atualização
+    # -------------------------------------------------------------------------
+
+    def construir(self, termos):
+        """Refaz o vocabulário inteiro (offline): codifica tudo e calcula a matriz top-k por blocos"""
+        termos = list(dict.fromkeys(str(t) for t in termos if t))
+        if not termos:
+            return
+        with self._lock:
+            vetores = np.asarray(self.codificar(termos), dtype=np.float32).reshape(len(termos), -1)
+            ids = np.empty((len(termos), self.k), dtype=np.int32)
+            sims = np.empty((len(termos), self.k), dtype=np.float32)
+            for inicio in range(0, len(termos), LINHAS_POR_BLOCO):
+                bloco = vetores[inicio:inicio + LINHAS_POR_BLOCO]
+                proprios = np.arange(inicio, inicio + len(bloco))
+                ids[inicio:inicio + len(bloco)], sims[inicio:inicio + len(bloco)] = _top_k(
+                    bloco @ vetores.T, self.k, excluir=proprios
+                )
+            self.termos = termos
+            self.ids = {termo: i for i, termo in enumerate(termos)}
+            self.vetores = vetores
+            self.vizinhos_ids, self.vizinhos_sims = ids, sims
+            self.salvar()
+
+    def _adicionar(self, novos):
+        """Codifica termos novos e atualiza a matriz só nas linhas/colunas afetadas"""
+        novos_vetores = np.asarray(self.codificar(novos), dtype=np.float32).reshape(len(novos), -1)
+        n_antigos = len(self.termos)
+        vetores = novos_vetores if self.vetores is None else np.vstack([self.vetores, novos_vetores])
+
+        # Vizinhos dos termos novos: contra o vocabulário todo
+        proprios = np.arange(n_antigos, n_antigos + len(novos))
+        sims_novos = novos_vetores @ vetores.T
+        novos_ids, novos_sims = _top_k(sims_novos, self.k, excluir=proprios)
+
+        # Termos antigos: os novos entram no top-k se forem mais parecidos que o k-ésimo atual
+        if n_antigos:
+            candidatos_sims = np.hstack([self.vizinhos_sims, sims_novos[:, :n_antigos].T])
+            candidatos_ids = np.hstack([
+                self.vizinhos_ids,
+                np.broadcast_to(proprios.astype(np.int32), (n_antigos, len(novos)))
+            ])
+            ordem, valores = _top_k(candidatos_sims, self.k)
+            antigos_ids = np.where(ordem == _SEM_VIZINHO, _SEM_VIZINHO,
+                                   np.take_along_axis(candidatos_ids, np.maximum(ordem, 0), axis=1))
+            self.vizinhos_ids = np.vstack([antigos_ids.astype(np.int32), novos_ids])
+            self.vizinhos_sims = np.vstack([valores, novos_sims])
+        else:
+            self.vizinhos_ids, self.vizinhos_sims = novos_ids, novos_sims
+
+        for termo in novos:
+            self.ids[termo] = len(self.termos)
+            self.termos.append(termo)
+        self.vetores = vetores
+
+    def garantir(self, termos):
+        """Ids dos termos, incluindo os que ainda não estão no vocabulário (gravados em lotes)"""
+        termos = [str(t) for t in termos]
+        with self._lock:
+            novos = list(dict.fromkeys(t for t in termos if t not in self.ids))
+            if novos:
+                self._adicionar(novos)
+                self._pendentes += len(novos)
+                if self._pendentes >= GRAVAR_A_CADA_TERMOS \
+                        or time.monotonic() - self._ultima_gravacao >= GRAVAR_A_CADA_SEGUNDOS:
+                    self.salvar()
+            return np.array([self.ids[t] for t in termos], dtype=np.int64)
+
+    # -------------------------------------------------------------------------
+    # Consultas
+    # -------------------------------------------------------------------------
+
+    def vetores_termos(self, termos):
+        """Embeddings normalizados dos termos (codificando só os novos)"""
+        ids = self.garantir(termos)
+        return self.vetores[ids]
+
+    def melhores_similaridades(self, termos_vaga, termos_candidato):
+        """
+        Para cada termo da vaga, a maior similaridade de cosseno com algum termo do candidato.
+
+        Returns:
+            np.ndarray: Um valor por termo da vaga.
+        """
+        return self.melhores_matches(termos_vaga, termos_candidato)[0]
+
+    def melhores_matches(self, termos_vaga, termos_candidato):
+        """
+        Como `melhores_similaridades`, indicando também qual termo do candidato deu o máximo.
+
+        Returns:
+            tuple: (np.ndarray de similaridades, np.ndarray de posições em
+            `termos_candidato`), um valor por termo da vaga.
+        """
+        ids_vaga = self.garantir(termos_vaga)
+        ids_cand = self.garantir(termos_candidato)
+        posicao_cand = {}
+        for posicao, id_cand in enumerate(ids_cand.tolist()):
+            posicao_cand.setdefault(id_cand, posicao)
+
+        melhores = np.empty(len(ids_vaga), dtype=np.float32)
+        posicoes = np.zeros(len(ids_vaga), dtype=np.int64)
+        sem_vizinho = []
+        for i, id_vaga in enumerate(ids_vaga):
+            if id_vaga in posicao_cand:
+                melhores[i] = float(self.vetores[id_vaga] @ self.vetores[id_vaga])  # mesmo termo
+                posicoes[i] = posicao_cand[id_vaga]
+                continue
+            # Vizinhos em ordem decrescente: o primeiro que o candidato tem é o máximo exato
+            for vizinho, sim in zip(self.vizinhos_ids[id_vaga], self.vizinhos_sims[id_vaga]):
+                if vizinho in posicao_cand:
+                    melhores[i] = sim
+                    posicoes[i] = posicao_cand[vizinho]
+                    break
+            else:
+                sem_vizinho.append(i)
+
+        if sem_vizinho:
+            # Nenhum termo do candidato no top-k: produto com os embeddings guardados
+            sims = self.vetores[ids_vaga[sem_vizinho]] @ self.vetores[ids_cand].T
+            melhores[sem_vizinho] = sims.max(axis=1)
+            posicoes[sem_vizinho] = sims.argmax(axis=1)
+        return melhores, posicoes
+
+
+# =============================================================================
+# CONSTRUÇÃO OFFLINE
+# =============================================================================
+
+def termos_dos_registros(pastas):
+    """Termos com stemming de todas as vagas/candidatos (JSON) das pastas"""
+    from model.model import stem
+
+    termos = {}
+    for pasta in pastas:
+        for arquivo in glob.glob(os.path.join(pasta, "*.json")):
+            try:
+                with open(arquivo, "r", encoding="utf-8") as f:
+                    registro = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            for campo in CAMPOS_TERMOS:
+                for palavra in registro.get(campo) or []:
+                    termos[stem(str(palavra))] = None
+    return list(termos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Constrói o vocabulário de habilidades e a matriz top-k")
+    parser.add_argument("--vagas", default="dados_app/vagas/")
+    parser.add_argument("--candidatos", default="dados_app/candidatos/")
+    parser.add_argument("--pasta", default=PASTA_VOCABULARIO, help="Onde gravar o vocabulário")
+    parser.add_argument("--k", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from model.model import NOME_MODELO, obter_modelo
+
+    termos = termos_dos_registros([args.vagas, args.candidatos])
+    vocabulario = VocabularioSkills(
+        lambda lote: obter_modelo().encode(lote, normalize_embeddings=True),
+        NOME_MODELO, pasta=args.pasta, k=args.k
+    )
+    vocabulario.construir(termos)
+    logger.info("Vocabulário com %d termos gravado em %s", len(vocabulario.termos), args.pasta)
+
+
+if __name__ == "__main__":
+    main()
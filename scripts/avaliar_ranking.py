@@ -0,0 +1,284 @@
+# =============================================================================
+# AVALIAÇÃO OFFLINE DO RANKING: QUALIDADE x LATÊNCIA
+# =============================================================================
+#
+# Refaz o ranking de cada vaga com as candidaturas de resultado conhecido
+# (os mesmos rótulos do re-ranker: situação final do prospect na base
+# histórica ou a decisão do recrutador no app) para uma ou mais combinações
+# de modelo de embeddings e pesos dos fatores, e mede:
+#   - qualidade: NDCG@k e recall@k por vaga (média entre as vagas);
+#   - encoder: latência por lote, throughput e memória do modelo;
+#   - score: tempo de calcular_fatores por candidatura.
+#
+# Cada execução grava um relatório JSON com a configuração e uma impressão
+# digital dos dados avaliados; --comparar junta relatórios em uma tabela e
+# avisa quando eles não foram medidos sobre os mesmos dados.
+#
+# Uso (na raiz do projeto):
+#   python scripts/avaliar_ranking.py
+#   python scripts/avaliar_ranking.py --modelos all-MiniLM-L6-v2 paraphrase-multilingual-MiniLM-L12-v2
+#   python scripts/avaliar_ranking.py --variantes pesos sem_curriculo uniforme --max-vagas 50
+#   python scripts/avaliar_ranking.py --comparar dados_app/avaliacoes/*.json
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import resource
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import model
+from model.model import calcular_fatores, calcular_score_fatores, _chunks_texto, TAMANHO_LOTE_ENCODE
+from model.reranker import FATORES_RERANKER, rotulo_candidato
+from treinar_reranker import ler_pasta, texto_cv, ndcg_em_k
+
+PASTA_RELATORIOS = "dados_app/avaliacoes"
+KS = (5, 10)
+MAX_TEXTOS_ENCODE = 512  # textos usados na medição do encoder
+
+FATORES_SEMANTICOS = ('cultural', 'tecnico', 'experiencia', 'curriculo')
+
+# Pesos usados no ranking, a partir dos pesos gravados na vaga
+VARIANTES_FATORES = {
+    "pesos": lambda pesos: pesos,
+    "sem_curriculo": lambda pesos: {**pesos, 'curriculo': 0},
+    "uniforme": lambda pesos: {fator: 1 for fator in FATORES_RERANKER},
+    "so_semanticos": lambda pesos: {fator: 1 for fator in FATORES_SEMANTICOS},
+}
+
+
+# =============================================================================
+# DADOS
+# =============================================================================
+
+def montar_vagas_avaliacao(candidatos, vagas, max_vagas=None, semente=42):
+    """
+    {id_vaga: [candidaturas rotuladas]} só com vagas que têm ao menos uma
+    candidatura aprovada e uma reprovada (sem isso o ranking não tem o que medir).
+    """
+    por_vaga = {}
+    for candidato in candidatos:
+        rotulo = rotulo_candidato(candidato)
+        if rotulo is not None and candidato.get('id_vaga') in vagas:
+            por_vaga.setdefault(candidato['id_vaga'], []).append({**candidato, 'rotulo': rotulo})
+    ids = sorted(i for i, grupo in por_vaga.items() if len({c['rotulo'] for c in grupo}) == 2)
+    if max_vagas and len(ids) > max_vagas:
+        ids = sorted(random.Random(semente).sample(ids, max_vagas))
+    return {i: por_vaga[i] for i in ids}
+
+
+def impressao_digital(por_vaga):
+    """Hash das candidaturas e rótulos avaliados: relatórios só são comparáveis com o mesmo valor"""
+    h = hashlib.sha256()
+    for id_vaga in sorted(por_vaga):
+        for c in sorted(por_vaga[id_vaga], key=lambda c: str(c.get('codigo_candidato'))):
+            h.update(f"{id_vaga}|{c.get('codigo_candidato')}|{c['rotulo']}\n".encode())
+    return h.hexdigest()[:16]
+
+
+def textos_encoder(por_vaga, vagas, limite=MAX_TEXTOS_ENCODE):
+    """Habilidades e trechos de currículo dos dados avaliados (o que o modelo codifica de fato)"""
+    textos = []
+    for id_vaga, grupo in por_vaga.items():
+        textos.extend(map(str, vagas[id_vaga].get('hab_tecnicas', [])))
+        for candidato in grupo:
+            textos.extend(map(str, candidato.get('hab_tecnicas', [])))
+            textos.extend(_chunks_texto(candidato.get('cv_pt') or ""))
+    return list(dict.fromkeys(t for t in textos if t.strip()))[:limite]
+
+
+# =============================================================================
+# MEDIÇÕES
+# =============================================================================
+
+def rss_mb():
+    """Memória residente atual do processo (pico, se /proc não existir)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir_encoder(modelo, textos):
+    """Latência por lote (p50/p95), throughput e memória ocupada pelos pesos"""
+    modelo.encode(textos[:1], normalize_embeddings=True)  # aquecimento
+    tempos = []
+    for inicio in range(0, len(textos), TAMANHO_LOTE_ENCODE):
+        t = time.perf_counter()
+        modelo.encode(textos[inicio:inicio + TAMANHO_LOTE_ENCODE], batch_size=TAMANHO_LOTE_ENCODE,
+                      normalize_embeddings=True)
+        tempos.append(time.perf_counter() - t)
+    parametros = sum(p.numel() * p.element_size() for p in modelo.parameters()) if hasattr(modelo, "parameters") else None
+    return {
+        "textos": len(textos),
+        "encode_ms_por_lote_p50": float(np.percentile(tempos, 50)) * 1000 if tempos else None,
+        "encode_ms_por_lote_p95": float(np.percentile(tempos, 95)) * 1000 if tempos else None,
+        "encode_textos_por_s": len(textos) / sum(tempos) if tempos and sum(tempos) else None,
+        "dimensao": modelo.get_sentence_embedding_dimension(),
+        "memoria_pesos_mb": parametros / 2**20 if parametros is not None else None,
+    }
+
+
+def calcular_fatores_vagas(por_vaga, vagas, variantes):
+    """
+    Fatores de cada candidatura com o modelo atual. O fator currículo só é
+    calculado nas vagas em que alguma variante usa esse peso.
+
+    Returns:
+        tuple: ({id_vaga: [fatores]}, [ms por candidatura])
+    """
+    fatores_vagas, tempos = {}, []
+    for id_vaga, grupo in por_vaga.items():
+        vaga = vagas[id_vaga]
+        peso_curriculo = max(VARIANTES_FATORES[v](vaga.get('pesos', {})).get('curriculo', 0) for v in variantes)
+        vaga = {**vaga, 'pesos': {**vaga.get('pesos', {}), 'curriculo': peso_curriculo}}
+        fatores_vagas[id_vaga] = []
+        for candidato in grupo:
+            inicio = time.perf_counter()
+            fatores_vagas[id_vaga].append(calcular_fatores(candidato, vaga))
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    return fatores_vagas, tempos
+
+
+def recall_em_k(rotulos_ordenados, k):
+    positivos = sum(rotulos_ordenados)
+    return sum(rotulos_ordenados[:k]) / positivos if positivos else None
+
+
+def qualidade(por_vaga, vagas, fatores_vagas, variante, ks=KS):
+    """NDCG@k e recall@k médios entre as vagas para uma variante de pesos"""
+    valores = {f"{metrica}@{k}": [] for k in ks for metrica in ("ndcg", "recall")}
+    for id_vaga, grupo in por_vaga.items():
+        pesos = VARIANTES_FATORES[variante](vagas[id_vaga].get('pesos', {}))
+        scores = np.array([calcular_score_fatores(f, pesos) for f in fatores_vagas[id_vaga]])
+        ordem = np.argsort(-scores, kind="stable")
+        rotulos = [grupo[i]['rotulo'] for i in ordem]
+        for k in ks:
+            for metrica, funcao in (("ndcg", ndcg_em_k), ("recall", recall_em_k)):
+                valor = funcao(rotulos, k)
+                if valor is not None:
+                    valores[f"{metrica}@{k}"].append(valor)
+    return {nome: float(np.mean(v)) if v else None for nome, v in valores.items()}
+
+
+def avaliar_modelo(nome_modelo, por_vaga, vagas, variantes, ks=KS):
+    """Uma linha do relatório por variante de pesos, todas com as medições do mesmo modelo"""
+    rss_antes = rss_mb()
+    inicio = time.perf_counter()
+    modelo = model.usar_modelo(nome_modelo)
+    carga_s = time.perf_counter() - inicio
+    encoder = medir_encoder(modelo, textos_encoder(por_vaga, vagas))
+    encoder.update(carga_s=carga_s, rss_modelo_mb=rss_mb() - rss_antes)
+
+    fatores_vagas, tempos = calcular_fatores_vagas(por_vaga, vagas, variantes)
+    score = {
+        "fatores_ms_por_candidatura_p50": float(np.percentile(tempos, 50)),
+        "fatores_ms_por_candidatura_p95": float(np.percentile(tempos, 95)),
+    }
+    return [
+        {"modelo": nome_modelo, "variante": variante, **qualidade(por_vaga, vagas, fatores_vagas, variante, ks),
+         **encoder, **score}
+        for variante in variantes
+    ]
+
+
+# =============================================================================
+# RELATÓRIOS
+# =============================================================================
+
+def imprimir_tabela(linhas, ks=KS):
+    colunas = [f"{m}@{k}" for k in ks for m in ("ndcg", "recall")]
+    fmt = lambda v, casas=3: f"{v:.{casas}f}" if v is not None else "-"
+    print(f"\n{'Modelo':<40} {'Variante':<14} " + " ".join(f"{c:>9}" for c in colunas) +
+          f" {'lote p50':>9} {'textos/s':>9} {'pesos MB':>9} {'fat. p50':>9}")
+    for linha in linhas:
+        print(
+            f"{linha['modelo'][:40]:<40} {linha['variante']:<14} "
+            + " ".join(f"{fmt(linha.get(c)):>9}" for c in colunas)
+            + f" {fmt(linha.get('encode_ms_por_lote_p50'), 1):>9}"
+            + f" {fmt(linha.get('encode_textos_por_s'), 0):>9}"
+            + f" {fmt(linha.get('memoria_pesos_mb'), 0):>9}"
+            + f" {fmt(linha.get('fatores_ms_por_candidatura_p50'), 1):>9}"
+        )
+    print("(lote p50 e fat. p50 em ms; fat. = calcular_fatores por candidatura, com os caches do modelo)")
+
+
+def salvar_relatorio(relatorio, pasta=PASTA_RELATORIOS):
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"avaliacao_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def comparar(caminhos):
+    relatorios = []
+    for caminho in caminhos:
+        with open(caminho, "r", encoding="utf-8") as f:
+            relatorios.append(json.load(f))
+    if len({r['dados']['impressao_digital'] for r in relatorios}) > 1:
+        print("[aviso] os relatórios foram medidos sobre dados diferentes; a qualidade não é comparável")
+    ks = sorted({k for r in relatorios for k in r['config']['ks']})
+    imprimir_tabela([linha for r in relatorios for linha in r['resultados']], ks)
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara qualidade do ranking e custo de modelos e pesos dos fatores")
+    parser.add_argument("--candidatos", default="dados_app/candidatos")
+    parser.add_argument("--vagas", default="dados_app/vagas")
+    parser.add_argument("--curriculos", default="dados_app/curriculos")
+    parser.add_argument("--modelos", nargs="+", default=[model.NOME_MODELO])
+    parser.add_argument("--variantes", nargs="+", choices=sorted(VARIANTES_FATORES), default=["pesos"])
+    parser.add_argument("--k", nargs="+", type=int, default=list(KS))
+    parser.add_argument("--max-vagas", type=int, help="Avalia uma amostra das vagas (mesma semente, mesma amostra)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default=PASTA_RELATORIOS)
+    parser.add_argument("--comparar", nargs="+", metavar="RELATORIO", help="Só mostra relatórios já gravados lado a lado")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(args.comparar)
+        return
+
+    vagas = {v['id']: v for v in ler_pasta(args.vagas) if 'id' in v}
+    por_vaga = montar_vagas_avaliacao(ler_pasta(args.candidatos), vagas, args.max_vagas, args.semente)
+    if not por_vaga:
+        sys.exit("Nenhuma vaga com candidaturas aprovadas e reprovadas para avaliar")
+    if any(VARIANTES_FATORES[v](vagas[i].get('pesos', {})).get('curriculo', 0) > 0
+           for v in args.variantes for i in por_vaga):
+        for grupo in por_vaga.values():
+            for candidato in grupo:
+                candidato['cv_pt'] = texto_cv(candidato, args.curriculos)
+    total = sum(len(g) for g in por_vaga.values())
+    print(f"{len(por_vaga)} vaga(s), {total} candidatura(s) rotulada(s)")
+
+    resultados = []
+    for nome_modelo in args.modelos:
+        print(f"Avaliando {nome_modelo}...")
+        resultados.extend(avaliar_modelo(nome_modelo, por_vaga, vagas, args.variantes, args.k))
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(),
+        "config": {"modelos": args.modelos, "variantes": args.variantes, "ks": args.k,
+                   "max_vagas": args.max_vagas, "semente": args.semente},
+        "dados": {"vagas": len(por_vaga), "candidaturas": total, "impressao_digital": impressao_digital(por_vaga)},
+        "resultados": resultados,
+    }
+    imprimir_tabela(resultados, args.k)
+    print(f"\nRelatório gravado em {salvar_relatorio(relatorio, args.saida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# =============================================================================
+# COMPACTAÇÃO DO LOG DE EVENTOS DE STATUS
+# =============================================================================
+#
+# Grava nos JSONs dos candidatos os eventos de Qualificar/Desqualificar ainda
+# pendentes no log (shared/eventos.py) e os tira do log. Os apps já fazem isso
+# periodicamente; rode à mão antes de processos que leem só os registros
+# (ex: scripts/treinar_reranker.py) ou para esvaziar o log de uma vez.
+#
+# Rode com o app parado (local) ou com todas as instâncias paradas (S3): a
+# trava entre a compactação e a fila de jobs vale só dentro de cada
+# processo, e um job rodando ao mesmo tempo poderia sobrescrever o registro
+# recém-compactado. Com o app no ar a compactação automática já cuida disso.
+#
+# Uso (na raiz do projeto):
+#   python scripts/compactar_eventos.py
+#   python scripts/compactar_eventos.py --s3
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grava os eventos de status pendentes nos registros dos candidatos")
+    parser.add_argument("--s3", action="store_true", help="Compacta o log do bucket S3 em vez da pasta local")
+    parser.add_argument("--raiz", default="dados_app", help="Pasta de dados local")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if args.s3:
+        from shared.utils import compactar_eventos_s3, S3_CANDIDATOS_PATH
+        contagem = compactar_eventos_s3(S3_CANDIDATOS_PATH)
+    else:
+        from shared.utils import compactar_eventos
+        contagem = compactar_eventos(os.path.join(args.raiz, "eventos"), os.path.join(args.raiz, "candidatos"))
+
+    if contagem is None:
+        print("Outra compactação está em andamento; nada feito.")
+        sys.exit(1)
+    print(
+        f"{contagem['eventos']} evento(s) gravado(s) em {contagem['candidatos']} candidato(s) "
+        f"em {time.perf_counter() - inicio:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# =============================================================================
+# RECONSTRUÇÃO DO ÍNDICE DE BUSCA DE CANDIDATOS
+# =============================================================================
+#
+# Indexa (shared/busca.py) as candidaturas que já existiam antes da busca ou
+# que ficaram fora do índice (ex: erro ao indexar no job da fila). Candidaturas
+# cujos campos indexados não mudaram são puladas sem reler o currículo; o
+# texto dos currículos vem do mesmo cache usado pelos jobs, então só
+# currículos nunca extraídos são lidos de novo. Documentos de candidaturas que
+# não existem mais saem do índice.
+#
+# O app pode continuar no ar durante a reconstrução (SQLite em modo WAL).
+#
+# Uso (na raiz do projeto):
+#   python scripts/indexar_candidatos.py
+#   python scripts/indexar_candidatos.py --do-zero
+#   python scripts/indexar_candidatos.py --s3 --indice busca_seleai.db
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.busca import IndiceBusca
+from model.model import stem
+
+TAMANHO_LOTE = 500  # candidaturas por segmento gravado
+
+
+# =============================================================================
+# ORIGEM DAS CANDIDATURAS (PASTA LOCAL OU PREFIXO NO S3)
+# =============================================================================
+
+def candidatos_locais(pasta):
+    for caminho in sorted(glob.glob(os.path.join(pasta, "*.json"))):
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                yield os.path.basename(caminho), json.load(f)
+        except json.JSONDecodeError:
+            print(f"[aviso] JSON inválido: {caminho}")
+
+
+def candidatos_s3(prefix):
+    from shared.utils import get_s3_client, carregar_json_s3, S3_BUCKET_NAME
+
+    paginas = get_s3_client().get_paginator("list_objects_v2").paginate(Bucket=S3_BUCKET_NAME, Prefix=prefix)
+    for pagina in paginas:
+        for obj in pagina.get("Contents", []):
+            nome = obj["Key"][len(prefix):]
+            if nome.endswith(".json"):
+                candidato = carregar_json_s3(prefix, nome)
+                if candidato is not None:
+                    yield nome, candidato
+
+
+# =============================================================================
+# INDEXAÇÃO
+# =============================================================================
+
+def indexar(indice, candidatos, texto_curriculo):
+    """
+    Args:
+        indice (IndiceBusca): Índice de destino.
+        candidatos (iterable): (arquivo, candidato) de todas as candidaturas.
+        texto_curriculo (callable): cv_file -> (texto, hash do currículo).
+
+    Returns:
+        dict: Contagem de candidaturas lidas, indexadas, sem mudança,
+        removidas do índice e currículos ilegíveis.
+    """
+    indexadas = indice.assinaturas()
+    contagem = {"candidaturas": 0, "indexadas": 0, "sem_mudanca": 0, "removidas": 0, "curriculos_ilegiveis": 0}
+    vistos = set()
+    lote = []
+    enviadas = 0
+    for arquivo, candidato in candidatos:
+        contagem["candidaturas"] += 1
+        vistos.add(arquivo)
+        # Com o hash do currículo gravado no registro, a assinatura sai sem reler o arquivo
+        tem_hash = candidato.get("cv_hash") or not candidato.get("cv_file")
+        if tem_hash and indexadas.get(arquivo) == indice.assinatura(candidato):
+            contagem["sem_mudanca"] += 1
+            continue
+        if candidato.get("cv_file"):
+            try:
+                candidato["cv_pt"], candidato["cv_hash"] = texto_curriculo(candidato["cv_file"])
+            except Exception as e:
+                contagem["curriculos_ilegiveis"] += 1
+                print(f"[aviso] currículo {candidato['cv_file']} ilegível: {e}")
+        lote.append((arquivo, candidato))
+        enviadas += 1
+        if len(lote) >= TAMANHO_LOTE:
+            contagem["indexadas"] += indice.indexar_lote(lote)
+            lote = []
+    if lote:
+        contagem["indexadas"] += indice.indexar_lote(lote)
+    contagem["sem_mudanca"] += enviadas - contagem["indexadas"]  # currículo relido, mas igual ao indexado
+
+    for arquivo in set(indexadas) - vistos:
+        contagem["removidas"] += indice.remover(arquivo)
+    return contagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstrói o índice de busca textual das candidaturas")
+    parser.add_argument("--s3", action="store_true", help="Lê as candidaturas do bucket S3 em vez da pasta local")
+    parser.add_argument("--indice", help="Arquivo do índice (padrão: o mesmo do app)")
+    parser.add_argument("--raiz", default="dados_app", help="Pasta de dados local")
+    parser.add_argument("--do-zero", action="store_true", help="Apaga o índice antes de indexar")
+    args = parser.parse_args()
+
+    if args.s3:
+        from shared.utils import texto_curriculo_s3, S3_CANDIDATOS_PATH, S3_CURRICULOS_PATH
+        caminho_indice = args.indice or "busca_seleai.db"
+        candidatos = candidatos_s3(S3_CANDIDATOS_PATH)
+        ler_curriculo = lambda cv_file: texto_curriculo_s3(S3_CURRICULOS_PATH + cv_file)
+    else:
+        from shared.utils import texto_curriculo
+        caminho_indice = args.indice or os.path.join(args.raiz, "busca.db")
+        candidatos = candidatos_locais(os.path.join(args.raiz, "candidatos"))
+        pasta_curriculos = os.path.join(args.raiz, "curriculos")
+        pasta_cache = os.path.join(args.raiz, "cache_curriculos")
+        ler_curriculo = lambda cv_file: texto_curriculo(os.path.join(pasta_curriculos, cv_file), pasta_cache)
+
+    if args.do_zero:
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(caminho_indice + sufixo):
+                os.remove(caminho_indice + sufixo)
+
+    inicio = time.perf_counter()
+    indice = IndiceBusca(caminho_indice, stem=stem)
+    contagem = indexar(indice, candidatos, ler_curriculo)
+    print(
+        f"{contagem['candidaturas']} candidatura(s): {contagem['indexadas']} indexada(s), "
+        f"{contagem['sem_mudanca']} sem mudança, {contagem['removidas']} removida(s) do índice, "
+        f"{contagem['curriculos_ilegiveis']} currículo(s) ilegível(is) "
+        f"em {time.perf_counter() - inicio:.1f} s ({indice.total_documentos()} no índice: {caminho_indice})"
+    )
+
+
+if __name__ == "__main__":
+    main()
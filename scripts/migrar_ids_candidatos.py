@@ -0,0 +1,280 @@
+# =============================================================================
+# MIGRAÇÃO PARA OS CÓDIGOS ESTÁVEIS DE CANDIDATO
+# =============================================================================
+#
+# Os códigos antigos (CAND + hash(email) % 10000) mudavam a cada reinício do
+# processo e colidiam entre pessoas. Este script recalcula o código de cada
+# candidatura a partir do email (shared/identidade.py) e:
+#   - renomeia candidato_<antigo>_<vaga>.json e o currículo correspondente;
+#   - atualiza 'codigo_candidato' e 'cv_file' dentro do registro;
+#   - grava as identidades (email -> código, vagas, último currículo);
+#   - junta candidaturas que caem no mesmo arquivo (mesmo email e vaga com
+#     códigos antigos diferentes): o registro mais recente fica, com os dois
+#     históricos de status; o currículo do outro é mantido e listado no aviso;
+#   - apaga a tabela de estatísticas por vaga (o app a reconstrói no próximo acesso).
+#
+# Rode com o app parado e a fila de jobs vazia (os jobs guardam o nome do
+# arquivo do candidato). Use a mesma chave configurada no app.
+#
+# Uso:
+#   python scripts/migrar_ids_candidatos.py --dry-run
+#   python scripts/migrar_ids_candidatos.py --chave "$SELEAI_CHAVE_ID_CANDIDATO"
+#   python scripts/migrar_ids_candidatos.py --s3 --bucket meu-projeto-seleai-dados
+
+import os
+import re
+import sys
+import json
+import glob
+import shutil
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.identidade import CHAVE_ID_PADRAO, normalizar_email, resolver_identidade, registrar_candidatura
+
+PADRAO_CODIGO = re.compile(r"CAND\d+")
+
+
+# =============================================================================
+# ARMAZENAMENTO (PASTAS LOCAIS OU PREFIXOS NO S3)
+# =============================================================================
+
+class ArmazenamentoLocal:
+    def __init__(self, raiz):
+        self.raiz = raiz
+
+    def _caminho(self, pasta, nome):
+        return os.path.join(self.raiz, pasta, nome)
+
+    def listar(self, pasta, padrao):
+        return sorted(os.path.basename(p) for p in glob.glob(self._caminho(pasta, padrao)))
+
+    def ler_json(self, pasta, nome):
+        try:
+            with open(self._caminho(pasta, nome), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def gravar_json(self, pasta, nome, dados):
+        os.makedirs(os.path.join(self.raiz, pasta), exist_ok=True)
+        with open(self._caminho(pasta, nome), "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+
+    def existe(self, pasta, nome):
+        return os.path.exists(self._caminho(pasta, nome))
+
+    def mover(self, pasta, origem, destino):
+        shutil.move(self._caminho(pasta, origem), self._caminho(pasta, destino))
+
+    def remover(self, pasta, nome):
+        if self.existe(pasta, nome):
+            os.remove(self._caminho(pasta, nome))
+
+
+class ArmazenamentoS3:
+    def __init__(self, bucket):
+        import boto3
+        self.s3 = boto3.client("s3")
+        self.bucket = bucket
+
+    def listar(self, pasta, padrao):
+        prefixo, sufixo = padrao.split("*")
+        nomes = []
+        for pagina in self.s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=pasta + prefixo):
+            for obj in pagina.get("Contents", []):
+                nome = obj["Key"][len(pasta):]
+                if nome.endswith(sufixo) and "/" not in nome:
+                    nomes.append(nome)
+        return sorted(nomes)
+
+    def ler_json(self, pasta, nome):
+        try:
+            resposta = self.s3.get_object(Bucket=self.bucket, Key=pasta + nome)
+            return json.loads(resposta["Body"].read().decode("utf-8"))
+        except (self.s3.exceptions.NoSuchKey, json.JSONDecodeError):
+            return None
+
+    def gravar_json(self, pasta, nome, dados):
+        self.s3.put_object(
+            Bucket=self.bucket, Key=pasta + nome,
+            Body=json.dumps(dados, ensure_ascii=False, indent=2).encode("utf-8"),
+            ContentType="application/json"
+        )
+
+    def existe(self, pasta, nome):
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=pasta + nome)
+            return True
+        except self.s3.exceptions.ClientError:
+            return False
+
+    def mover(self, pasta, origem, destino):
+        self.s3.copy({"Bucket": self.bucket, "Key": pasta + origem}, self.bucket, pasta + destino)
+        self.s3.delete_object(Bucket=self.bucket, Key=pasta + origem)
+
+    def remover(self, pasta, nome):
+        self.s3.delete_object(Bucket=self.bucket, Key=pasta + nome)
+
+
+# =============================================================================
+# MIGRAÇÃO
+# =============================================================================
+
+def _ultima_atividade(candidato):
+    datas = [str(h.get("data") or "") for h in candidato.get("historico_status") or []]
+    return max(datas + [str(candidato.get("data_candidatura") or "")])
+
+
+def mesclar_candidaturas(a, b):
+    """
+    Junta duas candidaturas da mesma pessoa à mesma vaga: campos do registro
+    com atividade mais recente e historico_status dos dois (sem repetir entradas).
+    """
+    base, outra = (a, b) if _ultima_atividade(a) >= _ultima_atividade(b) else (b, a)
+    mesclado = dict(base)
+    historico, vistos = [], set()
+    for h in (base.get("historico_status") or []) + (outra.get("historico_status") or []):
+        chave = h.get("evento_id") or (h.get("data"), h.get("status"), h.get("comentario"))
+        if chave not in vistos:
+            vistos.add(chave)
+            historico.append(h)
+    if historico:
+        historico.sort(key=lambda h: str(h.get("data")))
+        mesclado["historico_status"] = historico
+        # Uma candidatura refeita depois da última decisão mantém o próprio status
+        if str(historico[-1].get("data")) >= str(base.get("data_candidatura") or ""):
+            mesclado["status_atual"] = historico[-1]["status"]
+    return mesclado
+
+
+def migrar(armazenamento, pastas, chave, dry_run=False):
+    """
+    Recalcula os códigos de todas as candidaturas.
+
+    Args:
+        armazenamento: ArmazenamentoLocal ou ArmazenamentoS3.
+        pastas (dict): 'candidatos', 'curriculos', 'identidades' e 'estatisticas'
+            (caminho da tabela de estatísticas, relativo à raiz).
+        chave (str): Chave do HMAC (a mesma do app).
+        dry_run (bool): Só mostra o que seria feito.
+
+    Returns:
+        dict: Contagens {'candidaturas', 'renomeadas', 'mescladas', 'curriculos', 'identidades'}.
+    """
+    identidades = {}  # código -> identidade (inclui as ainda não gravadas no dry-run)
+
+    def ler_identidade(codigo):
+        if codigo not in identidades:
+            identidades[codigo] = armazenamento.ler_json(pastas["identidades"], f"{codigo}.json")
+        return identidades[codigo]
+
+    contagem = {"candidaturas": 0, "renomeadas": 0, "mescladas": 0, "curriculos": 0, "identidades": 0}
+    alteradas = set()
+    gravados = {}     # arquivo novo -> registro gravado nesta execução
+    cvs_novos = set()
+    consumidos = set()  # arquivos já no nome novo que foram mesclados antes de aparecer na listagem
+
+    for arquivo in armazenamento.listar(pastas["candidatos"], "candidato_*.json"):
+        if arquivo in consumidos:
+            continue
+        candidato = armazenamento.ler_json(pastas["candidatos"], arquivo)
+        if not candidato or not candidato.get("email"):
+            print(f"[ignorado] {arquivo}: registro sem email")
+            continue
+        contagem["candidaturas"] += 1
+
+        identidade, nova = resolver_identidade(candidato["email"], chave, ler_identidade)
+        codigo = identidade["codigo_candidato"]
+        identidades[codigo] = identidade
+        id_vaga = candidato.get("id_vaga")
+
+        # Currículo: mesmo nome com o código novo
+        cv_file = candidato.get("cv_file") or ""
+        novo_cv = PADRAO_CODIGO.sub(codigo, cv_file, count=1) if cv_file else ""
+        if cv_file and novo_cv != cv_file:
+            if novo_cv in cvs_novos or armazenamento.existe(pastas["curriculos"], novo_cv):
+                # Outra candidatura já ocupa o nome novo: este currículo fica onde está
+                print(f"[aviso] currículo {cv_file} não renomeado: {novo_cv} já existe")
+                novo_cv = cv_file
+            elif armazenamento.existe(pastas["curriculos"], cv_file):
+                print(f"[currículo] {cv_file} -> {novo_cv}")
+                if not dry_run:
+                    armazenamento.mover(pastas["curriculos"], cv_file, novo_cv)
+                contagem["curriculos"] += 1
+                cvs_novos.add(novo_cv)
+            else:
+                print(f"[aviso] currículo {cv_file} de {arquivo} não encontrado")
+                novo_cv = cv_file
+
+        novo_arquivo = f"candidato_{codigo}_{id_vaga}.json"
+        candidato["codigo_candidato"] = codigo
+        candidato["email"] = normalizar_email(candidato["email"])
+        candidato["cv_file"] = novo_cv
+        if novo_arquivo != arquivo:
+            print(f"[candidatura] {arquivo} -> {novo_arquivo}")
+            contagem["renomeadas"] += 1
+
+        # Mesmo email e vaga com códigos antigos diferentes: mesmo arquivo novo
+        existente = gravados.get(novo_arquivo)
+        if existente is None and novo_arquivo != arquivo and armazenamento.existe(pastas["candidatos"], novo_arquivo):
+            existente = armazenamento.ler_json(pastas["candidatos"], novo_arquivo)
+            consumidos.add(novo_arquivo)
+        if existente is not None:
+            candidato = mesclar_candidaturas(existente, candidato)
+            fora = {novo_cv, existente.get("cv_file")} - {candidato["cv_file"], "", None}
+            print(f"[colisão] {arquivo} mesclada em {novo_arquivo}; currículo fora do registro: {', '.join(fora) or '-'}")
+            contagem["mescladas"] += 1
+        gravados[novo_arquivo] = candidato
+
+        if not dry_run:
+            armazenamento.gravar_json(pastas["candidatos"], novo_arquivo, candidato)
+            if novo_arquivo != arquivo:
+                armazenamento.remover(pastas["candidatos"], arquivo)
+
+        registrar_candidatura(identidade, id_vaga, candidato["cv_file"])
+        alteradas.add(codigo)
+
+    contagem["identidades"] = len(alteradas)
+    if not dry_run:
+        for codigo in alteradas:
+            armazenamento.gravar_json(pastas["identidades"], f"{codigo}.json", identidades[codigo])
+        pasta_est, nome_est = os.path.split(pastas["estatisticas"])
+        armazenamento.remover(pasta_est + ("/" if pasta_est else ""), nome_est)
+    return contagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra as candidaturas para os códigos estáveis de candidato")
+    parser.add_argument("--chave", default=os.environ.get("SELEAI_CHAVE_ID_CANDIDATO") or CHAVE_ID_PADRAO,
+                        help="Chave do HMAC (padrão: SELEAI_CHAVE_ID_CANDIDATO)")
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra o que seria alterado")
+    parser.add_argument("--s3", action="store_true", help="Migra o bucket S3 em vez da pasta local")
+    parser.add_argument("--bucket", default="meu-projeto-seleai-dados")
+    parser.add_argument("--raiz", default="dados_app", help="Pasta de dados local")
+    args = parser.parse_args()
+
+    if args.chave == CHAVE_ID_PADRAO:
+        print("[aviso] usando a chave padrão; use a mesma CHAVE_ID_CANDIDATO configurada no app")
+
+    if args.s3:
+        armazenamento = ArmazenamentoS3(args.bucket)
+        pastas = {"candidatos": "candidatos/", "curriculos": "curriculos/",
+                  "identidades": "identidades/", "estatisticas": "estatisticas/estatisticas_vagas.json"}
+    else:
+        armazenamento = ArmazenamentoLocal(args.raiz)
+        pastas = {"candidatos": "candidatos", "curriculos": "curriculos",
+                  "identidades": "identidades", "estatisticas": "estatisticas_vagas.json"}
+
+    contagem = migrar(armazenamento, pastas, args.chave, dry_run=args.dry_run)
+    print(
+        f"{contagem['candidaturas']} candidatura(s), {contagem['renomeadas']} renomeada(s), "
+        f"{contagem['mescladas']} mesclada(s), "
+        f"{contagem['curriculos']} currículo(s), {contagem['identidades']} identidade(s)"
+        + (" [dry-run]" if args.dry_run else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# =============================================================================
+# PROVISIONAMENTO DOS RECURSOS PARA RODAR SEM INTERNET
+# =============================================================================
+#
+# Baixa (em uma máquina com acesso à rede) os pesos do modelo de embeddings e
+# os dados do NLTK para a pasta de recursos (shared/recursos.py). Depois disso
+# copie a pasta para os hosts isolados junto com o código: com ela presente,
+# os apps e a fila só leem arquivos locais.
+#
+# O manifesto (manifesto.json) é gravado por último, então uma pasta
+# incompleta não ativa o modo offline. A verificação roda a inicialização em
+# um processo novo com SELEAI_OFFLINE=1 e mostra o tempo de cada etapa.
+#
+# Uso (na raiz do projeto):
+#   python scripts/provisionar.py                    # baixa e verifica
+#   python scripts/provisionar.py --destino /opt/seleai/recursos
+#   python scripts/provisionar.py --so-verificar
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from shared.recursos import PASTA_RECURSOS, DADOS_NLTK
+from model.model import NOME_MODELO
+
+# Código rodado no processo de verificação (sem rede, só a pasta de recursos)
+VERIFICACAO = """
+import json
+from model.model import inicializar
+print(json.dumps(inicializar()))
+"""
+
+
+def tamanho_pasta(pasta):
+    return sum(
+        os.path.getsize(os.path.join(raiz, nome))
+        for raiz, _, nomes in os.walk(pasta) for nome in nomes
+    )
+
+
+def provisionar_modelo(destino, nome_modelo):
+    from sentence_transformers import SentenceTransformer
+
+    pasta = os.path.join(destino, "modelos", nome_modelo)
+    temporaria = f"{pasta}.tmp"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    modelo = SentenceTransformer(nome_modelo)
+    modelo.save(temporaria)
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.replace(temporaria, pasta)
+    print(f"[modelo] {nome_modelo} -> {pasta} ({tamanho_pasta(pasta) / 1e6:.1f} MB)")
+    return {"nome": nome_modelo, "dimensao": modelo.get_sentence_embedding_dimension()}
+
+
+def provisionar_nltk(destino):
+    import nltk
+
+    pasta = os.path.join(destino, "nltk_data")
+    os.makedirs(pasta, exist_ok=True)
+    for pacote in DADOS_NLTK:
+        if not nltk.download(pacote, download_dir=pasta, quiet=True, raise_on_error=True):
+            sys.exit(f"Falha ao baixar os dados do NLTK '{pacote}'")
+        print(f"[nltk] {pacote} -> {pasta}")
+    return {"versao": nltk.__version__, "pacotes": sorted(DADOS_NLTK)}
+
+
+def verificar(destino):
+    """Roda a inicialização em um processo novo, em modo offline, e devolve {etapa: ms}"""
+    ambiente = dict(
+        os.environ,
+        SELEAI_RECURSOS_PATH=os.path.abspath(destino),
+        SELEAI_OFFLINE="1",
+        HF_HUB_OFFLINE="1",
+        TRANSFORMERS_OFFLINE="1",
+        NLTK_DATA=os.path.join(os.path.abspath(destino), "nltk_data"),
+    )
+    ambiente.pop("SELEAI_EMBEDDINGS_SOCKET", None)  # mede o carregamento do modelo local
+    resultado = subprocess.run(
+        [sys.executable, "-c", VERIFICACAO],
+        cwd=RAIZ, env=ambiente, capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        sys.exit(f"Verificação offline falhou:\n{resultado.stderr}")
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copia modelo e dados do NLTK para uso sem internet")
+    parser.add_argument("--destino", default=PASTA_RECURSOS)
+    parser.add_argument("--modelo", default=NOME_MODELO)
+    parser.add_argument("--so-verificar", action="store_true", help="Não baixa nada, só testa a pasta existente")
+    args = parser.parse_args()
+
+    if not args.so_verificar:
+        os.makedirs(args.destino, exist_ok=True)
+        manifesto = {
+            "modelo": provisionar_modelo(args.destino, args.modelo),
+            "nltk": provisionar_nltk(args.destino),
+            "provisionado_em": datetime.now().isoformat(),
+        }
+        with open(os.path.join(args.destino, "manifesto.json"), "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+    tempos = verificar(args.destino)
+    print("\nInicialização offline:")
+    for etapa, ms in tempos.items():
+        print(f"  {etapa:<16} {ms:8.0f} ms")
+    print(f"  {'total':<16} {sum(tempos.values()):8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
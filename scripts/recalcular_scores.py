@@ -0,0 +1,243 @@
+# =============================================================================
+# RECÁLCULO DOS SCORES GRAVADOS
+# =============================================================================
+#
+# Cada score gravado pela fila de jobs leva `versao_score` (model/model.py):
+# modelo de embeddings, versão da lógica dos fatores e hash dos pesos da vaga.
+# Depois de trocar o modelo, mudar calcular_fatores (e VERSAO_CALCULO) ou
+# editar os pesos de uma vaga, este script recalcula fatores, explicação e
+# score das candidaturas cuja versão não bate com a atual (inclusive as
+# gravadas antes da versão existir) e das que a fila marcou como erro.
+#
+# As candidaturas são percorridas em ordem de nome de arquivo, em lotes: o
+# lote é calculado, gravado (relendo cada registro e trocando só os campos
+# do score, para não desfazer uma mudança de status feita nesse meio tempo) e
+# só então o checkpoint avança. Interrompido, o script continua do último
+# lote gravado; ao terminar, o checkpoint é apagado (candidaturas que deram
+# erro continuam desatualizadas e entram na próxima execução). As gravações
+# passam por salvar_candidato, então as estatísticas por vaga acompanham.
+#
+# Uso (na raiz do projeto):
+#   python scripts/recalcular_scores.py --simular     # só conta o que está desatualizado
+#   python scripts/recalcular_scores.py
+#   python scripts/recalcular_scores.py --s3 --tamanho-lote 50
+#   python scripts/recalcular_scores.py --vagas 3f2a9c1b 07d4e5a2 --forcar
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.model import calcular_fatores, calcular_score_fatores, versao_score, NOME_MODELO, VERSAO_CALCULO
+
+TAMANHO_LOTE = 100
+
+
+# =============================================================================
+# ARMAZENAMENTO (PASTA LOCAL OU BUCKET S3)
+# =============================================================================
+
+def armazenamento_local(raiz):
+    from shared.utils import carregar_dados, carregar_json, salvar_candidato, texto_curriculo
+
+    pasta = os.path.join(raiz, "candidatos")
+    return {
+        "listar": lambda: [os.path.basename(c) for c in glob.glob(os.path.join(pasta, "*.json"))],
+        "carregar": lambda arquivo: carregar_json(pasta, arquivo),
+        "salvar": lambda arquivo, candidato: salvar_candidato(
+            pasta, arquivo, candidato,
+            os.path.join(raiz, "estatisticas_vagas.json"), os.path.join(raiz, "eventos")
+        ),
+        "texto_cv": lambda cv_file: texto_curriculo(
+            os.path.join(raiz, "curriculos", cv_file), os.path.join(raiz, "cache_curriculos")
+        ),
+        "vagas": lambda: carregar_dados(os.path.join(raiz, "vagas")),
+        "checkpoint": os.path.join(raiz, "recalculo_scores.json"),
+    }
+
+
+def armazenamento_s3():
+    from shared.utils import (get_s3_client, carregar_dados_s3, carregar_json_s3, salvar_candidato_s3,
+                              texto_curriculo_s3, S3_BUCKET_NAME, S3_CANDIDATOS_PATH, S3_CURRICULOS_PATH,
+                              S3_VAGAS_PATH)
+
+    def listar():
+        paginas = get_s3_client().get_paginator("list_objects_v2").paginate(
+            Bucket=S3_BUCKET_NAME, Prefix=S3_CANDIDATOS_PATH
+        )
+        return [
+            obj["Key"][len(S3_CANDIDATOS_PATH):]
+            for pagina in paginas for obj in pagina.get("Contents", [])
+            if obj["Key"].endswith(".json")
+        ]
+
+    return {
+        "listar": listar,
+        "carregar": lambda arquivo: carregar_json_s3(S3_CANDIDATOS_PATH, arquivo),
+        "salvar": lambda arquivo, candidato: salvar_candidato_s3(S3_CANDIDATOS_PATH, arquivo, candidato),
+        "texto_cv": lambda cv_file: texto_curriculo_s3(S3_CURRICULOS_PATH + cv_file),
+        "vagas": lambda: carregar_dados_s3(S3_VAGAS_PATH),
+        "checkpoint": "recalculo_scores_s3.json",
+    }
+
+
+# =============================================================================
+# CHECKPOINT
+# =============================================================================
+
+def novo_checkpoint(alvo):
+    return {"alvo": alvo, "iniciado_em": datetime.now().isoformat(), "ultimo_arquivo": None,
+            "verificados": 0, "recalculados": 0, "erros": 0}
+
+
+def carregar_checkpoint(caminho, alvo):
+    """Checkpoint da execução interrompida com o mesmo alvo, ou um novo"""
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("alvo") == alvo:
+            return checkpoint
+        print("[aviso] checkpoint de outro modelo/versão/filtro ignorado; recomeçando")
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return novo_checkpoint(alvo)
+
+
+def salvar_checkpoint(caminho, checkpoint):
+    with open(f"{caminho}.tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    os.replace(f"{caminho}.tmp", caminho)
+
+
+# =============================================================================
+# RECÁLCULO
+# =============================================================================
+
+def precisa_recalcular(candidato, vaga, forcar=False):
+    if candidato.get('status_processamento') == 'pendente':
+        return False  # ainda na fila, que já calcula com a versão atual
+    if candidato.get('status_processamento') == 'erro':
+        return True  # a fila desistiu depois das tentativas
+    return forcar or candidato.get('versao_score') != versao_score(vaga.get('pesos', {}))
+
+
+def recalcular(candidato, vaga, texto_cv):
+    """Campos do score recalculados com o modelo e a lógica atuais (o registro não é alterado)"""
+    entrada = dict(candidato)
+    if candidato.get('cv_file') and vaga.get('pesos', {}).get('curriculo', 0) > 0:
+        try:
+            entrada['cv_pt'], entrada['cv_hash'] = texto_cv(candidato['cv_file'])
+        except Exception as e:
+            print(f"[aviso] currículo {candidato['cv_file']} ilegível: {e}")
+    explicacao = {}
+    fatores = calcular_fatores(entrada, vaga, explicacao)
+    return {
+        'cv_hash': entrada.get('cv_hash'),
+        'fatores': fatores,
+        'explicacao': explicacao,
+        'score_match': calcular_score_fatores(fatores, vaga.get('pesos', {})),
+        'versao_score': versao_score(vaga.get('pesos', {})),
+        'status_processamento': 'concluido',
+        'erro_processamento': None,
+    }
+
+
+def processar_lote(lote, armazenamento, vagas, checkpoint, forcar=False, ids_vagas=None, simular=False):
+    """Calcula os scores desatualizados do lote e grava todos no fim; devolve quantos estavam desatualizados"""
+    resultados = {}
+    for arquivo in lote:
+        candidato = armazenamento["carregar"](arquivo)
+        checkpoint["verificados"] += 1
+        vaga = vagas.get(candidato.get('id_vaga')) if candidato else None
+        if vaga is None or (ids_vagas and str(vaga['id']) not in ids_vagas):
+            continue
+        if not precisa_recalcular(candidato, vaga, forcar):
+            continue
+        if simular:
+            resultados[arquivo] = None
+            continue
+        try:
+            resultados[arquivo] = recalcular(candidato, vaga, armazenamento["texto_cv"])
+        except Exception as e:
+            checkpoint["erros"] += 1
+            print(f"[erro] {arquivo}: {e}")
+
+    if simular:
+        return len(resultados)
+    for arquivo, resultado in resultados.items():
+        atual = armazenamento["carregar"](arquivo)
+        if atual is None:
+            continue  # removida durante o cálculo
+        atual.update(resultado)
+        if armazenamento["salvar"](arquivo, atual) is False:
+            checkpoint["erros"] += 1
+            continue
+        checkpoint["recalculados"] += 1
+    return len(resultados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula os scores gravados com outro modelo, lógica ou pesos")
+    parser.add_argument("--s3", action="store_true", help="Candidaturas do bucket S3 em vez da pasta local")
+    parser.add_argument("--raiz", default="dados_app", help="Pasta de dados local")
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE)
+    parser.add_argument("--vagas", nargs="+", help="Só as candidaturas destas vagas (ids como em vaga_<id>.json)")
+    parser.add_argument("--forcar", action="store_true", help="Recalcula mesmo com a versão em dia")
+    parser.add_argument("--simular", action="store_true", help="Só conta as candidaturas desatualizadas")
+    parser.add_argument("--checkpoint", help="Arquivo de checkpoint (padrão: um por armazenamento)")
+    parser.add_argument("--recomecar", action="store_true", help="Ignora o checkpoint existente")
+    args = parser.parse_args()
+
+    armazenamento = armazenamento_s3() if args.s3 else armazenamento_local(args.raiz)
+    caminho_checkpoint = args.checkpoint or armazenamento["checkpoint"]
+    vagas = {v['id']: v for v in armazenamento["vagas"]() if 'id' in v}
+    ids_vagas = set(args.vagas) if args.vagas else None
+    desconhecidas = sorted((ids_vagas or set()) - {str(i) for i in vagas})
+    if desconhecidas:
+        sys.exit(f"Vaga(s) não encontrada(s): {', '.join(desconhecidas)}")
+
+    # Os pesos entram na versão de cada registro, não no alvo: uma vaga editada
+    # durante a execução é pega na próxima rodada
+    alvo = {"modelo": NOME_MODELO, "calculo": VERSAO_CALCULO, "forcar": args.forcar, "vagas": sorted(ids_vagas or [])}
+    if args.simular or args.recomecar:
+        checkpoint = novo_checkpoint(alvo)
+    else:
+        checkpoint = carregar_checkpoint(caminho_checkpoint, alvo)
+
+    arquivos = sorted(armazenamento["listar"]())
+    if checkpoint["ultimo_arquivo"]:
+        arquivos = [a for a in arquivos if a > checkpoint["ultimo_arquivo"]]
+        print(f"Continuando depois de {checkpoint['ultimo_arquivo']} ({checkpoint['recalculados']} já recalculada(s))")
+    print(f"{len(arquivos)} candidatura(s) a verificar; alvo: {NOME_MODELO}, cálculo v{VERSAO_CALCULO}")
+
+    inicio = time.perf_counter()
+    desatualizadas = 0
+    for i in range(0, len(arquivos), args.tamanho_lote):
+        lote = arquivos[i:i + args.tamanho_lote]
+        desatualizadas += processar_lote(lote, armazenamento, vagas, checkpoint, args.forcar, ids_vagas, args.simular)
+        if args.simular:
+            continue
+        checkpoint["ultimo_arquivo"] = lote[-1]
+        salvar_checkpoint(caminho_checkpoint, checkpoint)
+        decorrido = time.perf_counter() - inicio
+        print(f"  {i + len(lote)}/{len(arquivos)} verificada(s), {checkpoint['recalculados']} recalculada(s), "
+              f"{checkpoint['erros']} erro(s) - {decorrido:.0f} s")
+
+    if args.simular:
+        print(f"{desatualizadas} candidatura(s) com score desatualizado")
+        return
+    if os.path.exists(caminho_checkpoint):
+        os.remove(caminho_checkpoint)
+    print(f"Concluído: {checkpoint['recalculados']} recalculada(s), {checkpoint['erros']} erro(s) "
+          f"em {time.perf_counter() - inicio:.1f} s")
+    if checkpoint["erros"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
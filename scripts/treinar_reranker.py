@@ -0,0 +1,236 @@
+# =============================================================================
+# TREINO DO RE-RANKER
+# =============================================================================
+#
+# Monta a matriz de fatores (as mesmas funções de model/model.py usadas pela
+# fila de jobs) para as candidaturas com resultado conhecido, treina um
+# classificador e grava o modelo usado por model/reranker.py.
+#
+# Rótulo: situação final do prospect ('situacao_candidado', base histórica)
+# quando existir, senão a decisão do recrutador no app ('status_atual'
+# Qualificado/Desqualificado). Candidaturas pendentes ficam de fora.
+#
+# Avaliação: parte das vagas fica fora do treino; o relatório mostra AUC e
+# NDCG@k do score aprendido e do score por pesos lado a lado com a latência
+# da inferência em lote (uma chamada por vaga). O modelo final é treinado com
+# todas as vagas.
+#
+# Uso (na raiz do projeto):
+#   python scripts/treinar_reranker.py
+#   python scripts/treinar_reranker.py --algoritmo xgboost --usar-fatores-gravados
+
+import os
+import sys
+import json
+import glob
+import time
+import random
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.model import calcular_fatores, calcular_score_fatores
+from model.reranker import RERANKER_PATH, FATORES_RERANKER, rotulo_candidato, matriz_fatores, pontuar_fatores
+
+K_NDCG = 5
+FRACAO_TESTE = 0.25
+MIN_VAGAS_AVALIACAO = 4
+
+
+# =============================================================================
+# DADOS
+# =============================================================================
+
+def ler_pasta(pasta):
+    registros = []
+    for arquivo in sorted(glob.glob(os.path.join(pasta, "*.json"))):
+        with open(arquivo, "r", encoding="utf-8") as f:
+            conteudo = json.load(f)
+        registros.extend(conteudo if isinstance(conteudo, list) else [conteudo])
+    return registros
+
+
+def texto_cv(candidato, pasta_curriculos):
+    """Texto do currículo para o fator 'curriculo' (vazio se não houver arquivo)"""
+    from shared.extracao import extrair_texto_curriculo
+
+    cv_file = candidato.get('cv_file')
+    caminho = os.path.join(pasta_curriculos, cv_file or "")
+    if not cv_file or not os.path.exists(caminho):
+        return ""
+    try:
+        return extrair_texto_curriculo(caminho, os.path.splitext(cv_file)[1].lower())
+    except Exception as e:
+        print(f"[aviso] currículo {cv_file} ilegível: {e}")
+        return ""
+
+
+def montar_exemplos(candidatos, vagas, pasta_curriculos, usar_gravados=False):
+    """
+    Returns:
+        list[dict]: Um item por candidatura rotulada com 'id_vaga', 'fatores',
+        'rotulo' e 'score_pesos'.
+    """
+    exemplos = []
+    for candidato in candidatos:
+        rotulo = rotulo_candidato(candidato)
+        vaga = vagas.get(candidato.get('id_vaga'))
+        if rotulo is None or vaga is None:
+            continue
+        if usar_gravados and candidato.get('fatores'):
+            fatores = candidato['fatores']
+        else:
+            if vaga.get('pesos', {}).get('curriculo', 0) > 0:
+                candidato = {**candidato, 'cv_pt': texto_cv(candidato, pasta_curriculos)}
+            fatores = calcular_fatores(candidato, vaga)
+        exemplos.append({
+            'id_vaga': vaga['id'],
+            'fatores': fatores,
+            'rotulo': rotulo,
+            'score_pesos': calcular_score_fatores(fatores, vaga.get('pesos', {}))
+        })
+    return exemplos
+
+
+# =============================================================================
+# MODELO E MÉTRICAS
+# =============================================================================
+
+def criar_modelo(algoritmo):
+    if algoritmo == "xgboost":
+        from xgboost import XGBClassifier
+        return XGBClassifier(n_estimators=200, max_depth=3, learning_rate=0.05, subsample=0.9,
+                             eval_metric="logloss", n_jobs=1)
+    from lightgbm import LGBMClassifier
+    return LGBMClassifier(n_estimators=200, num_leaves=15, learning_rate=0.05, min_child_samples=5,
+                          subsample=0.9, subsample_freq=1, n_jobs=1, verbose=-1)
+
+
+def ndcg_em_k(rotulos_ordenados, k=K_NDCG):
+    """NDCG@k de uma lista de rótulos (0/1) já na ordem do ranking"""
+    ganhos = np.asarray(rotulos_ordenados[:k], dtype=float)
+    descontos = 1 / np.log2(np.arange(2, len(ganhos) + 2))
+    dcg = float((ganhos * descontos).sum())
+    ideal = np.sort(np.asarray(rotulos_ordenados, dtype=float))[::-1][:k]
+    idcg = float((ideal * descontos[:len(ideal)]).sum())
+    return dcg / idcg if idcg else None
+
+
+def auc(rotulos, scores):
+    from sklearn.metrics import roc_auc_score
+    return float(roc_auc_score(rotulos, scores)) if len(set(rotulos)) == 2 else None
+
+
+def avaliar(reranker, exemplos_teste, k=K_NDCG):
+    """Qualidade (AUC, NDCG@k) dos dois scores e latência da inferência em lote por vaga"""
+    por_vaga = {}
+    for ex in exemplos_teste:
+        por_vaga.setdefault(ex['id_vaga'], []).append(ex)
+
+    rotulos, aprendidos, pesos = [], [], []
+    ndcg_aprendido, ndcg_pesos, tempos = [], [], []
+    for grupo in por_vaga.values():
+        inicio = time.perf_counter()
+        scores = pontuar_fatores([ex['fatores'] for ex in grupo], reranker)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+        r = [ex['rotulo'] for ex in grupo]
+        p = [ex['score_pesos'] for ex in grupo]
+        rotulos += r
+        aprendidos += scores.tolist()
+        pesos += p
+        for lista, ordem in ((ndcg_aprendido, np.argsort(-scores, kind="stable")),
+                             (ndcg_pesos, np.argsort(-np.asarray(p), kind="stable"))):
+            valor = ndcg_em_k([r[i] for i in ordem], k)
+            if valor is not None:
+                lista.append(valor)
+
+    media = lambda xs: float(np.mean(xs)) if xs else None
+    return {
+        "vagas": len(por_vaga),
+        "candidaturas": len(rotulos),
+        "auc_aprendido": auc(rotulos, aprendidos),
+        "auc_pesos": auc(rotulos, pesos),
+        f"ndcg@{k}_aprendido": media(ndcg_aprendido),
+        f"ndcg@{k}_pesos": media(ndcg_pesos),
+        "latencia_ms_por_vaga_p50": float(np.percentile(tempos, 50)),
+        "latencia_ms_por_vaga_p95": float(np.percentile(tempos, 95)),
+        "latencia_us_por_candidato": float(sum(tempos) * 1000 / max(len(rotulos), 1))
+    }
+
+
+def treinar(exemplos, algoritmo):
+    matriz = matriz_fatores([ex['fatores'] for ex in exemplos])
+    rotulos = np.array([ex['rotulo'] for ex in exemplos], dtype=np.int32)
+    modelo = criar_modelo(algoritmo)
+    modelo.fit(matriz, rotulos)
+    return {"modelo": modelo, "fatores": FATORES_RERANKER, "algoritmo": algoritmo}
+
+
+def imprimir_relatorio(metricas):
+    print("\nMétrica                          Aprendido      Pesos")
+    for nome in ["auc", f"ndcg@{K_NDCG}"]:
+        a, p = metricas[f"{nome}_aprendido"], metricas[f"{nome}_pesos"]
+        fmt = lambda v: f"{v:9.3f}" if v is not None else "        -"
+        print(f"{nome:<30} {fmt(a)}  {fmt(p)}")
+    print(f"Latência por vaga (p50 / p95):   {metricas['latencia_ms_por_vaga_p50']:.2f} / "
+          f"{metricas['latencia_ms_por_vaga_p95']:.2f} ms")
+    print(f"Latência por candidato:          {metricas['latencia_us_por_candidato']:.1f} µs")
+    print(f"Avaliado em {metricas['candidaturas']} candidatura(s) de {metricas['vagas']} vaga(s)")
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina o re-ranker sobre os fatores de avaliação")
+    parser.add_argument("--candidatos", default="dados_app/candidatos")
+    parser.add_argument("--vagas", default="dados_app/vagas")
+    parser.add_argument("--curriculos", default="dados_app/curriculos")
+    parser.add_argument("--saida", default=RERANKER_PATH)
+    parser.add_argument("--algoritmo", choices=["lightgbm", "xgboost"], default="lightgbm")
+    parser.add_argument("--usar-fatores-gravados", action="store_true",
+                        help="Usa os fatores já gravados nas candidaturas em vez de recalcular")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    vagas = {v['id']: v for v in ler_pasta(args.vagas) if 'id' in v}
+    exemplos = montar_exemplos(ler_pasta(args.candidatos), vagas, args.curriculos, args.usar_fatores_gravados)
+    positivos = sum(ex['rotulo'] for ex in exemplos)
+    print(f"{len(exemplos)} candidatura(s) rotulada(s): {positivos} aprovada(s), {len(exemplos) - positivos} reprovada(s)")
+    if not positivos or positivos == len(exemplos):
+        sys.exit("É preciso ter candidaturas aprovadas e reprovadas para treinar")
+
+    # Avaliação com vagas fora do treino (o ranking é sempre dentro de uma vaga)
+    ids_vagas = sorted({ex['id_vaga'] for ex in exemplos})
+    metricas = None
+    if len(ids_vagas) >= MIN_VAGAS_AVALIACAO:
+        random.Random(args.semente).shuffle(ids_vagas)
+        teste = set(ids_vagas[:max(1, int(len(ids_vagas) * FRACAO_TESTE))])
+        treino = [ex for ex in exemplos if ex['id_vaga'] not in teste]
+        if len({ex['rotulo'] for ex in treino}) == 2:
+            metricas = avaliar(treinar(treino, args.algoritmo), [ex for ex in exemplos if ex['id_vaga'] in teste])
+            imprimir_relatorio(metricas)
+    if metricas is None:
+        print(f"[aviso] dados insuficientes para separar vagas de teste (mínimo {MIN_VAGAS_AVALIACAO}); modelo sem avaliação")
+
+    reranker = treinar(exemplos, args.algoritmo)
+    reranker.update(
+        treinado_em=datetime.now().isoformat(),
+        amostras=len(exemplos),
+        metricas=metricas
+    )
+
+    import joblib
+    os.makedirs(os.path.dirname(args.saida) or ".", exist_ok=True)
+    joblib.dump(reranker, f"{args.saida}.tmp")
+    os.replace(f"{args.saida}.tmp", args.saida)
+    print(f"\nModelo gravado em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# =============================================================================
+# VERIFICAÇÃO DO TEMPO DE IMPORTAÇÃO DO NÚCLEO
+# =============================================================================
+#
+# Importa os módulos do núcleo (score, tokenização, estatísticas, extração e
+# fila) em um processo novo com `python -X importtime` e falha se:
+#   - o tempo total passar do orçamento, ou
+#   - algum módulo pesado (Streamlit, AWS, torch, sentence-transformers,
+#     sklearn...) for carregado já no import.
+#
+# Uso (na raiz do projeto):
+#   python scripts/verificar_importtime.py [--orcamento-ms 500]
+
+import os
+import sys
+import argparse
+import subprocess
+
+MODULOS_NUCLEO = [
+    "model.model",
+    "model.reranker",
+    "shared.texto",
+    "shared.estatisticas",
+    "shared.registros",
+    "shared.busca",
+    "shared.eventos",
+    "shared.extracao",
+    "shared.jobs",
+]
+
+MODULOS_PROIBIDOS = [
+    "streamlit",
+    "boto3",
+    "botocore",
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "sklearn",
+    "lightgbm",
+    "xgboost",
+    "joblib",
+    "nltk",
+    "pypdf",
+    "docx",
+]
+
+ORCAMENTO_MS = 500
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir_importacao(modulos):
+    """
+    Executa os imports em um interpretador novo e lê o relatório do -X importtime.
+
+    Returns:
+        dict: {módulo: tempo cumulativo em microssegundos}, um item por módulo carregado.
+    """
+    codigo = "; ".join(f"import {m}" for m in modulos)
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=RAIZ_PROJETO,
+        capture_output=True,
+        text=True
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Falha ao importar o núcleo:\n{resultado.stderr}")
+
+    tempos = {}
+    for linha in resultado.stderr.splitlines():
+        # Formato: "import time:  self [us] | cumulative | imported package"
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|")
+        tempos[nome.strip()] = int(cumulativo)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica o tempo de importação do núcleo de score")
+    parser.add_argument("--orcamento-ms", type=float, default=ORCAMENTO_MS,
+                        help=f"Tempo máximo de importação em ms (padrão: {ORCAMENTO_MS})")
+    args = parser.parse_args()
+
+    tempos = medir_importacao(MODULOS_NUCLEO)
+
+    total_ms = sum(tempos.get(m, 0) for m in MODULOS_NUCLEO) / 1000
+    pesados = sorted({nome.split(".")[0] for nome in tempos} & set(MODULOS_PROIBIDOS))
+
+    for modulo in MODULOS_NUCLEO:
+        print(f"{modulo:<25} {tempos.get(modulo, 0) / 1000:8.1f} ms")
+    print(f"{'total':<25} {total_ms:8.1f} ms (orçamento: {args.orcamento_ms:.0f} ms)")
+
+    falhou = False
+    if pesados:
+        print(f"ERRO: módulos pesados carregados no import: {', '.join(pesados)}")
+        falhou = True
+    if total_ms > args.orcamento_ms:
+        print("ERRO: tempo de importação acima do orçamento")
+        falhou = True
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,511 @@
+# =============================================================================
+# BUSCA TEXTUAL DE CANDIDATOS (ÍNDICE INVERTIDO EM SQLITE + BM25)
+# =============================================================================
+#
+# Índice invertido persistido em SQLite sobre o texto do currículo (cv_pt) e
+# as listas hab_tecnicas, hab_comportamentais e areas_atuacao. Os textos
+# passam pelo mesmo `tokenizer` do resto do app e pelo stemmer RSLP, então
+# "analista", "análise" e "analisar" caem no mesmo termo.
+#
+# Organização (a mesma ideia dos segmentos do Lucene):
+#   - Cada gravação cria um segmento pequeno. Em cada segmento as postings de
+#     um termo são arrays compactados (doc_ids ordenados, frequências,
+#     tamanhos dos documentos e as posições de todos eles em sequência): a
+#     consulta lê uma linha por termo e segmento e faz interseção, união,
+#     frases e BM25 vetorizados com numpy, sem abrir arquivos de candidatos
+#     nem percorrer postings linha a linha.
+#   - Quando FATOR_MERGE segmentos do mesmo nível se acumulam, eles viram um
+#     segmento do nível seguinte, então manter o índice custa O(log n) por
+#     documento.
+#   - Reindexar um candidato (CV ou habilidades mudaram) cria um documento
+#     novo; o antigo vai para `removidos` e é ignorado pelas consultas até o
+#     merge do seu segmento.
+#
+# Sintaxe da consulta:
+#   python sql                todos os termos (E)
+#   "engenharia de dados"     frase exata
+#   python OR java            qualquer um dos dois
+#   -estagio  /  NOT estagio  exclui
+#
+# Candidaturas sem mudança nos campos indexados são ignoradas pelo `indexar`.
+
+import re
+import json
+import math
+import sqlite3
+import hashlib
+import logging
+from itertools import chain
+from contextlib import contextmanager
+
+import numpy as np
+
+from shared.texto import tokenizer
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_BUSCA = ("hab_tecnicas", "hab_comportamentais", "areas_atuacao", "cv_pt")
+INTERVALO_CAMPOS = 10  # posições vazias entre campos: uma frase não atravessa dois campos
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+FATOR_MERGE = 4          # segmentos de um mesmo nível que disparam o merge
+LIMITE_PARAMETROS = 500  # ids por consulta com IN (...)
+
+_PARTES_CONSULTA = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+
+def _blocos(itens, tamanho=LIMITE_PARAMETROS):
+    itens = list(itens)
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def _ids(linhas):
+    """Primeira coluna das linhas como array de doc_ids"""
+    return np.fromiter((linha[0] for linha in linhas), dtype=np.uint32)
+
+
+class IndiceBusca:
+    """
+    Índice invertido de candidatos.
+
+    Args:
+        db_path (str): Arquivo SQLite do índice.
+        stem (callable): Recebe um token e devolve o stem (ex: RSLPStemmer().stem).
+    """
+
+    def __init__(self, db_path, stem):
+        self.db_path = db_path
+        self.stem = stem
+        self._criar_tabelas()
+
+    # -------------------------------------------------------------------------
+    # Tabelas
+    # -------------------------------------------------------------------------
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")  # seguro com WAL; o índice pode ser reconstruído
+        return conn
+
+    @contextmanager
+    def _transacao(self):
+        """Conexão que faz commit (ou rollback) e é fechada ao final do bloco"""
+        conn = self._conectar()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _criar_tabelas(self):
+        with self._transacao() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documentos (
+                    doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    arquivo TEXT NOT NULL UNIQUE,
+                    id_vaga TEXT,
+                    codigo_candidato TEXT,
+                    nome TEXT,
+                    tamanho INTEGER NOT NULL,
+                    assinatura TEXT NOT NULL,
+                    segmento INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_documentos_vaga ON documentos (id_vaga)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS segmentos (
+                    segmento INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nivel INTEGER NOT NULL
+                )
+            """)
+            # Uma linha por (termo, segmento): as postings de um termo ficam contíguas
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    termo TEXT NOT NULL,
+                    segmento INTEGER NOT NULL,
+                    docs BLOB NOT NULL,
+                    tfs BLOB NOT NULL,
+                    tamanhos BLOB NOT NULL,
+                    posicoes BLOB NOT NULL,  -- por último: só é lido quando a consulta tem frase
+                    PRIMARY KEY (termo, segmento)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_segmento ON postings (segmento)")
+            # Documentos substituídos ou removidos que ainda estão nas postings do segmento
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS removidos (
+                    doc_id INTEGER PRIMARY KEY,
+                    segmento INTEGER NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS estatisticas (
+                    chave TEXT PRIMARY KEY,
+                    valor INTEGER NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO estatisticas VALUES ('documentos', 0), ('tamanho_total', 0)")
+
+    # -------------------------------------------------------------------------
+    # Análise do texto
+    # -------------------------------------------------------------------------
+
+    def analisar(self, texto):
+        """Tokens (tokenizer do app + stemming) de um texto ou lista de textos"""
+        return [self.stem(token) for token in tokenizer(texto)]
+
+    @staticmethod
+    def assinatura(candidato):
+        """Hash dos campos indexados (o CV entra pelo hash do arquivo, se houver)"""
+        conteudo = {campo: candidato.get(campo) for campo in CAMPOS_BUSCA if campo != "cv_pt"}
+        conteudo["cv"] = candidato.get("cv_hash") or hashlib.sha1((candidato.get("cv_pt") or "").encode("utf-8")).hexdigest()
+        return hashlib.sha1(json.dumps(conteudo, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _posicoes(self, candidato):
+        """{termo: [posições]} dos campos indexados, com um intervalo entre campos"""
+        posicoes = {}
+        posicao = 0
+        for campo in CAMPOS_BUSCA:
+            for termo in self.analisar(candidato.get(campo)):
+                posicoes.setdefault(termo, []).append(posicao)
+                posicao += 1
+            posicao += INTERVALO_CAMPOS
+        return posicoes
+
+    # -------------------------------------------------------------------------
+    # Atualização
+    # -------------------------------------------------------------------------
+
+    def indexar(self, arquivo, candidato):
+        """
+        Indexa (ou reindexa) um candidato. Não faz nada se os campos indexados
+        não mudaram desde a última vez.
+
+        Args:
+            arquivo (str): Nome do arquivo do candidato (chave do documento).
+            candidato (dict): Registro com 'cv_pt' já extraído, se houver currículo.
+
+        Returns:
+            bool: True se o índice foi alterado.
+        """
+        return self.indexar_lote([(arquivo, candidato)]) == 1
+
+    def indexar_lote(self, itens):
+        """
+        Como `indexar`, para vários (arquivo, candidato) gravados em um único
+        segmento (usado na reconstrução do índice).
+
+        Returns:
+            int: Quantos documentos foram (re)indexados.
+        """
+        itens = [(arquivo, candidato, self.assinatura(candidato)) for arquivo, candidato in itens]
+        atuais = {}
+        with self._transacao() as conn:
+            for bloco in _blocos(arquivo for arquivo, _, _ in itens):
+                atuais.update(conn.execute(
+                    f"SELECT arquivo, assinatura FROM documentos WHERE arquivo IN ({','.join('?' * len(bloco))})",
+                    bloco
+                ))
+
+        # Análise do texto fora da transação (é a parte cara)
+        documentos = {}
+        for arquivo, candidato, assinatura in itens:
+            if atuais.get(arquivo) != assinatura:
+                documentos[arquivo] = (candidato, assinatura, self._posicoes(candidato))
+        if not documentos:
+            return 0
+
+        with self._transacao() as conn:
+            segmento = conn.execute("INSERT INTO segmentos (nivel) VALUES (0)").lastrowid
+            postings = {}  # termo -> [(doc_id, posições, tamanho)] em ordem de doc_id
+            for arquivo, (candidato, assinatura, posicoes) in documentos.items():
+                self._remover(conn, arquivo)
+                tamanho = sum(len(p) for p in posicoes.values())
+                doc_id = conn.execute(
+                    "INSERT INTO documentos (arquivo, id_vaga, codigo_candidato, nome, tamanho, assinatura, segmento) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (arquivo, candidato.get("id_vaga"), candidato.get("codigo_candidato"),
+                     candidato.get("nome"), tamanho, assinatura, segmento)
+                ).lastrowid
+                for termo, p in posicoes.items():
+                    postings.setdefault(termo, []).append((doc_id, p, tamanho))
+                self._somar_estatisticas(conn, 1, tamanho)
+
+            conn.executemany(
+                "INSERT INTO postings (termo, segmento, docs, tfs, tamanhos, posicoes) VALUES (?, ?, ?, ?, ?, ?)",
+                [(termo, segmento, *_compactar(lista)) for termo, lista in postings.items()]
+            )
+            self._merge(conn)
+        return len(documentos)
+
+    def remover(self, arquivo):
+        """Tira um candidato do índice (ex: candidatura apagada)"""
+        with self._transacao() as conn:
+            return self._remover(conn, arquivo)
+
+    def _remover(self, conn, arquivo):
+        linha = conn.execute(
+            "SELECT doc_id, tamanho, segmento FROM documentos WHERE arquivo = ?", (arquivo,)
+        ).fetchone()
+        if linha is None:
+            return False
+        doc_id, tamanho, segmento = linha
+        conn.execute("DELETE FROM documentos WHERE doc_id = ?", (doc_id,))
+        conn.execute("INSERT OR REPLACE INTO removidos (doc_id, segmento) VALUES (?, ?)", (doc_id, segmento))
+        self._somar_estatisticas(conn, -1, -tamanho)
+        return True
+
+    @staticmethod
+    def _somar_estatisticas(conn, documentos, tamanho):
+        conn.execute("UPDATE estatisticas SET valor = valor + ? WHERE chave = 'documentos'", (documentos,))
+        conn.execute("UPDATE estatisticas SET valor = valor + ? WHERE chave = 'tamanho_total'", (tamanho,))
+
+    def _merge(self, conn):
+        """Junta FATOR_MERGE segmentos de um mesmo nível em um do nível seguinte (em cascata)"""
+        while True:
+            linha = conn.execute(
+                "SELECT nivel FROM segmentos GROUP BY nivel HAVING COUNT(*) >= ? ORDER BY nivel LIMIT 1",
+                (FATOR_MERGE,)
+            ).fetchone()
+            if linha is None:
+                return
+            nivel = linha[0]
+            antigos = [s for (s,) in conn.execute(
+                "SELECT segmento FROM segmentos WHERE nivel = ? ORDER BY segmento LIMIT ?", (nivel, FATOR_MERGE)
+            )]
+            marcas = ",".join("?" * len(antigos))
+            descartar = _ids(conn.execute(f"SELECT doc_id FROM removidos WHERE segmento IN ({marcas})", antigos))
+
+            partes = {}
+            for termo, *blobs in conn.execute(
+                f"SELECT termo, docs, tfs, tamanhos, posicoes FROM postings WHERE segmento IN ({marcas})", antigos
+            ):
+                partes.setdefault(termo, []).append(_descompactar(*blobs))
+
+            novo = conn.execute("INSERT INTO segmentos (nivel) VALUES (?)", (nivel + 1,)).lastrowid
+            linhas = []
+            for termo, arrays in partes.items():
+                juntas = _juntar(arrays, descartar)
+                if len(juntas[0]):
+                    linhas.append((termo, novo, *(a.tobytes() for a in juntas)))
+
+            conn.execute(f"DELETE FROM postings WHERE segmento IN ({marcas})", antigos)
+            conn.execute(f"DELETE FROM segmentos WHERE segmento IN ({marcas})", antigos)
+            conn.execute(f"DELETE FROM removidos WHERE segmento IN ({marcas})", antigos)
+            conn.execute(f"UPDATE documentos SET segmento = ? WHERE segmento IN ({marcas})", [novo] + antigos)
+            conn.executemany(
+                "INSERT INTO postings (termo, segmento, docs, tfs, tamanhos, posicoes) VALUES (?, ?, ?, ?, ?, ?)", linhas
+            )
+
+    def assinaturas(self):
+        """{arquivo: assinatura} dos documentos indexados"""
+        with self._transacao() as conn:
+            return dict(conn.execute("SELECT arquivo, assinatura FROM documentos"))
+
+    def total_documentos(self):
+        with self._transacao() as conn:
+            return conn.execute("SELECT valor FROM estatisticas WHERE chave = 'documentos'").fetchone()[0]
+
+    # -------------------------------------------------------------------------
+    # Consulta
+    # -------------------------------------------------------------------------
+
+    def interpretar(self, consulta):
+        """
+        Converte a consulta em grupos de cláusulas.
+
+        Returns:
+            tuple: (grupos, excluidas). Cada grupo é uma lista de cláusulas
+            alternativas (OR) e todos os grupos precisam casar (E); cada
+            cláusula é uma tupla de termos (mais de um termo = frase).
+            `excluidas` são cláusulas que não podem casar.
+        """
+        grupos, excluidas = [], []
+        juntar = negar = False
+        for m in _PARTES_CONSULTA.finditer(consulta or ""):
+            sinal, frase, palavra = m.groups()
+            if palavra is not None:
+                if palavra == "OR":
+                    juntar = bool(grupos)
+                    continue
+                if palavra == "NOT":
+                    negar = True
+                    continue
+                if palavra.startswith("-") and len(palavra) > 1:
+                    sinal, palavra = "-", palavra[1:]
+            clausula = tuple(self.analisar(frase if frase is not None else palavra))
+            if not clausula:  # só stopwords/pontuação
+                juntar = negar = False
+                continue
+            if sinal or negar:
+                excluidas.append(clausula)
+            elif juntar:
+                grupos[-1].append(clausula)
+            else:
+                grupos.append([clausula])
+            juntar = negar = False
+        return grupos, excluidas
+
+    def _ler_postings(self, conn, termo, descartar, com_posicoes=False):
+        """(docs, tfs, tamanhos, posicoes) de um termo em todos os segmentos, sem os documentos removidos"""
+        colunas = "docs, tfs, tamanhos, posicoes" if com_posicoes else "docs, tfs, tamanhos"
+        return _juntar(
+            [_descompactar(*linha) for linha in conn.execute(
+                f"SELECT {colunas} FROM postings WHERE termo = ?", (termo,)
+            )],
+            descartar
+        )
+
+    @staticmethod
+    def _docs_clausula(clausula, postings):
+        """Documentos com todos os termos da cláusula e, se for frase, em posições consecutivas"""
+        docs = postings[clausula[0]][0]
+        for termo in clausula[1:]:
+            docs = np.intersect1d(docs, postings[termo][0], assume_unique=True)
+        if len(clausula) == 1 or not len(docs):
+            return docs
+
+        # Chave (doc_id, posição onde a frase começaria): a frase casa onde a
+        # mesma chave sai de todos os termos
+        chaves = None
+        for i, termo in enumerate(clausula):
+            docs_termo, tfs, _, posicoes = postings[termo]
+            usar = np.repeat(np.isin(docs_termo, docs, assume_unique=True), tfs)
+            inicio = posicoes[usar].astype(np.int64) - i
+            chave = (np.repeat(docs_termo, tfs)[usar].astype(np.int64) << 32) | inicio
+            chave = chave[inicio >= 0]
+            chaves = chave if chaves is None else np.intersect1d(chaves, chave, assume_unique=True)
+        return np.unique(chaves >> 32).astype(np.uint32)
+
+    def buscar(self, consulta, limite=50, id_vaga=None):
+        """
+        Candidatos que casam com a consulta, do maior para o menor score BM25.
+
+        Args:
+            consulta (str): Texto com a sintaxe descrita no topo do módulo.
+            limite (int): Máximo de resultados.
+            id_vaga (str, opcional): Restringe a uma vaga.
+
+        Returns:
+            tuple: (resultados, total). Cada resultado é um dict com arquivo,
+            id_vaga, codigo_candidato, nome e score; total é o número de
+            candidatos que casaram (antes do limite).
+        """
+        grupos, excluidas = self.interpretar(consulta)
+        if not grupos:
+            return [], 0
+        positivos = {t for grupo in grupos for clausula in grupo for t in clausula}
+        termos = positivos | {t for clausula in excluidas for t in clausula}
+        em_frases = {t for grupo in grupos + [excluidas] for clausula in grupo if len(clausula) > 1 for t in clausula}
+
+        with self._transacao() as conn:
+            estatisticas = dict(conn.execute("SELECT chave, valor FROM estatisticas"))
+            descartar = _ids(conn.execute("SELECT doc_id FROM removidos"))
+            postings = {termo: self._ler_postings(conn, termo, descartar, termo in em_frases) for termo in termos}
+
+            # Grupo mais seletivo primeiro: a interseção encolhe logo
+            encontrados = None
+            for grupo in sorted(grupos, key=lambda g: sum(len(postings[c[0]][0]) for c in g)):
+                docs = self._docs_clausula(grupo[0], postings)
+                for clausula in grupo[1:]:
+                    docs = np.union1d(docs, self._docs_clausula(clausula, postings))
+                encontrados = docs if encontrados is None else np.intersect1d(encontrados, docs, assume_unique=True)
+                if not len(encontrados):
+                    return [], 0
+            for clausula in excluidas:
+                encontrados = np.setdiff1d(encontrados, self._docs_clausula(clausula, postings), assume_unique=True)
+            if id_vaga is not None:
+                da_vaga = _ids(conn.execute("SELECT doc_id FROM documentos WHERE id_vaga = ?", (id_vaga,)))
+                encontrados = np.intersect1d(encontrados, da_vaga)
+            if not len(encontrados):
+                return [], 0
+
+            # BM25 dos termos positivos, vetorizado sobre os documentos encontrados
+            n_docs = max(estatisticas["documentos"], 1)
+            media_tamanho = max(estatisticas["tamanho_total"] / n_docs, 1.0)
+            scores = np.zeros(len(encontrados))
+            for termo in positivos:
+                docs, tfs, tamanhos, _ = postings[termo]
+                if not len(docs):
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                pos = np.minimum(np.searchsorted(docs, encontrados), len(docs) - 1)
+                tf = np.where(docs[pos] == encontrados, tfs[pos], 0).astype(np.float64)
+                norma = BM25_K1 * (1 - BM25_B + BM25_B * tamanhos[pos] / media_tamanho)
+                scores += idf * tf * (BM25_K1 + 1) / (tf + norma)
+
+            k = min(limite, len(encontrados))
+            topo = np.argpartition(-scores, k - 1)[:k]
+            topo = topo[np.argsort(-scores[topo], kind="stable")]
+            ids = encontrados[topo].tolist()
+            info = {}
+            for bloco in _blocos(ids):
+                for doc_id, *campos in conn.execute(
+                    f"SELECT doc_id, arquivo, id_vaga, codigo_candidato, nome FROM documentos "
+                    f"WHERE doc_id IN ({','.join('?' * len(bloco))})", bloco
+                ):
+                    info[doc_id] = campos
+
+        resultados = []
+        for doc_id, score in zip(ids, scores[topo].tolist()):
+            arquivo, vaga, codigo, nome = info[doc_id]
+            resultados.append({"arquivo": arquivo, "id_vaga": vaga, "codigo_candidato": codigo,
+                               "nome": nome, "score": round(score, 4)})
+        return resultados, len(encontrados)
+
+
+# =============================================================================
+# POSTINGS COMPACTADAS
+# =============================================================================
+
+def _compactar(lista):
+    """[(doc_id, posições, tamanho)] em ordem de doc_id -> blobs de docs, tfs, tamanhos e posições"""
+    docs, posicoes, tamanhos = zip(*lista)
+    return (
+        np.asarray(docs, dtype=np.uint32).tobytes(),
+        np.fromiter(map(len, posicoes), dtype=np.uint32, count=len(posicoes)).tobytes(),
+        np.asarray(tamanhos, dtype=np.uint32).tobytes(),
+        np.fromiter(chain.from_iterable(posicoes), dtype=np.uint32).tobytes(),
+    )
+
+
+def _descompactar(docs, tfs, tamanhos, posicoes=None):
+    return (
+        np.frombuffer(docs, dtype=np.uint32),
+        np.frombuffer(tfs, dtype=np.uint32),
+        np.frombuffer(tamanhos, dtype=np.uint32),
+        None if posicoes is None else np.frombuffer(posicoes, dtype=np.uint32),
+    )
+
+
+def _juntar(partes, descartar):
+    """
+    Concatena as postings de vários segmentos em ordem de doc_id, sem os
+    documentos descartados (as posições acompanham cada documento).
+    """
+    if not partes:
+        vazio = np.zeros(0, dtype=np.uint32)
+        return vazio, vazio, vazio, vazio
+    partes = sorted(partes, key=lambda p: p[0][0])  # cada documento está em um único segmento
+    docs, tfs, tamanhos = (np.concatenate([p[i] for p in partes]) for i in range(3))
+    posicoes = np.concatenate([p[3] for p in partes]) if partes[0][3] is not None else None
+
+    if len(partes) > 1 and np.any(docs[1:] < docs[:-1]):
+        ordem = np.argsort(docs, kind="stable")
+        if posicoes is not None:
+            inicios = np.cumsum(tfs, dtype=np.int64) - tfs
+            novos_inicios = np.cumsum(tfs[ordem], dtype=np.int64) - tfs[ordem]
+            posicoes = posicoes[np.repeat(inicios[ordem] - novos_inicios, tfs[ordem]) + np.arange(len(posicoes))]
+        docs, tfs, tamanhos = docs[ordem], tfs[ordem], tamanhos[ordem]
+
+    if len(descartar):
+        manter = ~np.isin(docs, descartar)
+        if not manter.all():
+            if posicoes is not None:
+                posicoes = posicoes[np.repeat(manter, tfs)]
+            docs, tfs, tamanhos = docs[manter], tfs[manter], tamanhos[manter]
+    return docs, tfs, tamanhos, posicoes
@@ -0,0 +1,130 @@
+# =============================================================================
+# ESTATÍSTICAS MATERIALIZADAS POR VAGA
+# =============================================================================
+#
+# Tabela pequena (uma linha por vaga) com o que o dashboard mostra: número de
+# candidatos, matches, melhor candidato, contagem por status e os agregados do
+# funil de contratação (shared/funil.py). Ela é mantida de forma incremental a
+# cada gravação de candidato (a contribuição antiga sai, a nova entra) e pode
+# ser reconstruída do zero a partir dos registros. Este módulo só manipula
+# dicionários; ler e gravar a tabela fica em shared.utils.
+
+from shared.funil import funil_vazio, aplicar_candidato
+
+LIMITE_MATCH = 0.7
+STATUS_PADRAO = "Pendente"
+
+
+def estatisticas_vazias():
+    """Linha da tabela para uma vaga sem candidatos"""
+    return {
+        "candidatos": 0,
+        "matches": 0,
+        "melhor_score": None,
+        "melhor_candidato": None,
+        "melhor_nome": None,
+        "status": {},
+        "funil": funil_vazio(),
+        "recalcular_melhor": False
+    }
+
+
+def tabela_desatualizada(tabela):
+    """Tabela gravada antes de algum campo novo da linha (ex: 'funil'): precisa ser reconstruída"""
+    campos = estatisticas_vazias().keys()
+    return any(not campos <= linha.keys() for linha in tabela.values())
+
+
+def _score(candidato):
+    score = candidato.get("score_match")
+    if isinstance(score, (int, float)) and score == score:
+        return score
+    return None
+
+
+def _status(candidato):
+    status = candidato.get("status_atual")
+    return status if isinstance(status, str) and status else STATUS_PADRAO
+
+
+def _remover(linha, candidato):
+    linha["candidatos"] -= 1
+    score = _score(candidato)
+    if score is not None and score >= LIMITE_MATCH:
+        linha["matches"] -= 1
+    status = _status(candidato)
+    linha["status"][status] = linha["status"].get(status, 0) - 1
+    if not linha["status"][status]:
+        del linha["status"][status]
+    aplicar_candidato(linha["funil"], candidato, -1)
+
+
+def _adicionar(linha, candidato):
+    linha["candidatos"] += 1
+    score = _score(candidato)
+    if score is not None and score >= LIMITE_MATCH:
+        linha["matches"] += 1
+    status = _status(candidato)
+    linha["status"][status] = linha["status"].get(status, 0) + 1
+    aplicar_candidato(linha["funil"], candidato, 1)
+    if score is not None and (linha["melhor_score"] is None or score > linha["melhor_score"]):
+        linha["melhor_score"] = score
+        linha["melhor_candidato"] = candidato.get("codigo_candidato")
+        linha["melhor_nome"] = candidato.get("nome")
+
+
+def aplicar_alteracao(tabela, anterior, novo):
+    """
+    Atualiza a tabela com a gravação de um candidato.
+
+    Args:
+        tabela (dict): {id_vaga: linha}. É alterada no lugar.
+        anterior (dict, opcional): Registro antes da gravação (None se é novo).
+        novo (dict, opcional): Registro gravado (None se foi removido).
+
+    Returns:
+        set: Vagas cujo melhor candidato precisa ser recalculado com
+        `recalcular_melhor` (o antigo melhor perdeu score ou saiu da vaga).
+    """
+    pendentes = set()
+    if anterior is not None:
+        linha = tabela.setdefault(anterior.get("id_vaga"), estatisticas_vazias())
+        _remover(linha, anterior)
+        era_melhor = linha["melhor_candidato"] == anterior.get("codigo_candidato")
+        mesmo_lugar = novo is not None and novo.get("id_vaga") == anterior.get("id_vaga")
+        if era_melhor and not (mesmo_lugar and (_score(novo) or 0) >= (linha["melhor_score"] or 0)):
+            linha["recalcular_melhor"] = True
+            pendentes.add(anterior.get("id_vaga"))
+    if novo is not None:
+        _adicionar(tabela.setdefault(novo.get("id_vaga"), estatisticas_vazias()), novo)
+    return pendentes
+
+
+def recalcular_melhor(linha, candidatos_vaga):
+    """Refaz só o melhor candidato de uma vaga (caso raro: o melhor perdeu score)"""
+    linha.update(melhor_score=None, melhor_candidato=None, melhor_nome=None, recalcular_melhor=False)
+    for candidato in candidatos_vaga:
+        score = _score(candidato)
+        if score is not None and (linha["melhor_score"] is None or score > linha["melhor_score"]):
+            linha.update(
+                melhor_score=score,
+                melhor_candidato=candidato.get("codigo_candidato"),
+                melhor_nome=candidato.get("nome")
+            )
+    return linha
+
+
+def reconstruir_estatisticas(candidatos):
+    """Monta a tabela do zero em uma única passada pelos candidatos"""
+    tabela = {}
+    for candidato in candidatos:
+        _adicionar(tabela.setdefault(candidato.get("id_vaga"), estatisticas_vazias()), candidato)
+    return tabela
+
+
+def totais(tabela):
+    """Métricas globais (candidatos e matches) somando as linhas da tabela"""
+    return {
+        "candidatos": sum(linha["candidatos"] for linha in tabela.values()),
+        "matches": sum(linha["matches"] for linha in tabela.values())
+    }
@@ -0,0 +1,130 @@
+# =============================================================================
+# LOG DE EVENTOS DE STATUS (SÓ ACRÉSCIMOS)
+# =============================================================================
+#
+# Qualificar/Desqualificar não reescreve o JSON do candidato. Cada ação vira
+# um evento pequeno e imutável:
+#   - local: uma linha acrescentada em eventos/vaga_<id>.jsonl, com uma única
+#     escrita em O_APPEND (ações simultâneas viram duas linhas);
+#   - S3: um objeto novo por evento em eventos/<id_vaga>/, nunca sobrescrito.
+#
+# O estado atual é o registro do candidato mais os eventos ainda pendentes
+# (`aplicar_eventos`). A compactação periódica grava os eventos nos registros
+# e os tira do log. Cada evento tem um id que vai junto para o
+# historico_status, então aplicar o mesmo evento de novo (compactação
+# interrompida, leitura durante a compactação) não duplica nada.
+#
+# Este módulo só manipula dicionários; ler e gravar o log fica em shared.utils.
+
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_COMPACTACAO = 300  # segundos entre compactações automáticas nos apps
+
+
+def novo_evento(arquivo, candidato, status, comentario):
+    """Evento de mudança de status de uma candidatura"""
+    return {
+        "id": uuid.uuid4().hex,
+        "data": datetime.now().isoformat(),
+        "arquivo": arquivo,
+        "codigo_candidato": candidato.get("codigo_candidato"),
+        "vaga_id": candidato.get("id_vaga"),
+        "status": status,
+        "comentario": comentario,
+    }
+
+
+def chave_candidatura(candidato):
+    return candidato.get("codigo_candidato"), candidato.get("id_vaga")
+
+
+def chave_evento(evento):
+    return evento.get("codigo_candidato"), evento.get("vaga_id")
+
+
+def agrupar_eventos(eventos):
+    """{(codigo_candidato, id_vaga): [eventos]}"""
+    grupos = {}
+    for evento in eventos:
+        grupos.setdefault(chave_evento(evento), []).append(evento)
+    return grupos
+
+
+def aplicar_eventos(candidato, eventos):
+    """
+    Acrescenta ao historico_status os eventos que ainda não estão lá e
+    atualiza status_atual para o da entrada mais recente. Altera o
+    candidato no lugar.
+
+    Returns:
+        int: Quantos eventos eram novos.
+    """
+    historico = list(candidato.get("historico_status") or [])
+    aplicados = {h.get("evento_id") for h in historico}
+    novos = sorted(
+        (e for e in eventos if e["id"] not in aplicados),
+        key=lambda e: (e["data"], e["id"])
+    )
+    if not novos:
+        return 0
+    for evento in novos:
+        historico.append({
+            "data": evento["data"],
+            "status": evento["status"],
+            "comentario": evento["comentario"],
+            "vaga_id": evento["vaga_id"],
+            "evento_id": evento["id"],
+        })
+    candidato["historico_status"] = historico
+    candidato["status_atual"] = max(historico, key=lambda h: str(h.get("data")))["status"]
+    return len(novos)
+
+
+def eventos_gravados(candidato):
+    """Eventos já compactados no historico_status (para não perdê-los ao regravar o registro)"""
+    return [
+        {"id": h["evento_id"], "data": h.get("data"), "status": h.get("status"),
+         "comentario": h.get("comentario"), "vaga_id": h.get("vaga_id")}
+        for h in candidato.get("historico_status") or [] if h.get("evento_id")
+    ]
+
+
+def com_eventos(candidato, eventos):
+    """Cópia do candidato com os eventos aplicados (o original não muda)"""
+    copia = dict(candidato)
+    aplicar_eventos(copia, eventos)
+    return copia
+
+
+def aplicar_eventos_pendentes(candidatos, eventos):
+    """Aplica a cada candidato da lista os seus eventos pendentes; devolve quantos foram aplicados"""
+    grupos = agrupar_eventos(eventos)
+    if not grupos:
+        return 0
+    return sum(aplicar_eventos(c, grupos.get(chave_candidatura(c), ())) for c in candidatos)
+
+
+def iniciar_compactacao_periodica(compactar, intervalo=INTERVALO_COMPACTACAO):
+    """
+    Roda `compactar()` a cada `intervalo` segundos em uma thread daemon.
+    Erros são logados e a próxima rodada tenta de novo.
+    """
+    def laco():
+        while True:
+            time.sleep(intervalo)
+            try:
+                resultado = compactar()
+                if resultado:
+                    logger.info("Compactação do log de eventos: %s", resultado)
+            except Exception:
+                logger.exception("Erro na compactação do log de eventos")
+
+    thread = threading.Thread(target=laco, name="compactacao-eventos", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,354 @@
+# =============================================================================
+# EXPORTAÇÃO DE RESULTADOS (XLSX / CSV / PARQUET EM STREAMING)
+# =============================================================================
+#
+# Monta a mesma tabela que os antigos merges candidato x vaga x currículo
+# (sufixos '_candidato'/'_vaga' para colunas repetidas), mas linha a linha:
+# vagas e currículos viram dicionários de consulta e cada linha é escrita
+# direto no arquivo de saída, sem DataFrame intermediário. A saída é um
+# SpooledTemporaryFile: pequeno fica em memória, grande vai para um arquivo
+# temporário que é apagado ao fechar (nada fica no diretório do servidor).
+#
+# Entre gerar e baixar, a sessão guarda só o caminho de uma cópia em disco
+# (gravar_exportacao_temporaria), nunca o conteúdo; a cópia é apagada depois
+# do download, quando os filtros mudam ou, se a sessão for abandonada, pela
+# limpeza das exportações antigas.
+
+import io
+import os
+import csv
+import json
+import time
+import shutil
+import tempfile
+from datetime import datetime
+
+from shared.registros import Candidato
+
+LIMITE_CELULA_EXCEL = 32767  # máximo de caracteres por célula no Excel
+LIMITE_SPOOL_EXPORTACAO = 16 * 1024 * 1024  # acima disso a exportação vai para disco temporário
+LIMITE_EXPORTACAO = 512 * 1024 * 1024       # tamanho máximo de um arquivo exportado
+LINHAS_POR_LOTE_PARQUET = 1000
+PASTA_EXPORTACOES = os.path.join(tempfile.gettempdir(), "seleai_exportacoes")
+VALIDADE_EXPORTACAO = 6 * 3600  # segundos até uma exportação não baixada ser apagada
+
+FORMATOS_EXPORTACAO = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+class ExportacaoMuitoGrande(Exception):
+    """Levantada quando o arquivo exportado passa de LIMITE_EXPORTACAO"""
+
+
+def _colunas(candidatos, vagas):
+    """
+    Colunas na ordem dos merges do pandas: candidato, vaga e por fim cv_pt.
+    As do candidato partem do esquema fixo (Candidato.CAMPOS), então os nomes
+    não dependem de quais candidaturas entram no recorte; campos extras vêm depois.
+    """
+    cols_cand, cols_vaga = dict.fromkeys(Candidato.CAMPOS), {}
+    for c in candidatos:
+        cols_cand.update(dict.fromkeys(c))
+    for v in vagas:
+        cols_vaga.update(dict.fromkeys(v))
+    repetidas = set(cols_cand) & set(cols_vaga)
+
+    colunas = []  # (nome na planilha, origem, chave)
+    for k in cols_cand:
+        colunas.append((f"{k}_candidato" if k in repetidas else k, "candidato", k))
+    for k in cols_vaga:
+        colunas.append((f"{k}_vaga" if k in repetidas else k, "vaga", k))
+    if "cv_pt" not in cols_cand:
+        colunas.append(("cv_pt", "curriculo", "cv_pt"))
+    return colunas
+
+
+def _valor_celula(valor):
+    """Converte listas/dicionários em texto e corta textos maiores que uma célula"""
+    if isinstance(valor, float) and valor != valor:  # NaN vira célula vazia, como no pandas
+        return None
+    if isinstance(valor, (list, dict)):
+        valor = json.dumps(valor, ensure_ascii=False)
+    if isinstance(valor, str) and len(valor) > LIMITE_CELULA_EXCEL:
+        valor = valor[:LIMITE_CELULA_EXCEL]
+    return valor
+
+
+def colunas_exportacao(vagas):
+    """
+    Nomes das colunas disponíveis para exportação: esquema do candidato mais os
+    campos das vagas. Não percorre os candidatos (roda a cada render de Resultados).
+    """
+    return [nome for nome, _, _ in _colunas((), vagas)]
+
+
+def arquivos_curriculos(candidatos):
+    """Nomes dos currículos das candidaturas (para iterar_curriculos/iterar_curriculos_s3 lerem só esses)"""
+    return {c["cv_file"] for c in candidatos if c.get("cv_file")}
+
+
+def filtrar_candidatos(candidatos, id_vaga=None, data_inicio=None, data_fim=None):
+    """
+    Recorte da exportação: uma vaga, um período de candidatura ou tudo.
+
+    Args:
+        candidatos (list[dict]): Candidatos.
+        id_vaga (str, opcional): Só candidaturas desta vaga.
+        data_inicio, data_fim (date, opcional): Intervalo (inclusivo) de 'data_candidatura'.
+
+    Returns:
+        list[dict]: Os candidatos dentro do recorte.
+    """
+    selecionados = []
+    for c in candidatos:
+        if id_vaga is not None and c.get("id_vaga") != id_vaga:
+            continue
+        if data_inicio or data_fim:
+            try:
+                data = datetime.strptime(str(c.get("data_candidatura"))[:10], "%Y-%m-%d").date()
+            except ValueError:
+                continue
+            if (data_inicio and data < data_inicio) or (data_fim and data > data_fim):
+                continue
+        selecionados.append(c)
+    return selecionados
+
+
+def linhas_exportacao(candidatos, vagas, curriculos=(), colunas=None):
+    """
+    Gera o cabeçalho e depois as linhas combinadas candidato + vaga + currículo.
+
+    Args:
+        candidatos (list[dict]): Candidatos (uma linha por candidatura).
+        vagas (list[dict]): Vagas, ligadas ao candidato por 'id_vaga' == 'id'.
+        curriculos (iterable): Tuplas (codigo_candidato, cv_pt, metadados),
+            como as geradas por iterar_curriculos/iterar_curriculos_s3 (ver
+            `arquivos_curriculos`). Ligadas à candidatura pelo nome do arquivo
+            (metadados['arquivo'] == 'cv_file'): a mesma pessoa pode ter mandado
+            um currículo diferente para cada vaga. Só é consumido se a coluna
+            'cv_pt' for exportada.
+        colunas (list[str], opcional): Projeção: apenas estas colunas, nesta ordem.
+
+    Yields:
+        list: Primeiro os nomes das colunas, depois uma lista de valores por candidato.
+    """
+    todas = _colunas(candidatos, vagas)
+    if colunas is not None:
+        por_nome = {nome: (nome, origem, chave) for nome, origem, chave in todas}
+        todas = [por_nome[nome] for nome in colunas if nome in por_nome]
+    colunas = todas
+    origens = {origem for _, origem, _ in colunas}
+
+    vagas_por_id = {v.get("id"): v for v in vagas} if "vaga" in origens else {}
+    cv_por_arquivo = {}
+    if "curriculo" in origens:
+        # Só os textos dos currículos das candidaturas exportadas ficam em memória
+        arquivos = arquivos_curriculos(candidatos)
+        cv_por_arquivo = {
+            metadados["arquivo"]: texto for _, texto, metadados in curriculos if metadados["arquivo"] in arquivos
+        }
+
+    yield [nome for nome, _, _ in colunas]
+    for candidato in candidatos:
+        fontes = {
+            "candidato": candidato,
+            "vaga": vagas_por_id.get(candidato.get("id_vaga"), {}),
+            "curriculo": {"cv_pt": cv_por_arquivo.get(candidato.get("cv_file"))}
+        }
+        yield [_valor_celula(fontes[origem].get(chave)) for _, origem, chave in colunas]
+
+
+def _escrever_xlsx(destino, linhas, total, progresso, nome_aba="Resultados"):
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(destino, {"constant_memory": True, "nan_inf_to_errors": True})
+    escritas = 0
+    try:
+        worksheet = workbook.add_worksheet(nome_aba)
+        negrito = workbook.add_format({"bold": True})
+
+        worksheet.write_row(0, 0, next(linhas), negrito)
+        for escritas, valores in enumerate(linhas, 1):
+            worksheet.write_row(escritas, 0, valores)
+            _avisar_progresso(progresso, escritas, total)
+    finally:
+        workbook.close()
+    return escritas
+
+
+def _escrever_csv(destino, linhas, total, progresso):
+    # utf-8-sig para o Excel reconhecer acentos ao abrir o CSV
+    texto = io.TextIOWrapper(destino, encoding="utf-8-sig", newline="")
+    escritas = 0
+    try:
+        writer = csv.writer(texto)
+        writer.writerow(next(linhas))
+        for escritas, valores in enumerate(linhas, 1):
+            writer.writerow(valores)
+            _avisar_progresso(progresso, escritas, total)
+            _verificar_tamanho(destino)
+        texto.flush()
+    finally:
+        texto.detach()  # não fecha o arquivo de destino
+    return escritas
+
+
+def _tipo_valor(valor):
+    if isinstance(valor, bool):
+        return "bool"
+    if isinstance(valor, (int, float)):
+        return "numero"
+    return "texto"
+
+
+def _tipos_parquet(candidatos, vagas, colunas=None):
+    """
+    Tipo de cada coluna olhando todas as linhas (não só o primeiro lote):
+    bool ou número só se todos os valores preenchidos forem desse tipo, senão
+    texto. Coluna toda vazia vira texto. Assim nenhum valor deixa de caber.
+    """
+    linhas = linhas_exportacao(candidatos, vagas, (), colunas)  # cv_pt é sempre texto
+    tipos = [None] * len(next(linhas))
+    for valores in linhas:
+        for i, valor in enumerate(valores):
+            if valor is None or tipos[i] == "texto":
+                continue
+            tipo = _tipo_valor(valor)
+            tipos[i] = tipo if tipos[i] in (None, tipo) else "texto"
+    return [tipo or "texto" for tipo in tipos]
+
+
+def _converter_parquet(valor, tipo):
+    if valor is None:
+        return None
+    if tipo == "texto":
+        return valor if isinstance(valor, str) else str(valor)
+    if tipo == "numero":
+        return float(valor)
+    return valor
+
+
+def _escrever_parquet(destino, linhas, total, progresso, tipos=None):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("A exportação em Parquet precisa do pacote 'pyarrow' (pip install pyarrow)")
+
+    nomes = next(linhas)
+    tipos = tipos or ["texto"] * len(nomes)
+    tipos_arrow = {"bool": pa.bool_(), "numero": pa.float64(), "texto": pa.string()}
+    # Schema fixo, decidido antes da primeira linha (ver _tipos_parquet)
+    schema = pa.schema([(nome, tipos_arrow[tipo]) for nome, tipo in zip(nomes, tipos)])
+    writer = pq.ParquetWriter(destino, schema)
+    escritas = 0
+    lote = []
+
+    def _gravar(lote):
+        colunas = list(zip(*lote))
+        arrays = [
+            pa.array([_converter_parquet(v, tipo) for v in col], type=campo.type)
+            for col, tipo, campo in zip(colunas, tipos, schema)
+        ]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        _verificar_tamanho(destino)
+
+    try:
+        for escritas, valores in enumerate(linhas, 1):
+            lote.append(valores)
+            if len(lote) == LINHAS_POR_LOTE_PARQUET:
+                _gravar(lote)
+                lote = []
+            _avisar_progresso(progresso, escritas, total)
+        if lote:
+            _gravar(lote)
+    finally:
+        writer.close()
+    return escritas
+
+
+def _avisar_progresso(progresso, escritas, total):
+    if progresso and (escritas % 100 == 0 or escritas == total):
+        progresso(escritas, total)
+
+
+def _verificar_tamanho(destino):
+    if destino.tell() > LIMITE_EXPORTACAO:
+        raise ExportacaoMuitoGrande(
+            f"A exportação passou de {LIMITE_EXPORTACAO // (1024 * 1024)}MB; "
+            "reduza o recorte ou o número de colunas"
+        )
+
+
+def gerar_exportacao(formato, candidatos, vagas, curriculos=(), colunas=None, progresso=None):
+    """
+    Gera a exportação em um arquivo temporário pronto para `st.download_button`.
+
+    Args:
+        formato (str): 'xlsx', 'csv' ou 'parquet'.
+        candidatos (list[dict]): Candidatos já recortados (ver `filtrar_candidatos`).
+        vagas (list[dict]): Vagas.
+        curriculos (iterable): Tuplas (codigo_candidato, cv_pt, metadados), ligadas por metadados['arquivo'].
+        colunas (list[str], opcional): Projeção das colunas exportadas.
+        progresso (callable, opcional): Chamado como progresso(linhas_escritas, total).
+
+    Returns:
+        tempfile.SpooledTemporaryFile: Arquivo posicionado no início. Quem chama deve fechá-lo.
+    """
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+
+    escritores = {
+        "xlsx": _escrever_xlsx,
+        "csv": _escrever_csv,
+        "parquet": lambda *args: _escrever_parquet(*args, tipos=_tipos_parquet(candidatos, vagas, colunas)),
+    }
+    destino = tempfile.SpooledTemporaryFile(max_size=LIMITE_SPOOL_EXPORTACAO)
+    try:
+        linhas = linhas_exportacao(candidatos, vagas, curriculos, colunas)
+        escritores[formato](destino, linhas, len(candidatos), progresso)
+        _verificar_tamanho(destino)
+        destino.seek(0)
+    except BaseException:
+        destino.close()
+        raise
+    return destino
+
+
+def limpar_exportacoes_antigas(validade=VALIDADE_EXPORTACAO):
+    """Apaga cópias de exportações de sessões abandonadas"""
+    limite = time.time() - validade
+    for nome in os.listdir(PASTA_EXPORTACOES) if os.path.isdir(PASTA_EXPORTACOES) else []:
+        caminho = os.path.join(PASTA_EXPORTACOES, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+
+def gravar_exportacao_temporaria(arquivo, formato):
+    """
+    Copia a exportação gerada para um arquivo em disco, para a sessão guardar
+    só o caminho até o download.
+
+    Returns:
+        str: Caminho do arquivo (apagar com `descartar_exportacao`).
+    """
+    limpar_exportacoes_antigas()
+    os.makedirs(PASTA_EXPORTACOES, exist_ok=True)
+    fd, caminho = tempfile.mkstemp(suffix=f".{formato}", dir=PASTA_EXPORTACOES)
+    with os.fdopen(fd, "wb") as destino:
+        shutil.copyfileobj(arquivo, destino, 1024 * 1024)
+    return caminho
+
+
+def descartar_exportacao(caminho):
+    if caminho:
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,200 @@
+# =============================================================================
+# EXTRAÇÃO DE TEXTO DE CURRÍCULOS (POOL DE PROCESSOS)
+# =============================================================================
+#
+# Este módulo não importa Streamlit nem AWS: ele é carregado também pelos
+# processos do pool, que só precisam de pypdf/python-docx.
+
+import os
+import time
+import signal
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource  # Disponível apenas em Unix
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT_DOCUMENTO = 30        # segundos por currículo
+MAX_PAGINAS = 50              # páginas lidas por PDF (o resto é ignorado)
+LIMITE_MEMORIA_WORKER_MB = 1024
+MAX_TENTATIVAS = 2            # tentativas quando um worker morre (ex: estouro de memória)
+
+
+class TempoExcedido(Exception):
+    """Levantada dentro do worker quando um documento passa do timeout"""
+
+
+# =============================================================================
+# EXTRAÇÃO DE UM DOCUMENTO
+# =============================================================================
+
+def extrair_texto_curriculo(arquivo, extensao, max_paginas=None):
+    """
+    Extrai o texto de um currículo .pdf ou .docx.
+
+    Args:
+        arquivo: Caminho ou stream binário com suporte a seek (arquivo aberto, SpooledTemporaryFile...).
+        extensao (str): '.pdf' ou '.docx'.
+        max_paginas (int, opcional): Número máximo de páginas lidas de um PDF.
+
+    Returns:
+        str: O texto extraído, sem espaços extras no início/fim.
+    """
+    partes = []
+    if extensao == ".pdf":
+        from pypdf import PdfReader
+        reader = PdfReader(arquivo)
+        for i, page in enumerate(reader.pages):
+            if max_paginas is not None and i >= max_paginas:
+                break
+            partes.append(page.extract_text() or "") # Adiciona o texto da página
+    elif extensao == ".docx":
+        import docx
+        documento = docx.Document(arquivo)
+        for paragrafo in documento.paragraphs:
+            partes.append(paragrafo.text + "\n") # Adiciona o texto do parágrafo
+    return "".join(partes).strip()
+
+
+def _registro(caminho, cv_pt=None, erro=None, tipo_erro=None, duracao=0.0):
+    """Resultado padronizado da extração (sucesso ou falha)"""
+    return {
+        "arquivo": caminho,
+        "ok": erro is None,
+        "cv_pt": cv_pt,
+        "erro": erro,
+        "tipo_erro": tipo_erro,
+        "duracao": round(duracao, 3)
+    }
+
+
+def _alarme(signum, frame):
+    raise TempoExcedido()
+
+
+def _inicializar_worker(limite_memoria_mb):
+    """Aplica o limite de memória (espaço de endereçamento) no processo do worker"""
+    if resource is not None and limite_memoria_mb:
+        limite = limite_memoria_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+        except (ValueError, OSError) as e:
+            logger.warning("Não foi possível limitar a memória do worker: %s", e)
+
+
+def _extrair_worker(caminho, timeout, max_paginas):
+    """Executado no processo do pool: extrai um arquivo respeitando o timeout"""
+    inicio = time.monotonic()
+    usa_alarme = timeout and hasattr(signal, "setitimer")
+    if usa_alarme:
+        signal.signal(signal.SIGALRM, _alarme)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with open(caminho, "rb") as arquivo:
+            texto = extrair_texto_curriculo(arquivo, os.path.splitext(caminho)[1].lower(), max_paginas)
+        return _registro(caminho, cv_pt=texto, duracao=time.monotonic() - inicio)
+    except TempoExcedido:
+        return _registro(caminho, erro=f"Tempo limite de {timeout}s excedido", tipo_erro="timeout",
+                         duracao=time.monotonic() - inicio)
+    except MemoryError:
+        return _registro(caminho, erro="Limite de memória do worker excedido", tipo_erro="memoria",
+                         duracao=time.monotonic() - inicio)
+    except Exception as e:
+        return _registro(caminho, erro=f"{type(e).__name__}: {e}", tipo_erro="leitura",
+                         duracao=time.monotonic() - inicio)
+    finally:
+        if usa_alarme:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# =============================================================================
+# MOTOR EM PARALELO
+# =============================================================================
+
+def extrair_em_paralelo(caminhos, max_workers=None, timeout=TIMEOUT_DOCUMENTO,
+                        max_paginas=MAX_PAGINAS, limite_memoria_mb=LIMITE_MEMORIA_WORKER_MB):
+    """
+    Extrai o texto de vários currículos em um pool de processos.
+
+    Os resultados são devolvidos como gerador, na ordem em que ficam prontos,
+    para que quem chama possa montar o DataFrame aos poucos. No máximo
+    2 * max_workers arquivos ficam em processamento ao mesmo tempo, então
+    a memória não cresce com o tamanho do lote.
+
+    Args:
+        caminhos (iterable): Caminhos dos arquivos .pdf/.docx.
+        max_workers (int, opcional): Processos do pool. Padrão: todos os núcleos.
+        timeout (float): Tempo máximo por documento, em segundos.
+        max_paginas (int): Páginas lidas por PDF.
+        limite_memoria_mb (int): Limite de memória por worker (apenas Unix).
+
+    Yields:
+        dict: {'arquivo', 'ok', 'cv_pt', 'erro', 'tipo_erro', 'duracao'}
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    janela = 2 * max_workers
+    pendentes_iter = iter(caminhos)
+    fila_retentativa = []   # (caminho, tentativa) que precisam ser reenviados
+    em_execucao = {}        # future -> (caminho, tentativa)
+
+    # "spawn" evita herdar o estado do processo web (threads, modelo carregado)
+    contexto = multiprocessing.get_context("spawn")
+
+    def _novo_pool():
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=contexto,
+            initializer=_inicializar_worker,
+            initargs=(limite_memoria_mb,)
+        )
+
+    pool = _novo_pool()
+    try:
+        while True:
+            # Completa a janela com retentativas primeiro e depois arquivos novos
+            while len(em_execucao) < janela:
+                if fila_retentativa:
+                    caminho, tentativa = fila_retentativa.pop()
+                else:
+                    caminho = next(pendentes_iter, None)
+                    if caminho is None:
+                        break
+                    tentativa = 1
+                future = pool.submit(_extrair_worker, caminho, timeout, max_paginas)
+                em_execucao[future] = (caminho, tentativa)
+
+            if not em_execucao:
+                break
+
+            prontos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            pool_quebrado = False
+            for future in prontos:
+                caminho, tentativa = em_execucao.pop(future)
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    # Um worker morreu (ex: morto pelo SO); não dá para saber qual arquivo
+                    # causou, então todos os afetados são reenviados até MAX_TENTATIVAS
+                    pool_quebrado = True
+                    if tentativa < MAX_TENTATIVAS:
+                        fila_retentativa.append((caminho, tentativa + 1))
+                    else:
+                        yield _registro(caminho, erro="Worker encerrado durante a extração", tipo_erro="worker")
+
+            if pool_quebrado:
+                for caminho, tentativa in em_execucao.values():
+                    if tentativa < MAX_TENTATIVAS:
+                        fila_retentativa.append((caminho, tentativa + 1))
+                    else:
+                        yield _registro(caminho, erro="Worker encerrado durante a extração", tipo_erro="worker")
+                em_execucao.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = _novo_pool()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
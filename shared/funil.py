@@ -0,0 +1,180 @@
+# =============================================================================
+# FUNIL DE CONTRATAÇÃO E TEMPO ATÉ A DECISÃO
+# =============================================================================
+#
+# Agregados do funil (candidaturas -> analisadas -> avaliadas -> qualificadas)
+# e um histograma do tempo entre a candidatura e a primeira decisão do
+# recrutador (historico_status). Ficam em linha["funil"] da tabela de
+# estatísticas por vaga (shared/estatisticas.py) e seguem a mesma regra: a
+# cada gravação de candidato a contribuição antiga sai e a nova entra, então o
+# dashboard lê só os agregados, sem abrir os candidatos.
+#
+# Visões por consultor ou gerais são somas das linhas das vagas. Este módulo
+# só manipula dicionários (biblioteca padrão).
+
+from datetime import datetime
+
+STATUS_QUALIFICADO = "Qualificado"
+STATUS_DESQUALIFICADO = "Desqualificado"
+
+# Etapas em ordem; cada uma é um subconjunto da anterior
+ETAPAS_FUNIL = ("candidaturas", "analisadas", "avaliadas", "qualificadas")
+NOMES_ETAPAS = {
+    "candidaturas": "Candidaturas",
+    "analisadas": "Analisadas",
+    "avaliadas": "Avaliadas",
+    "qualificadas": "Qualificadas",
+}
+
+# Faixas do histograma: (limite superior em horas, rótulo); a última é aberta
+FAIXAS_LATENCIA = (
+    (1, "< 1 h"),
+    (4, "1-4 h"),
+    (24, "4-24 h"),
+    (72, "1-3 dias"),
+    (168, "3-7 dias"),
+    (336, "1-2 semanas"),
+    (672, "2-4 semanas"),
+    (None, "> 4 semanas"),
+)
+
+
+def funil_vazio():
+    """Agregados de uma vaga sem candidatos"""
+    return {
+        "etapas": {etapa: 0 for etapa in ETAPAS_FUNIL},
+        "desqualificadas": 0,
+        "latencia": [0] * len(FAIXAS_LATENCIA),
+        "decisoes": 0,
+        "horas_decisao": 0.0,
+    }
+
+
+def _data(valor):
+    try:
+        return datetime.fromisoformat(str(valor))
+    except (TypeError, ValueError):
+        return None
+
+
+def horas_ate_decisao(candidato):
+    """Horas entre a candidatura e a primeira decisão nesta vaga (None se não houver)"""
+    inicio = _data(candidato.get("data_candidatura"))
+    if inicio is None:
+        return None
+    decisoes = [
+        _data(h.get("data")) for h in candidato.get("historico_status") or []
+        if h.get("vaga_id", candidato.get("id_vaga")) == candidato.get("id_vaga")
+        and h.get("status") in (STATUS_QUALIFICADO, STATUS_DESQUALIFICADO)
+    ]
+    decisoes = [d for d in decisoes if d is not None]
+    if not decisoes:
+        return None
+    return max((min(decisoes) - inicio).total_seconds() / 3600, 0.0)
+
+
+def faixa_latencia(horas):
+    """Índice da faixa do histograma para uma latência em horas"""
+    for i, (limite, _) in enumerate(FAIXAS_LATENCIA):
+        if limite is None or horas < limite:
+            return i
+
+
+def etapas_candidato(candidato):
+    """Etapas do funil que a candidatura já atingiu (cada etapa implica as anteriores)"""
+    status = candidato.get("status_atual")
+    avaliada = status in (STATUS_QUALIFICADO, STATUS_DESQUALIFICADO)
+    etapas = ["candidaturas"]
+    if avaliada or candidato.get("score_match") is not None or candidato.get("status_processamento") == "concluido":
+        etapas.append("analisadas")
+    if avaliada:
+        etapas.append("avaliadas")
+    if status == STATUS_QUALIFICADO:
+        etapas.append("qualificadas")
+    return etapas
+
+
+def aplicar_candidato(funil, candidato, sinal):
+    """Soma (sinal=1) ou retira (sinal=-1) a contribuição de um candidato"""
+    for etapa in etapas_candidato(candidato):
+        funil["etapas"][etapa] += sinal
+    if candidato.get("status_atual") == STATUS_DESQUALIFICADO:
+        funil["desqualificadas"] += sinal
+    horas = horas_ate_decisao(candidato)
+    if horas is not None:
+        funil["latencia"][faixa_latencia(horas)] += sinal
+        funil["decisoes"] += sinal
+        funil["horas_decisao"] += sinal * horas
+        if not funil["decisoes"]:
+            funil["horas_decisao"] = 0.0  # sem resíduo de ponto flutuante
+
+
+# =============================================================================
+# VISÕES AGREGADAS
+# =============================================================================
+
+def somar_funis(funis):
+    """Soma os agregados de várias vagas (ex: todas as vagas de um consultor)"""
+    total = funil_vazio()
+    for funil in funis:
+        for etapa in ETAPAS_FUNIL:
+            total["etapas"][etapa] += funil["etapas"].get(etapa, 0)
+        total["desqualificadas"] += funil["desqualificadas"]
+        total["latencia"] = [a + b for a, b in zip(total["latencia"], funil["latencia"])]
+        total["decisoes"] += funil["decisoes"]
+        total["horas_decisao"] += funil["horas_decisao"]
+    return total
+
+
+def funis_por(tabela, vagas, campo):
+    """
+    Agrupa os funis das vagas por um campo da vaga.
+
+    Args:
+        tabela (dict): Tabela de estatísticas {id_vaga: linha}.
+        vagas (list): Registros das vagas.
+        campo (str): Campo da vaga usado como grupo (ex: 'consultor_responsavel').
+
+    Returns:
+        dict: {valor do campo: funil somado}
+    """
+    grupos = {}
+    for vaga in vagas:
+        linha = tabela.get(vaga.get("id"))
+        if linha and "funil" in linha:
+            grupos.setdefault(vaga.get(campo) or "(não informado)", []).append(linha["funil"])
+    return {grupo: somar_funis(funis) for grupo, funis in grupos.items()}
+
+
+def conversao(funil):
+    """[(etapa, quantidade, % da etapa anterior, % das candidaturas)] na ordem do funil"""
+    linhas = []
+    inicial = funil["etapas"]["candidaturas"]
+    anterior = None
+    for etapa in ETAPAS_FUNIL:
+        n = funil["etapas"][etapa]
+        linhas.append((
+            etapa,
+            n,
+            n / anterior if anterior else None,
+            n / inicial if inicial else None,
+        ))
+        anterior = n
+    return linhas
+
+
+def horas_medias_decisao(funil):
+    return funil["horas_decisao"] / funil["decisoes"] if funil["decisoes"] else None
+
+
+def percentil_latencia(funil, p):
+    """Rótulo da faixa do histograma que contém o percentil p (0-100) das decisões"""
+    if not funil["decisoes"]:
+        return None
+    alvo = funil["decisoes"] * p / 100
+    acumulado = 0
+    for quantidade, (_, rotulo) in zip(funil["latencia"], FAIXAS_LATENCIA):
+        acumulado += quantidade
+        if acumulado >= alvo:
+            return rotulo
+    return FAIXAS_LATENCIA[-1][1]
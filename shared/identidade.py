@@ -0,0 +1,82 @@
+# =============================================================================
+# IDENTIDADE ESTÁVEL DO CANDIDATO
+# =============================================================================
+#
+# O código do candidato é derivado de um HMAC-SHA256 (com chave secreta) do
+# email normalizado: o mesmo email gera sempre o mesmo código, em qualquer
+# processo, e o email não pode ser recuperado a partir do código. O formato
+# continua "CAND" + dígitos, então o padrão CAND\d+ dos nomes de arquivo vale.
+#
+# Cada código atribuído tem um registro de identidade ({codigo}.json) com o
+# email, as vagas em que a pessoa se candidatou e o último currículo enviado.
+# Esse registro é o índice email -> código: se dois emails caírem no mesmo
+# código (colisão), o segundo passa para a próxima tentativa do HMAC, e a
+# escolha fica gravada. Achar a identidade de um email e checar se ele já se
+# candidatou a uma vaga custa uma leitura de um arquivo pequeno.
+#
+# Este módulo só manipula dicionários; ler e gravar fica em shared.utils.
+
+import hmac
+import hashlib
+
+DIGITOS_CODIGO = 16
+MAX_TENTATIVAS_CODIGO = 100
+
+# Chave usada só se nenhuma for configurada; defina a sua para que os códigos
+# não possam ser recalculados por quem conhece o email
+CHAVE_ID_PADRAO = "seleai-id-candidato"
+
+
+def normalizar_email(email):
+    return (email or "").strip().lower()
+
+
+def codigo_candidato(email, chave, tentativa=0):
+    """Código determinístico 'CAND' + DIGITOS_CODIGO dígitos para o email (e a tentativa)"""
+    mensagem = normalizar_email(email)
+    if tentativa:
+        mensagem = f"{mensagem}#{tentativa}"
+    digest = hmac.new(chave.encode("utf-8"), mensagem.encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"CAND{int(digest[:16], 16) % 10 ** DIGITOS_CODIGO:0{DIGITOS_CODIGO}d}"
+
+
+def identidade_vazia(email, codigo):
+    return {"codigo_candidato": codigo, "email": normalizar_email(email), "vagas": [], "cv_file": ""}
+
+
+def resolver_identidade(email, chave, ler_identidade):
+    """
+    Encontra (ou escolhe) o código do email.
+
+    Args:
+        email (str): Email informado pelo candidato.
+        chave (str): Chave secreta do HMAC.
+        ler_identidade (callable): Recebe um código e devolve o registro de
+            identidade gravado (dict) ou None.
+
+    Returns:
+        tuple: (registro de identidade, nova) — `nova` indica que o registro
+        ainda não existe e precisa ser gravado para reservar o código.
+    """
+    email = normalizar_email(email)
+    for tentativa in range(MAX_TENTATIVAS_CODIGO):
+        codigo = codigo_candidato(email, chave, tentativa)
+        identidade = ler_identidade(codigo)
+        if identidade is None:
+            return identidade_vazia(email, codigo), True
+        if identidade.get("email") == email:
+            return identidade, False
+    raise RuntimeError(f"Não foi possível gerar um código livre para o email após {MAX_TENTATIVAS_CODIGO} tentativas")
+
+
+def ja_candidatou(identidade, id_vaga):
+    return id_vaga in identidade.get("vagas", [])
+
+
+def registrar_candidatura(identidade, id_vaga, cv_file=""):
+    """Marca a vaga na identidade e guarda o currículo mais recente (alterada no lugar)"""
+    if id_vaga not in identidade.setdefault("vagas", []):
+        identidade["vagas"].append(id_vaga)
+    if cv_file:
+        identidade["cv_file"] = cv_file
+    return identidade
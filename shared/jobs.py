@@ -0,0 +1,226 @@
+# =============================================================================
+# FILA DE JOBS EM SEGUNDO PLANO (SQLITE + THREADS)
+# =============================================================================
+#
+# Fila simples dentro do próprio processo do Streamlit: os jobs ficam em uma
+# tabela SQLite (sobrevive a reinícios) e um número fixo de threads consome a
+# fila. O número de workers limita quantos jobs usam o encoder ao mesmo tempo
+# e `max_pendentes` limita o tamanho da fila: quem submete deve consultar
+# `tem_capacidade()` antes de aceitar novo trabalho (controle de admissão).
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDENTE = "pendente"
+STATUS_PROCESSANDO = "processando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+
+class FilaJobs:
+    """
+    Fila de jobs persistida em SQLite e processada por um pool de threads.
+
+    Args:
+        db_path (str): Arquivo SQLite da tabela de jobs.
+        processar (callable): Função chamada com o payload (dict) de cada job.
+        num_workers (int): Threads consumindo a fila.
+        max_pendentes (int): Máximo de jobs aguardando antes de `tem_capacidade()` recusar novos.
+        max_tentativas (int): Tentativas por job antes de marcá-lo como erro.
+        ao_falhar (callable, opcional): Chamada com o payload e a mensagem de erro
+            quando o job esgota as tentativas (ex: marcar o registro como erro).
+    """
+
+    def __init__(self, db_path, processar, num_workers=1, max_pendentes=200, max_tentativas=3, ao_falhar=None):
+        self.db_path = db_path
+        self.processar = processar
+        self.ao_falhar = ao_falhar
+        self.num_workers = num_workers
+        self.max_pendentes = max_pendentes
+        self.max_tentativas = max_tentativas
+        self._novo_job = threading.Event()
+        self._parar = threading.Event()
+        self._threads = []
+        self._criar_tabela()
+
+    # -------------------------------------------------------------------------
+    # Tabela
+    # -------------------------------------------------------------------------
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transacao(self):
+        """Conexão que faz commit (ou rollback) e é fechada ao final do bloco"""
+        conn = self._conectar()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _criar_tabela(self):
+        with self._transacao() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tipo TEXT NOT NULL,
+                    grupo TEXT,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    erro TEXT,
+                    criado_em TEXT NOT NULL,
+                    atualizado_em TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_grupo ON jobs (grupo, status)")
+            # Jobs que estavam em execução quando o processo caiu voltam para a fila
+            conn.execute(
+                "UPDATE jobs SET status = ?, atualizado_em = ? WHERE status = ?",
+                (STATUS_PENDENTE, _agora(), STATUS_PROCESSANDO)
+            )
+
+    # -------------------------------------------------------------------------
+    # API pública
+    # -------------------------------------------------------------------------
+
+    def pendentes(self):
+        """Quantidade de jobs aguardando ou em execução"""
+        with self._transacao() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)",
+                (STATUS_PENDENTE, STATUS_PROCESSANDO)
+            ).fetchone()
+        return row[0]
+
+    def tem_capacidade(self):
+        """Indica se a fila aceita novos jobs (controle de admissão)"""
+        return self.pendentes() < self.max_pendentes
+
+    def enfileirar(self, tipo, payload, grupo=None):
+        """
+        Adiciona um job à fila e acorda os workers.
+
+        Args:
+            tipo (str): Tipo do job (ex: 'candidatura').
+            payload (dict): Dados passados para `processar`.
+            grupo (str, opcional): Agrupamento usado em `progresso` (ex: id da vaga).
+
+        Returns:
+            int: O id do job.
+        """
+        with self._transacao() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (tipo, grupo, payload, status, criado_em, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (tipo, grupo, json.dumps(payload, ensure_ascii=False), STATUS_PENDENTE, _agora(), _agora())
+            )
+            job_id = cursor.lastrowid
+        self._novo_job.set()
+        return job_id
+
+    def progresso(self, grupo=None):
+        """Contagem de jobs por status, opcionalmente só de um grupo"""
+        sql = "SELECT status, COUNT(*) FROM jobs"
+        params = ()
+        if grupo is not None:
+            sql += " WHERE grupo = ?"
+            params = (grupo,)
+        sql += " GROUP BY status"
+        with self._transacao() as conn:
+            contagem = dict(conn.execute(sql, params).fetchall())
+        return {s: contagem.get(s, 0) for s in (STATUS_PENDENTE, STATUS_PROCESSANDO, STATUS_CONCLUIDO, STATUS_ERRO)}
+
+    def iniciar(self):
+        """Inicia as threads de processamento (chamar uma vez por processo)"""
+        if self._threads:
+            return self
+        for i in range(self.num_workers):
+            t = threading.Thread(target=self._loop_worker, name=f"fila-jobs-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._novo_job.set()
+        return self
+
+    def parar(self, timeout=None):
+        """Sinaliza para as threads pararem depois do job atual"""
+        self._parar.set()
+        self._novo_job.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    # -------------------------------------------------------------------------
+    # Workers
+    # -------------------------------------------------------------------------
+
+    def _reservar_job(self):
+        """Marca o próximo job pendente como 'processando' e o retorna (ou None)"""
+        conn = self._conectar()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (STATUS_PENDENTE,)
+            ).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, tentativas = tentativas + 1, atualizado_em = ? WHERE id = ?",
+                (STATUS_PROCESSANDO, _agora(), row["id"])
+            )
+            conn.commit()
+            return row
+        finally:
+            conn.close()
+
+    def _finalizar_job(self, job, erro=None):
+        if erro is None:
+            status = STATUS_CONCLUIDO
+        elif job["tentativas"] + 1 >= self.max_tentativas:
+            status = STATUS_ERRO
+        else:
+            status = STATUS_PENDENTE  # tenta de novo mais tarde
+        with self._transacao() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, erro = ?, atualizado_em = ? WHERE id = ?",
+                (status, erro, _agora(), job["id"])
+            )
+        if status == STATUS_ERRO and self.ao_falhar:
+            try:
+                self.ao_falhar(json.loads(job["payload"]), erro)
+            except Exception:
+                logger.exception("Erro ao registrar a falha do job %s", job["id"])
+
+    def _loop_worker(self):
+        while not self._parar.is_set():
+            job = self._reservar_job()
+            if job is None:
+                # Espera um novo job (ou verifica de novo a cada 5s)
+                self._novo_job.wait(5)
+                self._novo_job.clear()
+                continue
+            try:
+                self.processar(json.loads(job["payload"]))
+                self._finalizar_job(job)
+            except Exception as e:
+                logger.exception("Erro ao processar o job %s (%s)", job["id"], job["tipo"])
+                self._finalizar_job(job, erro=f"{type(e).__name__}: {e}")
+                time.sleep(1)
+
+
+def _agora():
+    return datetime.now().isoformat(timespec="seconds")
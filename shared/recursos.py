@@ -0,0 +1,129 @@
+# =============================================================================
+# RECURSOS LOCAIS (MODELO E DADOS DO NLTK) E MODO OFFLINE
+# =============================================================================
+#
+# `python scripts/provisionar.py` copia os pesos do modelo de embeddings e os
+# dados do NLTK para PASTA_RECURSOS. Com essa pasta presente (ou com
+# SELEAI_OFFLINE=1) o runtime só lê caminhos locais: o Hugging Face Hub fica
+# em modo offline e nada é baixado; se faltar algum recurso o erro diz qual e
+# como provisionar, em vez de travar tentando acessar a rede.
+#
+# Sem a pasta (ambiente de desenvolvimento) vale o comportamento antigo:
+# o modelo vem do hub e os dados do NLTK são baixados quando faltam.
+#
+# Só biblioteca padrão no import (faz parte do núcleo leve).
+
+import os
+import re
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PASTA_RECURSOS = os.environ.get("SELEAI_RECURSOS_PATH", "recursos")
+PASTA_MODELOS = os.path.join(PASTA_RECURSOS, "modelos")
+PASTA_NLTK = os.path.join(PASTA_RECURSOS, "nltk_data")
+MANIFESTO = os.path.join(PASTA_RECURSOS, "manifesto.json")
+
+# Pacote do NLTK -> recurso procurado com nltk.data.find
+DADOS_NLTK = {
+    "rslp": "stemmers/rslp",
+    "stopwords": "corpora/stopwords",
+    "punkt": "tokenizers/punkt",
+}
+
+_configurado = False
+_configuracao_lock = threading.Lock()
+
+
+class RecursoAusente(RuntimeError):
+    """Recurso não provisionado em modo offline"""
+
+
+def modo_offline():
+    """Offline quando os recursos foram provisionados ou SELEAI_OFFLINE=1"""
+    return os.environ.get("SELEAI_OFFLINE") == "1" or os.path.exists(MANIFESTO)
+
+
+def configurar_ambiente():
+    """
+    Aponta o NLTK para a pasta local e, em modo offline, desliga o acesso à rede
+    do Hugging Face. Precisa rodar antes do primeiro import de
+    sentence_transformers/transformers (as variáveis são lidas no import).
+    """
+    global _configurado
+    if _configurado:
+        return
+    with _configuracao_lock:
+        if _configurado:
+            return
+        if modo_offline():
+            os.environ.setdefault("HF_HUB_OFFLINE", "1")
+            os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+            os.environ.setdefault("HF_DATASETS_OFFLINE", "1")
+        if os.path.isdir(PASTA_NLTK):
+            import nltk
+            caminho = os.path.abspath(PASTA_NLTK)
+            if caminho not in nltk.data.path:
+                nltk.data.path.insert(0, caminho)
+        _configurado = True
+
+
+def caminho_modelo(nome_modelo):
+    """
+    Onde carregar o SentenceTransformer: a cópia local se existir, senão o nome
+    no hub (só fora do modo offline).
+    """
+    local = os.path.join(PASTA_MODELOS, nome_modelo)
+    if os.path.isdir(local):
+        return local
+    if modo_offline():
+        raise RecursoAusente(
+            f"Modelo {nome_modelo} não encontrado em {local}. Rode: python scripts/provisionar.py"
+        )
+    logger.warning("Modelo %s não provisionado; baixando do Hugging Face Hub", nome_modelo)
+    return nome_modelo
+
+
+def nome_arquivo_modelo(nome_modelo):
+    """Nome do modelo seguro para nomes de arquivo de cache (ids do hub têm '/')"""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", nome_modelo.replace("/", "--"))
+
+
+def garantir_nltk(pacote):
+    """Confere se o pacote do NLTK está disponível; fora do modo offline baixa se faltar"""
+    import nltk
+
+    configurar_ambiente()
+    try:
+        nltk.data.find(DADOS_NLTK[pacote])
+    except LookupError:
+        if modo_offline():
+            raise RecursoAusente(
+                f"Dados do NLTK '{pacote}' não encontrados em {PASTA_NLTK}. Rode: python scripts/provisionar.py"
+            )
+        logger.warning("Dados do NLTK '%s' não provisionados; baixando", pacote)
+        nltk.download(pacote, quiet=True)
+
+
+# =============================================================================
+# TEMPOS DE INICIALIZAÇÃO
+# =============================================================================
+
+@contextmanager
+def medir_etapa(tempos, etapa):
+    """Acumula em tempos[etapa] a duração do bloco, em ms"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[etapa] = tempos.get(etapa, 0.0) + (time.perf_counter() - inicio) * 1000
+
+
+def registrar_tempos(tempos, titulo="Inicialização"):
+    """Loga a quebra por etapa e o total (ex: 'Inicialização: nltk 12 ms | modelo 840 ms | total 852 ms')"""
+    partes = [f"{etapa} {ms:.0f} ms" for etapa, ms in tempos.items()]
+    partes.append(f"total {sum(tempos.values()):.0f} ms")
+    logger.info("%s (%s): %s", titulo, "offline" if modo_offline() else "online", " | ".join(partes))
@@ -0,0 +1,220 @@
+# =============================================================================
+# REGISTROS COMPACTOS DE VAGA E CANDIDATO
+# =============================================================================
+#
+# As listas de vagas e candidatos carregadas para as páginas usam objetos com
+# __slots__ em vez de dicts: o nome de cada campo deixa de ser guardado em
+# cada registro, e valores que se repetem entre registros (status, modelo de
+# trabalho, níveis, cidades, termos das habilidades) são internados e
+# compartilhados. Com milhares de candidatos a memória cai bastante, e o
+# cache entre sessões (que copia os dados via pickle) fica mais rápido.
+#
+# Os registros se comportam como dicts (c['nome'], c.get(...), `in`,
+# atribuição, iteração pelas chaves, {**c}), então o resto do código não
+# muda. Campos fora do esquema ficam em `_extras`; `para_dict` (e
+# `serializar_json`, para o json.dump) devolve exatamente o JSON original.
+#
+# Só biblioteca padrão no import (faz parte do núcleo leve).
+
+import sys
+from collections.abc import MutableMapping
+
+
+class _Ausente:
+    """Marca campo do esquema que não veio no JSON (diferente de um valor None)"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<ausente>"
+
+    def __reduce__(self):
+        return "_AUSENTE"
+
+_AUSENTE = _Ausente()
+
+
+class Registro(MutableMapping):
+    """
+    Base dos registros. Cada subclasse declara CAMPOS (viram os __slots__),
+    CATEGORICOS (strings internadas) e LISTAS_TERMOS (listas de strings cujos
+    itens são internados).
+    """
+
+    __slots__ = ("_extras",)
+    CAMPOS = ()
+    CATEGORICOS = frozenset()
+    LISTAS_TERMOS = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._CONJUNTO_CAMPOS = frozenset(cls.CAMPOS)
+        # Setter de cada slot, para montar o registro sem passar por __setitem__
+        cls._SETTERS = {campo: getattr(cls, campo).__set__ for campo in cls.CAMPOS}
+
+    @classmethod
+    def _compactar(cls, campo, valor):
+        if campo in cls.CATEGORICOS and type(valor) is str:
+            return sys.intern(valor)
+        if campo in cls.LISTAS_TERMOS and type(valor) is list:
+            return [sys.intern(t) if type(t) is str else t for t in valor]
+        return valor
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Cria o registro a partir do dict lido do JSON"""
+        registro = cls.__new__(cls)
+        setters = cls._SETTERS
+        extras = None
+        for chave, valor in dados.items():
+            setter = setters.get(chave)
+            if setter is not None:
+                setter(registro, valor)
+            else:
+                if extras is None:
+                    extras = {}
+                extras[chave] = valor
+        registro._extras = extras
+
+        intern = sys.intern
+        for campo in cls.CATEGORICOS:
+            valor = getattr(registro, campo, None)
+            if type(valor) is str:
+                setters[campo](registro, intern(valor))
+        for campo in cls.LISTAS_TERMOS:
+            valor = getattr(registro, campo, None)
+            if type(valor) is list:
+                setters[campo](registro, [intern(t) if type(t) is str else t for t in valor])
+        return registro
+
+    def para_dict(self):
+        """Dict com as mesmas chaves e valores do JSON de origem"""
+        return {chave: self[chave] for chave in self}
+
+    def copy(self):
+        return type(self).de_dict(self)
+
+    # -------------------------------------------------------------------------
+    # Interface de dict
+    # -------------------------------------------------------------------------
+
+    def __getitem__(self, chave):
+        if chave in self._CONJUNTO_CAMPOS:
+            valor = getattr(self, chave, _AUSENTE)
+            if valor is _AUSENTE:
+                raise KeyError(chave)
+            return valor
+        if self._extras is None:
+            raise KeyError(chave)
+        return self._extras[chave]
+
+    def get(self, chave, padrao=None):
+        if chave in self._CONJUNTO_CAMPOS:
+            valor = getattr(self, chave, _AUSENTE)
+            return padrao if valor is _AUSENTE else valor
+        return self._extras.get(chave, padrao) if self._extras else padrao
+
+    def __contains__(self, chave):
+        if chave in self._CONJUNTO_CAMPOS:
+            return hasattr(self, chave)
+        return bool(self._extras) and chave in self._extras
+
+    def __setitem__(self, chave, valor):
+        if chave in self._CONJUNTO_CAMPOS:
+            setattr(self, chave, self._compactar(chave, valor))
+        else:
+            if self._extras is None:
+                self._extras = {}
+            self._extras[chave] = valor
+
+    def __delitem__(self, chave):
+        if chave in self._CONJUNTO_CAMPOS:
+            try:
+                delattr(self, chave)
+            except AttributeError:
+                raise KeyError(chave) from None
+        elif self._extras and chave in self._extras:
+            del self._extras[chave]
+        else:
+            raise KeyError(chave)
+
+    def __iter__(self):
+        for campo in self.CAMPOS:
+            if hasattr(self, campo):
+                yield campo
+        if self._extras:
+            yield from self._extras
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.para_dict()!r})"
+
+    # -------------------------------------------------------------------------
+    # Pickle (cache do Streamlit): uma tupla de valores, sem os nomes dos campos
+    # -------------------------------------------------------------------------
+
+    def __getstate__(self):
+        return tuple(getattr(self, campo, _AUSENTE) for campo in self.CAMPOS), self._extras
+
+    def __setstate__(self, estado):
+        valores, self._extras = estado
+        for campo, valor in zip(self.CAMPOS, valores):
+            if valor is not _AUSENTE:
+                setattr(self, campo, valor)
+
+
+class Vaga(Registro):
+    CAMPOS = (
+        "id", "data_abertura", "data_fechamento", "consultor_responsavel", "email",
+        "empresa_contratante", "informacao_nome_solicitante", "contato_solicitante",
+        "titulo_vaga", "nivel_profissional", "tipo_contratacao", "prazo_contratacao",
+        "vaga_especifica_pcd", "area_atuacao", "pais_vaga", "estado_vaga", "cidade_vaga",
+        "modelo_trabalho", "disponibilidade_viagens", "nivel_academico_min",
+        "nivel_ingles_min", "nivel_espanhol_min", "hab_comportamentais", "hab_tecnicas",
+        "beneficios", "orcamento_salario", "status", "pesos",
+    )
+    __slots__ = CAMPOS
+    CATEGORICOS = frozenset({
+        "consultor_responsavel", "empresa_contratante", "tipo_contratacao", "prazo_contratacao",
+        "pais_vaga", "estado_vaga", "cidade_vaga", "modelo_trabalho", "nivel_academico_min",
+        "nivel_ingles_min", "nivel_espanhol_min", "status",
+    })
+    LISTAS_TERMOS = frozenset({"nivel_profissional", "area_atuacao", "hab_comportamentais", "hab_tecnicas", "beneficios"})
+
+
+class Candidato(Registro):
+    CAMPOS = (
+        "id_vaga", "nome", "email", "contato", "pais", "estado", "cidade", "possui_def",
+        "modelo_trabalho", "tipo_contrato", "disponibilidade_viagens", "nivel_academico",
+        "areas_atuacao", "tempo_experiencia", "nivel_ingles", "nivel_espanhol",
+        "hab_comportamentais", "hab_tecnicas", "ultimo_salario", "ultimo_beneficio",
+        "pretencao_salarial", "data_candidatura", "codigo_candidato", "cv_file",
+        "score_match", "fatores", "explicacao", "status_processamento", "erro_processamento", "cv_hash",
+        "historico_status", "status_atual", "versao_score",
+    )
+    __slots__ = CAMPOS
+    CATEGORICOS = frozenset({
+        "id_vaga", "pais", "estado", "cidade", "modelo_trabalho", "tipo_contrato",
+        "nivel_academico", "nivel_ingles", "nivel_espanhol", "status_processamento", "status_atual",
+    })
+    LISTAS_TERMOS = frozenset({"areas_atuacao", "hab_comportamentais", "hab_tecnicas", "ultimo_beneficio"})
+
+
+# Tipos aceitos pelos carregadores (carregar_dados(pasta, tipo="candidato"))
+REGISTROS = {"vaga": Vaga, "candidato": Candidato}
+
+
+def criar_registros(dados, tipo):
+    """Converte a lista de dicts lida dos JSONs (tipo None mantém os dicts)"""
+    if tipo is None:
+        return dados
+    de_dict = REGISTROS[tipo].de_dict
+    return [de_dict(d) for d in dados]
+
+
+def serializar_json(obj):
+    """`default` para json.dump/json.dumps: grava registros como o dict original"""
+    if isinstance(obj, Registro):
+        return obj.para_dict()
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
@@ -0,0 +1,63 @@
+# =============================================================================
+# TOKENIZAÇÃO E NORMALIZAÇÃO
+# =============================================================================
+#
+# Núcleo leve: só biblioteca padrão no import. O NLTK (stopwords e
+# word_tokenize) é carregado no primeiro uso do tokenizer, então scripts,
+# workers e a fila podem importar este módulo sem pagar esse custo. Os dados
+# do NLTK vêm da pasta de recursos local quando provisionada (shared/recursos.py).
+
+import re
+import string
+import unicodedata
+from functools import lru_cache
+
+from shared.recursos import garantir_nltk
+
+_TABELA_PONTUACAO = str.maketrans({key: " " for key in string.punctuation})
+_ESPACOS = re.compile(r" +")
+
+
+def normalize_accents(text):
+    return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("utf-8")
+
+def normalize_str(text):
+    text = text.lower()
+    text = remove_punctuation(text)
+    text = normalize_accents(text)
+    text = _ESPACOS.sub(" ", text)
+    return " ".join([w for w in text.split()])
+
+def remove_punctuation(text):
+    return text.translate(_TABELA_PONTUACAO)
+
+
+@lru_cache(maxsize=1)
+def _stop_words():
+    garantir_nltk("stopwords")
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words("portuguese"))
+
+@lru_cache(maxsize=1)
+def _funcao_word_tokenize():
+    garantir_nltk("punkt")
+    from nltk.tokenize import word_tokenize
+    return word_tokenize
+
+def _word_tokenize(text):
+    return _funcao_word_tokenize()(text)
+
+
+def tokenizer(text):
+    if isinstance(text, str):
+        stop_words = _stop_words()
+        text = normalize_str(text)
+        text = "".join([w for w in text if not w.isdigit()])
+        text = _word_tokenize(text)
+        text = [x for x in text if x not in stop_words]
+        text = [y for y in text if len(y) > 1]
+        return [t for t in text]
+    elif isinstance(text, list):
+        return [token for item in text if item for token in tokenizer(str(item))]
+    else:
+        return []
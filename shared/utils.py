@@ -6,61 +6,38 @@ import os
 import re
 import json
 import glob
-import docx
-import nltk
-import string
-import unicodedata
-import numpy as np
+import heapq
+import logging
+import hashlib
+import shutil
+import time
+import tempfile
+import threading
 import pandas as pd
-from pypdf import PdfReader
-from nltk.stem import RSLPStemmer
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from datetime import datetime, timedelta
-from botocore.exceptions import NoCredentialsError
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import CountVectorizer
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from botocore.exceptions import NoCredentialsError, ClientError
+from shared.texto import normalize_accents, normalize_str, remove_punctuation, tokenizer
+from shared.extracao import extrair_texto_curriculo, extrair_em_paralelo, MAX_PAGINAS
+from shared.estatisticas import aplicar_alteracao, recalcular_melhor, reconstruir_estatisticas, tabela_desatualizada
+from shared.identidade import CHAVE_ID_PADRAO, resolver_identidade, registrar_candidatura
+from shared.eventos import agrupar_eventos, aplicar_eventos, aplicar_eventos_pendentes, chave_candidatura, com_eventos, eventos_gravados
+from shared.funil import NOMES_ETAPAS, FAIXAS_LATENCIA, conversao, horas_medias_decisao, percentil_latencia
+from shared.registros import criar_registros, serializar_json
 
+logger = logging.getLogger(__name__)
 
 VAGAS_PATH = 'vagas/'
-model = SentenceTransformer("all-MiniLM-L6-v2")
 
+# Streaming de currículos: blocos de cópia e limite em memória antes de ir para o disco
+TAMANHO_BLOCO = 1024 * 1024          # 1MB
+LIMITE_SPOOL_MEMORIA = 4 * 1024 * 1024  # 4MB
 
-# =============================================================================
-# TOKENIZAÇÃO E NORMALIZAÇÃO
-# =============================================================================
+# Cache de texto extraído: mude a versão sempre que a extração mudar para invalidar tudo
+EXTRATOR_VERSAO = "1"
+CACHE_CURRICULOS_PASTA = "cache_curriculos"
 
-def normalize_accents(text):
-    return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("utf-8")
-
-def normalize_str(text):
-    text = text.lower()
-    text = remove_punctuation(text)
-    text = normalize_accents(text)
-    text = re.sub(re.compile(r" +"), " ",text)
-    return " ".join([w for w in text.split()])
-
-def remove_punctuation(text):
-    punctuations = string.punctuation
-    table = str.maketrans({key: " " for key in punctuations})
-    text = text.translate(table)
-    return text
-
-
-def tokenizer(text):
-    stop_words = nltk.corpus.stopwords.words("portuguese")
-    if isinstance(text, str):
-        text = normalize_str(text)
-        text = "".join([w for w in text if not w.isdigit()])
-        text = word_tokenize(text)
-        text = [x for x in text if x not in stop_words]
-        text = [y for y in text if len(y) > 1]
-        return [t for t in text]
-    elif isinstance(text, list):
-        return [token for item in text if item for token in tokenizer(str(item))]
-    else:
-        return []
 
 # =============================================================================
 # FUNÇÕES PRINCIPAIS STREAMLIT
@@ -79,34 +56,152 @@ def parse_date_safe(s):
     except Exception:
         return datetime.min
 
-def encerrar_vaga(vaga_id):
-    """Encerra uma vaga (muda status para 'encerrada')"""
-    vagas = carregar_dados(VAGAS_PATH)
+def score_candidato(candidato):
+    """score_match como número (0 para candidaturas ainda sem score ou NaN)"""
+    score = candidato.get('score_match')
+    if isinstance(score, (int, float)) and score == score:
+        return score
+    return 0.0
+
+def paginar_candidatos(candidatos, pagina=1, tamanho_pagina=20, status=None,
+                       score_min=0.0, score_max=1.0, habilidades=None, chave=score_candidato):
+    """
+    Filtra os candidatos e devolve só a página pedida, ordenada por score_match.
+
+    Os filtros são aplicados antes de qualquer ordenação e a página é obtida com
+    um heap (top-K com K = pagina * tamanho_pagina), sem ordenar a lista inteira.
+
+    Args:
+        candidatos (iterable): Candidatos (dicts) da vaga.
+        pagina (int): Página (começa em 1).
+        tamanho_pagina (int): Candidatos por página.
+        status (list[str], opcional): Status aceitos ('Pendente', 'Qualificado', 'Desqualificado').
+        score_min, score_max (float): Intervalo do score (0 a 1).
+        habilidades (list[str], opcional): Tokens que o candidato precisa ter em
+            hab_tecnicas ou hab_comportamentais (todos).
+        chave (callable): Score usado na ordenação (padrão: score_match; os
+            filtros de score continuam usando o score_match).
+
+    Returns:
+        tuple: (candidatos da página, total de candidatos após os filtros)
+    """
+    habilidades = set(habilidades or [])
+
+    def passa(c):
+        if status and c.get('status_atual', 'Pendente') not in status:
+            return False
+        if not (score_min <= score_candidato(c) <= score_max):
+            return False
+        if habilidades:
+            hab = set(c.get('hab_tecnicas') or []) | set(c.get('hab_comportamentais') or [])
+            if not habilidades <= hab:
+                return False
+        return True
+
+    total = 0
+    def filtrados():
+        nonlocal total
+        for c in candidatos:
+            if passa(c):
+                total += 1
+                yield c
+
+    inicio = (max(pagina, 1) - 1) * tamanho_pagina
+    topo = heapq.nlargest(inicio + tamanho_pagina, filtrados(), key=chave)
+    return topo[inicio:], total
+
+NOMES_FATORES_EXPLICACAO = {
+    'tecnico': 'Técnico',
+    'cultural': 'Cultural',
+    'experiencia': 'Experiência',
+    'curriculo': 'Currículo'
+}
+
+def tabela_explicacao(explicacao):
+    """
+    Monta a tabela exibida em Resultados a partir da explicação gravada no
+    cálculo do score (ver model.model.calcular_fatores), sem recalcular nada.
+    """
+    linhas = [
+        {
+            'Fator': NOMES_FATORES_EXPLICACAO.get(fator, fator),
+            'Requisito da vaga': termo_vaga,
+            'Melhor correspondência': correspondencia,
+            'Similaridade': similaridade
+        }
+        for fator, itens in (explicacao or {}).items()
+        for termo_vaga, correspondencia, similaridade in itens
+    ]
+    return pd.DataFrame(linhas, columns=['Fator', 'Requisito da vaga', 'Melhor correspondência', 'Similaridade'])
+
+def tabela_funil(funil):
+    """Etapas do funil com a conversão em relação à etapa anterior e às candidaturas"""
+    return pd.DataFrame(
+        [
+            {
+                'Etapa': NOMES_ETAPAS[etapa],
+                'Quantidade': quantidade,
+                'Da etapa anterior': da_anterior,
+                'Das candidaturas': do_total
+            }
+            for etapa, quantidade, da_anterior, do_total in conversao(funil)
+        ],
+        columns=['Etapa', 'Quantidade', 'Da etapa anterior', 'Das candidaturas']
+    )
+
+def tabela_latencia(funil):
+    """Histograma do tempo entre a candidatura e a primeira decisão"""
+    return pd.DataFrame({
+        'Tempo até a decisão': [rotulo for _, rotulo in FAIXAS_LATENCIA],
+        'Decisões': funil['latencia']
+    })
+
+def tabela_funil_por(funis, nome_grupo):
+    """Uma linha por grupo (ex: consultor) com conversão e tempo até a decisão"""
+    linhas = []
+    for grupo, funil in sorted(funis.items()):
+        etapas = funil['etapas']
+        horas = horas_medias_decisao(funil)
+        linhas.append({
+            nome_grupo: grupo,
+            'Candidaturas': etapas['candidaturas'],
+            'Avaliadas': etapas['avaliadas'],
+            'Qualificadas': etapas['qualificadas'],
+            'Qualificação (% das avaliadas)': etapas['qualificadas'] / etapas['avaliadas'] if etapas['avaliadas'] else None,
+            'Tempo médio até decisão (dias)': round(horas / 24, 1) if horas is not None else None,
+            'Mediana (faixa)': percentil_latencia(funil, 50)
+        })
+    return pd.DataFrame(linhas)
+
+def encerrar_vaga(vaga_id, pasta=VAGAS_PATH):
+    """Encerra uma vaga (muda status para 'encerrada'); lê e grava só o arquivo dela"""
+    vaga = carregar_json(pasta, f"vaga_{vaga_id}.json")
     
-    for vaga in vagas:
-        if vaga['id'] == vaga_id:
-            vaga['status'] = 'encerrada'         
-            vaga['data_fechamento'] = datetime.now().strftime("%Y-%m-%d")
-            salvar_dados(VAGAS_PATH, f"vaga_{vaga_id}.json", vaga)
-            return True, "Vaga encerrada com sucesso"
+    if vaga:
+        vaga['status'] = 'encerrada'         
+        vaga['data_fechamento'] = datetime.now().strftime("%Y-%m-%d")
+        salvar_dados(pasta, f"vaga_{vaga_id}.json", vaga)
+        return True, "Vaga encerrada com sucesso"
     
     return False, "Vaga não encontrada"
 
-def reabrir_vaga(vaga_id):
-    vagas = carregar_dados(VAGAS_PATH)
+def reabrir_vaga(vaga_id, pasta=VAGAS_PATH):
+    vaga = carregar_json(pasta, f"vaga_{vaga_id}.json")
     
-    for vaga in vagas:
-        if vaga['id'] == vaga_id:
-            vaga['status'] = 'ativa'
-            vaga['data_fechamento'] = None
-            salvar_dados(VAGAS_PATH, f"vaga_{vaga_id}.json", vaga)
-            return True, "Vaga reaberta com sucesso"
+    if vaga:
+        vaga['status'] = 'ativa'
+        vaga['data_fechamento'] = None
+        salvar_dados(pasta, f"vaga_{vaga_id}.json", vaga)
+        return True, "Vaga reaberta com sucesso"
     
     return False, "Vaga não encontrada"
 
 
-def carregar_dados(pasta):
-    """Carrega todos os JSONs de uma pasta"""
+def carregar_dados(pasta, tipo=None):
+    """
+    Carrega todos os JSONs de uma pasta. Com `tipo` ('vaga' ou 'candidato') os
+    registros vêm compactos (shared/registros.py) em vez de dicts.
+    """
     dados = []
     for arquivo in os.listdir(pasta):
         if arquivo.endswith('.json'):
@@ -115,12 +210,287 @@ def carregar_dados(pasta):
                     dados.append(json.load(f))
                 except json.JSONDecodeError:
                     continue
-    return dados
+    return criar_registros(dados, tipo)
 
 def salvar_dados(pasta, nome_arquivo, dados):
     """Salva dados em JSON"""
     with open(os.path.join(pasta, nome_arquivo), 'w', encoding='utf-8') as f:
-        json.dump(dados, f, ensure_ascii=False, indent=2)
+        json.dump(dados, f, ensure_ascii=False, indent=2, default=serializar_json)
+    invalidar_cache(pasta)
+
+def carregar_json(pasta, nome_arquivo):
+    """Carrega um único arquivo JSON (None se não existir ou estiver corrompido)"""
+    try:
+        with open(os.path.join(pasta, nome_arquivo), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+# =============================================================================
+# ESTATÍSTICAS POR VAGA (TABELA MATERIALIZADA)
+# =============================================================================
+
+# Serializa leitura-alteração-gravação da tabela entre sessões e workers da fila
+_estatisticas_lock = threading.Lock()
+
+def carregar_estatisticas(caminho):
+    """Tabela {id_vaga: estatísticas} (None se ainda não existir ou estiver corrompida)"""
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def salvar_estatisticas(caminho, tabela):
+    """Grava a tabela em um arquivo temporário e troca de uma vez (sem arquivo pela metade)"""
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(tabela, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+    invalidar_cache(caminho)
+
+def _candidatos_da_vaga(pasta, id_vaga):
+    for arquivo in glob.glob(os.path.join(pasta, f"candidato_*_{id_vaga}.json")):
+        candidato = carregar_json(pasta, os.path.basename(arquivo))
+        if candidato is not None:
+            yield candidato
+
+def salvar_candidato(pasta, nome_arquivo, candidato, caminho_estatisticas, pasta_eventos=None):
+    """
+    Salva um candidato e atualiza a tabela de estatísticas da vaga.
+
+    Todo caminho que grava candidatos (cadastro, fila de jobs) deve passar por
+    aqui para a tabela continuar consistente. Mudanças de status vão para o
+    log de eventos (registrar_status); com `pasta_eventos`, os eventos ainda
+    não compactados entram na comparação, já que a tabela os considera.
+    """
+    with _estatisticas_lock:
+        anterior = carregar_json(pasta, nome_arquivo)
+        if anterior:
+            # Eventos compactados depois que o chamador leu o registro não se perdem
+            aplicar_eventos(candidato, eventos_gravados(anterior))
+        salvar_dados(pasta, nome_arquivo, candidato)
+        tabela = carregar_estatisticas(caminho_estatisticas)
+        if tabela is None or tabela_desatualizada(tabela):
+            # Primeira gravação (ou tabela perdida/antiga): monta do zero, já com este candidato
+            tabela = _reconstruir_com_eventos(carregar_dados(pasta), pasta_eventos)
+        else:
+            pendentes = _eventos_da_candidatura(pasta_eventos, candidato)
+            if pendentes:
+                anterior = anterior and com_eventos(anterior, pendentes)
+                candidato = com_eventos(candidato, pendentes)
+            for id_vaga in aplicar_alteracao(tabela, anterior, candidato):
+                recalcular_melhor(tabela[id_vaga], _candidatos_da_vaga(pasta, id_vaga))
+        salvar_estatisticas(caminho_estatisticas, tabela)
+
+def reconstruir_estatisticas_vagas(pasta_candidatos, caminho_estatisticas, pasta_eventos=None):
+    """Refaz a tabela do zero a partir de todos os candidatos salvos (e dos eventos pendentes)"""
+    with _estatisticas_lock:
+        tabela = _reconstruir_com_eventos(carregar_dados(pasta_candidatos), pasta_eventos)
+        salvar_estatisticas(caminho_estatisticas, tabela)
+    return tabela
+
+def _reconstruir_com_eventos(candidatos, pasta_eventos):
+    if pasta_eventos:
+        aplicar_eventos_pendentes(candidatos, ler_eventos(pasta_eventos))
+    return reconstruir_estatisticas(candidatos)
+
+def _eventos_da_candidatura(pasta_eventos, candidato):
+    if not pasta_eventos:
+        return []
+    chave = chave_candidatura(candidato)
+    return agrupar_eventos(ler_eventos(pasta_eventos, candidato.get('id_vaga'))).get(chave, [])
+
+
+# =============================================================================
+# LOG DE EVENTOS DE STATUS
+# =============================================================================
+#
+# Eventos pendentes ficam em <pasta_eventos>/vaga_<id>.jsonl. A compactação
+# renomeia o arquivo da vaga (as próximas ações criam um novo), espera as
+# escritas em andamento terminarem, aplica os eventos nos registros e apaga o
+# arquivo renomeado. Se ela for interrompida, o arquivo renomeado continua
+# sendo lido e é aplicado de novo na próxima rodada (sem duplicar: ver
+# shared/eventos.py). Um arquivo de trava evita duas compactações ao mesmo
+# tempo, inclusive entre processos.
+#
+# A gravação de cada candidato na compactação usa a mesma trava de
+# salvar_candidato, que vale só dentro do processo: compactar por fora
+# (scripts/compactar_eventos.py) só com o app parado, senão um job da fila
+# pode sobrescrever o registro recém-compactado.
+
+ESPERA_ROTACAO_EVENTOS = 1.0  # segundos para escritas já abertas no arquivo renomeado terminarem
+VALIDADE_TRAVA_COMPACTACAO = 600  # trava mais antiga que isso é de uma compactação que morreu
+MAX_LEITURAS_EVENTOS_S3 = 8  # GETs simultâneos ao ler os eventos pendentes no S3
+
+def _arquivos_eventos(pasta_eventos, id_vaga=None):
+    """Arquivo ativo e arquivos em compactação de uma vaga (ou de todas)"""
+    return sorted(glob.glob(os.path.join(pasta_eventos, f"vaga_{'*' if id_vaga is None else id_vaga}.jsonl*")))
+
+def registrar_evento(pasta_eventos, evento):
+    """Acrescenta o evento ao log da vaga com uma única escrita (ações simultâneas não se sobrescrevem)"""
+    os.makedirs(pasta_eventos, exist_ok=True)
+    linha = (json.dumps(evento, ensure_ascii=False) + "\n").encode("utf-8")
+    fd = os.open(os.path.join(pasta_eventos, f"vaga_{evento['vaga_id']}.jsonl"), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, linha)
+    finally:
+        os.close(fd)
+    invalidar_cache(pasta_eventos)
+
+def _ler_jsonl(caminho):
+    eventos = []
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                if not linha.strip():
+                    continue
+                try:
+                    eventos.append(json.loads(linha))
+                except json.JSONDecodeError:
+                    # Linha pela metade (escrita interrompida): o resto do arquivo continua válido
+                    logger.warning("Linha inválida no log de eventos %s", caminho)
+    except FileNotFoundError:
+        pass  # compactado entre a listagem e a leitura
+    return eventos
+
+def ler_eventos(pasta_eventos, id_vaga=None):
+    """Eventos ainda não compactados de uma vaga (ou de todas)"""
+    eventos = []
+    for caminho in _arquivos_eventos(pasta_eventos, id_vaga):
+        eventos.extend(_ler_jsonl(caminho))
+    return eventos
+
+def registrar_status(pasta_eventos, pasta_candidatos, caminho_estatisticas, evento):
+    """
+    Mudança de status: grava o evento no log e atualiza as estatísticas da
+    vaga. O JSON do candidato não é reescrito (a compactação faz isso).
+
+    O estado "antes" da comparação é o registro gravado mais os eventos
+    pendentes, não a cópia da sessão: dois recrutadores com o mesmo card
+    desatualizado não desalinham a tabela.
+
+    Returns:
+        dict: O candidato atual com o evento aplicado (None se a candidatura
+        não existe mais; nada é gravado).
+    """
+    with _estatisticas_lock:
+        gravado = carregar_json(pasta_candidatos, evento['arquivo'])
+        if gravado is None:
+            logger.warning("Candidatura %s não encontrada; status não registrado", evento['arquivo'])
+            return None
+        anterior = com_eventos(gravado, _eventos_da_candidatura(pasta_eventos, gravado))
+        registrar_evento(pasta_eventos, evento)
+        novo = com_eventos(anterior, [evento])
+        tabela = carregar_estatisticas(caminho_estatisticas)
+        # Sem tabela (ou antiga), o dashboard reconstrói já com este evento
+        if tabela is not None and not tabela_desatualizada(tabela):
+            aplicar_alteracao(tabela, anterior, novo)  # o score não muda: o melhor da vaga continua o mesmo
+            salvar_estatisticas(caminho_estatisticas, tabela)
+    return novo
+
+@contextmanager
+def _trava_compactacao(pasta_eventos):
+    """Cria a trava com O_EXCL; devolve False se outra compactação estiver rodando"""
+    caminho = os.path.join(pasta_eventos, "compactacao.lock")
+    try:
+        if time.time() - os.path.getmtime(caminho) > VALIDADE_TRAVA_COMPACTACAO:
+            os.remove(caminho)
+    except FileNotFoundError:
+        pass
+    try:
+        os.close(os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        os.remove(caminho)
+
+def compactar_eventos(pasta_eventos, pasta_candidatos):
+    """
+    Grava os eventos pendentes nos JSONs dos candidatos e os tira do log.
+
+    Returns:
+        dict: Contagem de eventos e candidatos atualizados (None se outra
+        compactação já estava rodando).
+    """
+    if not os.path.isdir(pasta_eventos):
+        return {"eventos": 0, "candidatos": 0}
+    with _trava_compactacao(pasta_eventos) as travado:
+        if not travado:
+            return None
+        rotacionados = False
+        for caminho in _arquivos_eventos(pasta_eventos):
+            if caminho.endswith(".jsonl"):
+                os.replace(caminho, f"{caminho}.{datetime.now():%Y%m%d%H%M%S}_{os.getpid()}.compactando")
+                rotacionados = True
+        if rotacionados:
+            time.sleep(ESPERA_ROTACAO_EVENTOS)
+
+        # Só os arquivos renomeados: ações feitas a partir daqui ficam para a próxima rodada
+        arquivos = [c for c in _arquivos_eventos(pasta_eventos) if c.endswith(".compactando")]
+        eventos = [e for caminho in arquivos for e in _ler_jsonl(caminho)]
+        contagem = {"eventos": len(eventos), "candidatos": 0}
+        for eventos_candidato in agrupar_eventos(eventos).values():
+            arquivo = eventos_candidato[0]['arquivo']
+            # Mesma trava de salvar_candidato: um job da fila não grava entre a leitura e a escrita
+            with _estatisticas_lock:
+                candidato = carregar_json(pasta_candidatos, arquivo)
+                if candidato is None:
+                    logger.warning("Candidatura %s não existe mais; %d evento(s) descartado(s)", arquivo, len(eventos_candidato))
+                    continue
+                if aplicar_eventos(candidato, eventos_candidato):
+                    salvar_dados(pasta_candidatos, arquivo, candidato)
+                    contagem["candidatos"] += 1
+        for caminho in arquivos:
+            os.remove(caminho)
+        invalidar_cache(pasta_eventos)
+    return contagem
+
+
+# =============================================================================
+# IDENTIDADE DOS CANDIDATOS
+# =============================================================================
+
+_identidades_lock = threading.Lock()
+
+def chave_id_candidato():
+    """Chave do HMAC dos códigos: SELEAI_CHAVE_ID_CANDIDATO ou CHAVE_ID_CANDIDATO nos secrets"""
+    chave = os.environ.get("SELEAI_CHAVE_ID_CANDIDATO")
+    if not chave:
+        try:
+            chave = st.secrets.get("CHAVE_ID_CANDIDATO")
+        except FileNotFoundError:
+            chave = None
+    if not chave:
+        logger.warning("CHAVE_ID_CANDIDATO não configurada; usando a chave padrão")
+        chave = CHAVE_ID_PADRAO
+    return chave
+
+def identificar_candidato(pasta_identidades, email, chave):
+    """
+    Identidade do email: código estável, vagas já candidatadas e último currículo.
+    Se o email é novo, grava a identidade para reservar o código.
+    """
+    with _identidades_lock:
+        identidade, nova = resolver_identidade(
+            email, chave, lambda codigo: carregar_json(pasta_identidades, f"{codigo}.json")
+        )
+        if nova:
+            salvar_dados(pasta_identidades, f"{identidade['codigo_candidato']}.json", identidade)
+    return identidade
+
+def salvar_candidatura_identidade(pasta_identidades, codigo, id_vaga, cv_file=""):
+    """Registra a vaga (e o currículo enviado) na identidade do candidato"""
+    with _identidades_lock:
+        identidade = carregar_json(pasta_identidades, f"{codigo}.json")
+        if identidade is None:
+            raise ValueError(f"Identidade não encontrada: {codigo}")
+        registrar_candidatura(identidade, id_vaga, cv_file)
+        salvar_dados(pasta_identidades, f"{codigo}.json", identidade)
 
 
 # =============================================================================
@@ -142,61 +512,245 @@ def ler_jsons(pasta):
     return pd.DataFrame(dados)
 
 
-def processar_curriculos(pasta_curriculos):
+def salvar_arquivo_stream(origem, destino, tamanho_bloco=TAMANHO_BLOCO):
+    """Copia um arquivo binário (ex: UploadedFile do Streamlit) para o disco em blocos"""
+    origem.seek(0)
+    with open(destino, "wb") as f:
+        shutil.copyfileobj(origem, f, tamanho_bloco)
+
+
+def hash_arquivo(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """Calcula o SHA-256 do conteúdo de um arquivo, lendo em blocos"""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+# -----------------------------------------------------------------------------
+# Cache de texto extraído (local)
+#
+# cache_curriculos/
+#   indice.json            nome do arquivo -> hash, tamanho, mtime (+ falhas)
+#   <hash>_v<versao>.txt   texto extraído, um arquivo por conteúdo
+# -----------------------------------------------------------------------------
+
+_lock_cache_curriculos = threading.Lock()
+
+
+def pasta_cache_curriculos(pasta_curriculos):
+    """Pasta de cache padrão: 'cache_curriculos/' ao lado da pasta de currículos (ex: dados_app/)"""
+    return os.path.join(os.path.dirname(os.path.normpath(pasta_curriculos)), CACHE_CURRICULOS_PASTA)
+
+
+def carregar_indice_curriculos(cache_dir):
+    """Carrega o índice do cache (vazio se não existir ou estiver corrompido)"""
+    try:
+        with open(os.path.join(cache_dir, "indice.json"), "r", encoding="utf-8") as f:
+            indice = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        indice = {}
+    indice.setdefault("arquivos", {})  # nome do arquivo -> hash, tamanho, mtime
+    indice.setdefault("falhas", {})    # hash do conteúdo -> registro de falha (não tenta de novo)
+    return indice
+
+
+def salvar_indice_curriculos(cache_dir, indice):
+    """Salva o índice de forma atômica (escreve em arquivo temporário e renomeia)"""
+    os.makedirs(cache_dir, exist_ok=True)
+    caminho = os.path.join(cache_dir, "indice.json")
+    tmp = f"{caminho}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(indice, f, ensure_ascii=False)
+    os.replace(tmp, caminho)
+
+
+def _caminho_texto_cache(cache_dir, hash_conteudo):
+    return os.path.join(cache_dir, f"{hash_conteudo}_v{EXTRATOR_VERSAO}.txt")
+
+
+def ler_texto_cache(cache_dir, hash_conteudo):
+    """Texto extraído de um conteúdo, ou None se não estiver em cache"""
+    try:
+        with open(_caminho_texto_cache(cache_dir, hash_conteudo), "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def gravar_texto_cache(cache_dir, hash_conteudo, texto):
+    os.makedirs(cache_dir, exist_ok=True)
+    caminho = _caminho_texto_cache(cache_dir, hash_conteudo)
+    tmp = f"{caminho}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(texto)
+    os.replace(tmp, caminho)
+
+
+def texto_curriculo(arquivo_path, cache_dir):
     """
-    Lê arquivos .pdf e .docx de uma pasta, extrai o texto e o código do candidato.
+    Extrai o texto de um único currículo usando o mesmo cache de iterar_curriculos.
+    Usado pelos workers da fila de jobs, logo após a candidatura.
+
+    Returns:
+        tuple: (texto, hash do conteúdo)
+    """
+    hash_conteudo = hash_arquivo(arquivo_path)
+    texto = ler_texto_cache(cache_dir, hash_conteudo)
+    if texto is None:
+        with open(arquivo_path, "rb") as arquivo:
+            texto = extrair_texto_curriculo(arquivo, os.path.splitext(arquivo_path)[1], MAX_PAGINAS)
+        gravar_texto_cache(cache_dir, hash_conteudo, texto)
+
+    with _lock_cache_curriculos:
+        indice = carregar_indice_curriculos(cache_dir)
+        stat = os.stat(arquivo_path)
+        indice["arquivos"][os.path.basename(arquivo_path)] = {"hash": hash_conteudo, "tamanho": stat.st_size, "mtime": stat.st_mtime}
+        salvar_indice_curriculos(cache_dir, indice)
+    return texto, hash_conteudo
+
+
+def _limpar_cache_curriculos(cache_dir, indice, arquivos_vistos):
+    """Remove do cache arquivos apagados e textos que ninguém mais referencia"""
+    removidos = set(indice["arquivos"]) - arquivos_vistos
+    for nome in removidos:
+        del indice["arquivos"][nome]
+    hashes_usados = {info["hash"] for info in indice["arquivos"].values()}
+    for h in set(indice["falhas"]) - hashes_usados:
+        del indice["falhas"][h]
+    if os.path.isdir(cache_dir):
+        limite = time.time() - 3600  # preserva textos recém-gravados por outras threads
+        for entrada in os.scandir(cache_dir):
+            if (entrada.name.endswith(".txt") and entrada.name.split("_v")[0] not in hashes_usados
+                    and entrada.stat().st_mtime < limite):
+                os.remove(entrada.path)
+    return bool(removidos)
+
+
+# -----------------------------------------------------------------------------
+# Pipeline de currículos (gerador)
+# -----------------------------------------------------------------------------
+
+def iterar_curriculos(pasta_curriculos, cache_dir=None, max_workers=None, arquivos=None):
+    """
+    Lê arquivos .pdf e .docx de uma pasta e gera um currículo por vez.
+
+    Só arquivos novos ou alterados são lidos: o texto fica em cache indexado pelo
+    hash do conteúdo e pela versão do extrator. A extração dos arquivos fora do
+    cache roda em paralelo (ver shared.extracao.extrair_em_paralelo). A memória
+    usada não depende do número de currículos (além do índice com nome/hash).
 
     Args:
         pasta_curriculos (str): O caminho para a pasta contendo os arquivos de currículo.
+        cache_dir (str, opcional): Pasta do cache. Padrão: 'cache_curriculos/' na pasta
+            acima de `pasta_curriculos` (ex: dados_app/).
+        max_workers (int, opcional): Processos usados na extração. Padrão: todos os núcleos.
+        arquivos (set, opcional): Só estes nomes de arquivo (ex: os 'cv_file' de uma
+            exportação); os demais não são lidos nem extraídos.
 
-    Returns:
-        pd.DataFrame: Um DataFrame com as colunas 'codigo_candidato' e 'cv_pt'.
+    Yields:
+        tuple: (codigo_candidato, cv_pt, metadados) com metadados
+            {'arquivo', 'hash', 'origem'} e origem 'cache' ou 'extraido'.
     """
-    dados_curriculos = []
-    
-    # Pega todos os arquivos .pdf e .docx da pasta
-    arquivos_pdf = glob.glob(os.path.join(pasta_curriculos, "*.pdf"))
-    arquivos_docx = glob.glob(os.path.join(pasta_curriculos, "*.docx"))
-    todos_arquivos = arquivos_pdf + arquivos_docx
+    if cache_dir is None:
+        cache_dir = pasta_cache_curriculos(pasta_curriculos)
+    with _lock_cache_curriculos:
+        indice = carregar_indice_curriculos(cache_dir)
+    arquivos_vistos = set()
+    indice_alterado = False
+    a_extrair = {}  # caminho -> (codigo_candidato, nome do arquivo, hash do conteúdo)
 
-    print(f"Encontrados {len(todos_arquivos)} currículos para processar.")
+    try:
+        for entrada in os.scandir(pasta_curriculos):
+            nome_arquivo = entrada.name
+            if not nome_arquivo.endswith((".pdf", ".docx")):
+                continue
+            if arquivos is not None and nome_arquivo not in arquivos:
+                continue
 
-    for arquivo_path in todos_arquivos:
-        try:
-            # Extrai o nome do arquivo do caminho completo
-            nome_arquivo = os.path.basename(arquivo_path)
-            
             # --- Extração do código do candidato com Expressão Regular ---
             # O padrão (CAND\d+) busca pela palavra "CAND" seguida por um ou mais dígitos
             match = re.search(r"(CAND\d+)", nome_arquivo)
             if not match:
-                print(f"AVISO: Não foi possível extrair o código do candidato do arquivo: {nome_arquivo}")
+                logger.warning("Não foi possível extrair o código do candidato do arquivo: %s", nome_arquivo)
                 continue # Pula para o próximo arquivo
-            
+
             codigo_candidato = match.group(1)
-            
-            # --- Leitura do conteúdo do arquivo ---
-            texto_completo = ""
-            if nome_arquivo.endswith(".pdf"):
-                reader = PdfReader(arquivo_path)
-                for page in reader.pages:
-                    texto_completo += page.extract_text() or "" # Adiciona o texto da página
-            
-            elif nome_arquivo.endswith(".docx"):
-                documento = docx.Document(arquivo_path)
-                for paragrafo in documento.paragraphs:
-                    texto_completo += paragrafo.text + "\n" # Adiciona o texto do parágrafo
-            
-            # Armazena o resultado
-            dados_curriculos.append({
-                "codigo_candidato": codigo_candidato,
-                "cv_pt": texto_completo.strip() # .strip() para remover espaços extras no início/fim
-            })
-
-        except Exception as e:
-            print(f"ERRO ao processar o arquivo {nome_arquivo}: {e}")
-
-    return pd.DataFrame(dados_curriculos)
+
+            # --- Hash do conteúdo (reaproveitado se tamanho e mtime não mudaram) ---
+            arquivos_vistos.add(nome_arquivo)
+            try:
+                stat = entrada.stat()
+                info = indice["arquivos"].get(nome_arquivo)
+                if info and info["tamanho"] == stat.st_size and info["mtime"] == stat.st_mtime:
+                    hash_conteudo = info["hash"]
+                else:
+                    hash_conteudo = hash_arquivo(entrada.path)
+                    indice["arquivos"][nome_arquivo] = {"hash": hash_conteudo, "tamanho": stat.st_size, "mtime": stat.st_mtime}
+                    indice_alterado = True
+            except OSError as e:
+                logger.error("Erro ao ler o arquivo %s: %s", nome_arquivo, e)
+                continue
+
+            # --- Texto em cache ou agendado para extração ---
+            texto = ler_texto_cache(cache_dir, hash_conteudo)
+            falha = indice["falhas"].get(hash_conteudo)
+            if texto is not None:
+                yield codigo_candidato, texto, {"arquivo": nome_arquivo, "hash": hash_conteudo, "origem": "cache"}
+            elif not (falha and falha["versao"] == EXTRATOR_VERSAO):
+                a_extrair[entrada.path] = (codigo_candidato, nome_arquivo, hash_conteudo)
+
+        # --- Extração em paralelo apenas do que não está em cache ---
+        for resultado in extrair_em_paralelo(list(a_extrair), max_workers=max_workers, max_paginas=MAX_PAGINAS):
+            codigo_candidato, nome_arquivo, hash_conteudo = a_extrair.pop(resultado["arquivo"])
+            if resultado["ok"]:
+                gravar_texto_cache(cache_dir, hash_conteudo, resultado["cv_pt"])
+                yield codigo_candidato, resultado["cv_pt"], {"arquivo": nome_arquivo, "hash": hash_conteudo, "origem": "extraido"}
+            else:
+                logger.error("Erro ao processar o arquivo %s (%s): %s",
+                             nome_arquivo, resultado["tipo_erro"], resultado["erro"])
+                # Falhas de leitura são definitivas para este conteúdo; timeout/worker tentam de novo depois
+                if resultado["tipo_erro"] == "leitura":
+                    indice["falhas"][hash_conteudo] = {"versao": EXTRATOR_VERSAO, **resultado}
+                    indice_alterado = True
+
+        if arquivos is None:  # com um recorte, os arquivos não vistos continuam existindo
+            indice_alterado |= _limpar_cache_curriculos(cache_dir, indice, arquivos_vistos)
+    finally:
+        # Salva o que já foi indexado mesmo se quem consome parar no meio
+        if indice_alterado:
+            with _lock_cache_curriculos:
+                salvar_indice_curriculos(cache_dir, indice)
+
+
+def curriculos_para_dataframe(curriculos):
+    """
+    Adaptador do pipeline para quem espera um DataFrame.
+
+    Args:
+        curriculos (iterable): Tuplas (codigo_candidato, cv_pt, metadados).
+
+    Returns:
+        pd.DataFrame: Um DataFrame com as colunas 'codigo_candidato' e 'cv_pt'.
+    """
+    return pd.DataFrame.from_records(
+        ((codigo, texto) for codigo, texto, _ in curriculos),
+        columns=["codigo_candidato", "cv_pt"]
+    )
+
+
+def processar_curriculos(pasta_curriculos, cache_dir=None, max_workers=None):
+    """
+    Lê arquivos .pdf e .docx de uma pasta, extrai o texto e o código do candidato.
+
+    Args:
+        pasta_curriculos (str): O caminho para a pasta contendo os arquivos de currículo.
+
+    Returns:
+        pd.DataFrame: Um DataFrame com as colunas 'codigo_candidato' e 'cv_pt'.
+    """
+    return curriculos_para_dataframe(iterar_curriculos(pasta_curriculos, cache_dir, max_workers))
 
 
 
@@ -207,29 +761,54 @@ import boto3
 import json
 import streamlit as st
 import io
+from boto3.s3.transfer import TransferConfig
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
 
 # Carregar credenciais do Streamlit secrets
 def get_s3_client():
-    if "s3_client" not in st.session_state:
-        try:
-            st.session_state.s3_client = boto3.client(
-                's3',
-                aws_access_key_id=st.secrets["s3"]["AWS_ACCESS_KEY_ID"],
-                aws_secret_access_key=st.secrets["s3"]["AWS_SECRET_ACCESS_KEY"]
-            )
-        except Exception as e:
-            st.error(f"Erro ao conectar ao S3: {e}")
-            st.stop()
-    return st.session_state.s3_client
+    """
+    Cliente S3 único por processo. Clientes boto3 são thread-safe, então o mesmo
+    cliente serve todas as sessões e também as threads da fila de jobs, que não
+    têm acesso ao st.session_state.
+    """
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                try:
+                    _s3_client = boto3.client(
+                        's3',
+                        aws_access_key_id=st.secrets["s3"]["AWS_ACCESS_KEY_ID"],
+                        aws_secret_access_key=st.secrets["s3"]["AWS_SECRET_ACCESS_KEY"]
+                    )
+                except Exception as e:
+                    st.error(f"Erro ao conectar ao S3: {e}")
+                    st.stop()
+    return _s3_client
 
 S3_BUCKET_NAME = "meu-projeto-seleai-dados" # Substitua pelo nome do seu bucket
 S3_VAGAS_PATH = "vagas/"
 S3_CANDIDATOS_PATH = "candidatos/"
 S3_CURRICULOS_PATH = "curriculos/"
+S3_CACHE_CURRICULOS_PATH = "cache_curriculos/"  # prefixo "sidecar" com o texto extraído por ETag
+S3_ESTATISTICAS_KEY = "estatisticas/estatisticas_vagas.json"
+S3_IDENTIDADES_PATH = "identidades/"
+S3_EVENTOS_PATH = "eventos/"  # eventos/<id_vaga>/<data>_<id>.json, um objeto imutável por evento
+S3_TRAVA_COMPACTACAO_KEY = "travas/compactacao_eventos.lock"
+
+# Uploads/downloads acima de 8MB são feitos em partes, sem carregar o arquivo inteiro
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+    io_chunksize=256 * 1024
+)
 
 
-def carregar_dados_s3(prefix):
-    """Carrega todos os JSONs de um prefixo no S3"""
+def carregar_dados_s3(prefix, tipo=None):
+    """Carrega todos os JSONs de um prefixo no S3 (com `tipo`, como registros compactos)"""
     s3_client = get_s3_client()
     dados = []
     try:
@@ -246,20 +825,21 @@ def carregar_dados_s3(prefix):
                         continue
     except Exception as e:
         st.error(f"Erro ao carregar dados do S3: {e}")
-    return dados
+    return criar_registros(dados, tipo)
 
 def salvar_dados_s3(pasta, nome_arquivo, dados):
     """Salva dados em JSON no S3."""
     s3_client = get_s3_client()
     try:
         file_path = f"{pasta}{nome_arquivo}"
-        file_content = json.dumps(dados, ensure_ascii=False, indent=2)
+        file_content = json.dumps(dados, ensure_ascii=False, indent=2, default=serializar_json)
         s3_client.put_object(
             Bucket=st.secrets["s3"]["S3_BUCKET_NAME"],
             Key=file_path,
             Body=file_content.encode('utf-8'),
             ContentType='application/json'
         )
+        invalidar_cache(pasta)
         return True
     except Exception as e:
         # AQUI É ONDE VOCÊ ADICIONA MAIS INFORMAÇÕES
@@ -268,46 +848,132 @@ def salvar_dados_s3(pasta, nome_arquivo, dados):
         st.exception(e) 
         return False
 
-def processar_curriculos_s3(prefix):
-    """Lê arquivos .pdf e .docx de um prefixo no S3"""
+def upload_arquivo_s3(arquivo, pasta, nome_arquivo, content_type="application/pdf"):
+    """Envia um arquivo binário para o S3 em streaming (multipart acima do limite)."""
     s3_client = get_s3_client()
-    dados_curriculos = []
     try:
-        response = s3_client.list_objects_v2(Bucket=S3_BUCKET_NAME, Prefix=prefix)
-        if 'Contents' in response:
-            for obj in response['Contents']:
-                key = obj['Key']
-                if key.endswith(('.pdf', '.docx')):
-                    # Extrai o código do candidato da chave do objeto
-                    match = re.search(r"(CAND\d+)", key)
-                    if not match:
-                        print(f"AVISO: Não foi possível extrair o código do candidato do arquivo: {key}")
-                        continue
-                    
-                    codigo_candidato = match.group(1)
-                    
-                    obj_content = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)
-                    file_stream = io.BytesIO(obj_content['Body'].read())
-                    
-                    texto_completo = ""
-                    if key.endswith(".pdf"):
-                        reader = PdfReader(file_stream)
-                        for page in reader.pages:
-                            texto_completo += page.extract_text() or ""
-                    elif key.endswith(".docx"):
-                        # docx2txt não funciona bem com streams
-                        # Salvar temporariamente ou usar outra lib
-                        pass # AQUI VOCÊ PODE PRECISAR DE UMA SOLUÇÃO ALTERNATIVA
-                    
-                    dados_curriculos.append({
-                        "codigo_candidato": codigo_candidato,
-                        "cv_pt": texto_completo.strip()
-                    })
+        arquivo.seek(0)
+        s3_client.upload_fileobj(
+            arquivo,
+            st.secrets["s3"]["S3_BUCKET_NAME"],
+            f"{pasta}{nome_arquivo}",
+            ExtraArgs={"ContentType": content_type},
+            Config=S3_TRANSFER_CONFIG
+        )
+        return True
+    except Exception as e:
+        st.error(f"Erro ao fazer upload do arquivo para o S3: {e}")
+        return False
+
+def baixar_arquivo_s3(key, limite_memoria=LIMITE_SPOOL_MEMORIA):
+    """
+    Baixa um objeto do S3 para um arquivo temporário que fica em memória
+    até `limite_memoria` bytes e passa para o disco acima disso.
+    Quem chama é responsável por fechar o arquivo retornado.
+    """
+    s3_client = get_s3_client()
+    arquivo = tempfile.SpooledTemporaryFile(max_size=limite_memoria)
+    try:
+        s3_client.download_fileobj(S3_BUCKET_NAME, key, arquivo, Config=S3_TRANSFER_CONFIG)
+        arquivo.seek(0)
+    except Exception:
+        arquivo.close()
+        raise
+    return arquivo
+
+def chave_cache_curriculo_s3(etag):
+    """Nome do objeto de cache para um currículo (ETag + versão do extrator)"""
+    etag = etag.strip('"')
+    return f"{etag}_v{EXTRATOR_VERSAO}.json"
+
+def _texto_curriculo_s3(key, etag):
+    """
+    Texto de um currículo no S3 pelo cache do ETag; se não existir, baixa,
+    extrai e grava o cache.
+
+    Returns:
+        tuple: (texto, origem) com origem 'cache' ou 'extraido'.
+    """
+    s3_client = get_s3_client()
+    nome_cache = chave_cache_curriculo_s3(etag)
+    try:
+        response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=f"{S3_CACHE_CURRICULOS_PATH}{nome_cache}")
+        return json.loads(response['Body'].read().decode('utf-8'))["cv_pt"], "cache"
+    except s3_client.exceptions.NoSuchKey:
+        pass
+
+    # Um currículo por vez: no máximo LIMITE_SPOOL_MEMORIA em RAM, o resto em disco
+    with baixar_arquivo_s3(key) as file_stream:
+        texto = extrair_texto_curriculo(file_stream, os.path.splitext(key)[1], MAX_PAGINAS)
+    salvar_dados_s3(S3_CACHE_CURRICULOS_PATH, nome_cache, {"key": key, "cv_pt": texto})
+    return texto, "extraido"
+
+def texto_curriculo_s3(key):
+    """
+    Extrai o texto de um único currículo no S3 usando o cache por ETag.
+
+    Returns:
+        tuple: (texto, ETag do objeto)
+    """
+    s3_client = get_s3_client()
+    etag = s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=key)['ETag'].strip('"')
+    texto, _ = _texto_curriculo_s3(key, etag)
+    return texto, etag
+
+def _objetos_curriculos_s3(s3_client, prefix, arquivos=None):
+    """(key, ETag) dos currículos: listagem paginada do prefixo ou um HEAD por arquivo pedido"""
+    if arquivos is not None:
+        for nome in sorted(arquivos):
+            try:
+                yield prefix + nome, s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=prefix + nome)['ETag']
+            except ClientError as e:
+                if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+                    raise
+                logger.warning("Currículo %s não encontrado no S3", prefix + nome)
+        return
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for pagina in paginator.paginate(Bucket=S3_BUCKET_NAME, Prefix=prefix):
+        for obj in pagina.get('Contents', []):
+            yield obj['Key'], obj['ETag']
+
+def iterar_curriculos_s3(prefix, arquivos=None):
+    """
+    Lê arquivos .pdf e .docx de um prefixo no S3 e gera um currículo por vez.
+    O texto extraído fica em S3_CACHE_CURRICULOS_PATH, indexado pelo ETag do objeto
+    e pela versão do extrator; só currículos novos ou alterados são baixados e lidos.
+    A listagem é paginada, então a memória não depende do número de currículos.
+    Com `arquivos` (nomes relativos ao prefixo), só esses objetos são consultados.
+
+    Yields:
+        tuple: (codigo_candidato, cv_pt, metadados) com metadados
+            {'arquivo', 'key', 'etag', 'origem'} e origem 'cache' ou 'extraido'.
+    """
+    s3_client = get_s3_client()
+    try:
+        for key, etag in _objetos_curriculos_s3(s3_client, prefix, arquivos):
+            if not key.endswith(('.pdf', '.docx')):
+                continue
+
+            # Extrai o código do candidato da chave do objeto
+            match = re.search(r"(CAND\d+)", key)
+            if not match:
+                logger.warning("Não foi possível extrair o código do candidato do arquivo: %s", key)
+                continue
+
+            etag = etag.strip('"')
+            try:
+                texto, origem = _texto_curriculo_s3(key, etag)
+            except Exception as e:
+                logger.error("Erro ao processar o arquivo %s: %s", key, e)
+                continue
+            yield match.group(1), texto, {"arquivo": key[len(prefix):], "key": key, "etag": etag, "origem": origem}
 
     except Exception as e:
         st.error(f"ERRO ao processar currículos do S3: {e}")
-    
-    return pd.DataFrame(dados_curriculos)
+
+def processar_curriculos_s3(prefix):
+    """Lê arquivos .pdf e .docx de um prefixo no S3"""
+    return curriculos_para_dataframe(iterar_curriculos_s3(prefix))
 
 # Atualize estas funções no seu utils.py
 def encerrar_vaga_s3(vaga_id):
@@ -360,6 +1026,231 @@ def carregar_vaga_s3(pasta, nome_arquivo):
     except Exception as e:
         st.error(f"Erro ao carregar a vaga do S3: {e}")
         return None
+
+
+def carregar_json_s3(pasta, nome_arquivo):
+    """Carrega um único JSON do S3 (None se não existir ou estiver corrompido), sem avisos na tela"""
+    s3_client = get_s3_client()
+    try:
+        response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=f"{pasta}{nome_arquivo}")
+        return json.loads(response['Body'].read().decode('utf-8'))
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    except json.JSONDecodeError:
+        logger.warning("JSON inválido no S3: %s%s", pasta, nome_arquivo)
+        return None
+
+
+def identificar_candidato_s3(email, chave):
+    """Identidade do email no S3 (ver identificar_candidato)"""
+    with _identidades_lock:
+        identidade, nova = resolver_identidade(
+            email, chave, lambda codigo: carregar_json_s3(S3_IDENTIDADES_PATH, f"{codigo}.json")
+        )
+        if nova:
+            salvar_dados_s3(S3_IDENTIDADES_PATH, f"{identidade['codigo_candidato']}.json", identidade)
+    return identidade
+
+def salvar_candidatura_identidade_s3(codigo, id_vaga, cv_file=""):
+    """Registra a vaga (e o currículo enviado) na identidade do candidato no S3"""
+    with _identidades_lock:
+        identidade = carregar_json_s3(S3_IDENTIDADES_PATH, f"{codigo}.json")
+        if identidade is None:
+            raise ValueError(f"Identidade não encontrada: {codigo}")
+        registrar_candidatura(identidade, id_vaga, cv_file)
+        return salvar_dados_s3(S3_IDENTIDADES_PATH, f"{codigo}.json", identidade)
+
+# =============================================================================
+# ESTATÍSTICAS POR VAGA NO S3
+# =============================================================================
+#
+# A tabela é um único objeto JSON. O lock evita corridas entre sessões e
+# workers do mesmo processo; entre processos diferentes a última gravação
+# vence, e "Recalcular estatísticas" no dashboard corrige qualquer desvio.
+
+def carregar_estatisticas_s3():
+    """Tabela {id_vaga: estatísticas} do S3 (None se ainda não existir)"""
+    return carregar_json_s3("", S3_ESTATISTICAS_KEY)
+
+def salvar_estatisticas_s3(tabela):
+    get_s3_client().put_object(
+        Bucket=S3_BUCKET_NAME,
+        Key=S3_ESTATISTICAS_KEY,
+        Body=json.dumps(tabela, ensure_ascii=False).encode('utf-8'),
+        ContentType='application/json'
+    )
+    invalidar_cache(S3_ESTATISTICAS_KEY)
+
+def _candidatos_da_vaga_s3(prefix, id_vaga):
+    paginator = get_s3_client().get_paginator('list_objects_v2')
+    for pagina in paginator.paginate(Bucket=S3_BUCKET_NAME, Prefix=prefix):
+        for obj in pagina.get('Contents', []):
+            if obj['Key'].endswith(f"_{id_vaga}.json"):
+                candidato = carregar_json_s3("", obj['Key'])
+                if candidato is not None:
+                    yield candidato
+
+def salvar_candidato_s3(pasta, nome_arquivo, candidato):
+    """
+    Salva um candidato no S3 e atualiza a tabela de estatísticas da vaga
+    (considerando os eventos de status ainda não compactados, como a tabela).
+    """
+    with _estatisticas_lock:
+        anterior = carregar_json_s3(pasta, nome_arquivo)
+        if anterior:
+            aplicar_eventos(candidato, eventos_gravados(anterior))
+        if not salvar_dados_s3(pasta, nome_arquivo, candidato):
+            return False
+        try:
+            tabela = carregar_estatisticas_s3()
+            if tabela is None or tabela_desatualizada(tabela):
+                candidatos = carregar_dados_s3(pasta)
+                aplicar_eventos_pendentes(candidatos, ler_eventos_s3())
+                tabela = reconstruir_estatisticas(candidatos)
+            else:
+                pendentes = agrupar_eventos(ler_eventos_s3(candidato.get('id_vaga'))).get(chave_candidatura(candidato))
+                if pendentes:
+                    anterior = anterior and com_eventos(anterior, pendentes)
+                    candidato = com_eventos(candidato, pendentes)
+                for id_vaga in aplicar_alteracao(tabela, anterior, candidato):
+                    recalcular_melhor(tabela[id_vaga], _candidatos_da_vaga_s3(pasta, id_vaga))
+            salvar_estatisticas_s3(tabela)
+        except Exception:
+            # O candidato já foi salvo; a tabela pode ser refeita pelo dashboard
+            logger.exception("Erro ao atualizar as estatísticas da vaga %s", candidato.get('id_vaga'))
+        return True
+
+def reconstruir_estatisticas_vagas_s3(prefix):
+    """Refaz a tabela do zero a partir de todos os candidatos no S3 (e dos eventos pendentes)"""
+    with _estatisticas_lock:
+        candidatos = carregar_dados_s3(prefix)
+        aplicar_eventos_pendentes(candidatos, ler_eventos_s3())
+        tabela = reconstruir_estatisticas(candidatos)
+        salvar_estatisticas_s3(tabela)
+    return tabela
+
+# -----------------------------------------------------------------------------
+# Log de eventos de status no S3: cada evento é um objeto novo (nunca há
+# sobrescrita). A compactação lê os eventos listados, grava os candidatos e
+# apaga só os objetos que leu; eventos criados durante a compactação ficam
+# para a próxima. A trava usa gravação condicional (If-None-Match), então só
+# um processo compacta por vez. Como no local, a gravação dos candidatos só é
+# protegida contra os jobs do mesmo processo.
+# -----------------------------------------------------------------------------
+
+def registrar_evento_s3(evento):
+    data = re.sub(r"[^0-9T]", "", evento['data'])  # ordem cronológica na listagem
+    get_s3_client().put_object(
+        Bucket=S3_BUCKET_NAME,
+        Key=f"{S3_EVENTOS_PATH}{evento['vaga_id']}/{data}_{evento['id']}.json",
+        Body=json.dumps(evento, ensure_ascii=False).encode('utf-8'),
+        ContentType='application/json'
+    )
+    invalidar_cache(S3_EVENTOS_PATH)
+
+def _listar_eventos_s3(id_vaga=None):
+    """[(key, evento)] dos eventos pendentes de uma vaga (ou de todas)"""
+    s3_client = get_s3_client()
+    prefix = S3_EVENTOS_PATH if id_vaga is None else f"{S3_EVENTOS_PATH}{id_vaga}/"
+    keys = [
+        obj['Key']
+        for pagina in s3_client.get_paginator('list_objects_v2').paginate(Bucket=S3_BUCKET_NAME, Prefix=prefix)
+        for obj in pagina.get('Contents', [])
+        if obj['Key'].endswith('.json')
+    ]
+
+    def ler(key):
+        try:
+            return key, json.loads(s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)['Body'].read())
+        except s3_client.exceptions.NoSuchKey:
+            return key, None  # compactado entre a listagem e a leitura
+
+    with ThreadPoolExecutor(max_workers=MAX_LEITURAS_EVENTOS_S3) as executor:
+        return [(key, evento) for key, evento in executor.map(ler, keys) if evento is not None]
+
+def ler_eventos_s3(id_vaga=None):
+    """Eventos ainda não compactados de uma vaga (ou de todas)"""
+    return [evento for _, evento in _listar_eventos_s3(id_vaga)]
+
+def registrar_status_s3(prefix_candidatos, evento):
+    """Mudança de status no S3: grava o evento e atualiza as estatísticas (ver registrar_status)"""
+    with _estatisticas_lock:
+        gravado = carregar_json_s3(prefix_candidatos, evento['arquivo'])
+        if gravado is None:
+            logger.warning("Candidatura %s não encontrada; status não registrado", evento['arquivo'])
+            return None
+        pendentes = agrupar_eventos(ler_eventos_s3(gravado.get('id_vaga'))).get(chave_candidatura(gravado), [])
+        anterior = com_eventos(gravado, pendentes)
+        registrar_evento_s3(evento)
+        novo = com_eventos(anterior, [evento])
+        try:
+            tabela = carregar_estatisticas_s3()
+            if tabela is not None and not tabela_desatualizada(tabela):
+                aplicar_alteracao(tabela, anterior, novo)
+                salvar_estatisticas_s3(tabela)
+        except Exception:
+            # O evento já foi gravado; a tabela pode ser refeita pelo dashboard
+            logger.exception("Erro ao atualizar as estatísticas da vaga %s", gravado.get('id_vaga'))
+    return novo
+
+@contextmanager
+def _trava_compactacao_s3():
+    s3_client = get_s3_client()
+    try:
+        trava = s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=S3_TRAVA_COMPACTACAO_KEY)
+        if (datetime.now(timezone.utc) - trava['LastModified']).total_seconds() > VALIDADE_TRAVA_COMPACTACAO:
+            s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=S3_TRAVA_COMPACTACAO_KEY)
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+            raise
+    try:
+        s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=S3_TRAVA_COMPACTACAO_KEY, Body=b"", IfNoneMatch="*")
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('PreconditionFailed', 'ConditionalRequestConflict'):
+            yield False
+            return
+        raise
+    try:
+        yield True
+    finally:
+        s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=S3_TRAVA_COMPACTACAO_KEY)
+
+def compactar_eventos_s3(prefix_candidatos):
+    """
+    Grava os eventos pendentes nos JSONs dos candidatos no S3 e apaga os
+    objetos de evento aplicados.
+
+    Returns:
+        dict: Contagem de eventos e candidatos atualizados (None se outra
+        compactação já estava rodando).
+    """
+    with _trava_compactacao_s3() as travado:
+        if not travado:
+            return None
+        lidos = _listar_eventos_s3()
+        keys = {evento['id']: key for key, evento in lidos}
+        contagem = {"eventos": len(lidos), "candidatos": 0}
+        concluidos = []
+        for eventos_candidato in agrupar_eventos([evento for _, evento in lidos]).values():
+            arquivo = eventos_candidato[0]['arquivo']
+            with _estatisticas_lock:  # ver compactar_eventos
+                candidato = carregar_json_s3(prefix_candidatos, arquivo)
+                if candidato is None:
+                    logger.warning("Candidatura %s não existe mais; %d evento(s) descartado(s)", arquivo, len(eventos_candidato))
+                elif aplicar_eventos(candidato, eventos_candidato):
+                    if not salvar_dados_s3(prefix_candidatos, arquivo, candidato):
+                        continue  # os eventos ficam para a próxima rodada
+                    contagem["candidatos"] += 1
+            concluidos.extend(keys[e['id']] for e in eventos_candidato)
+
+        s3_client = get_s3_client()
+        for inicio in range(0, len(concluidos), 1000):  # limite do delete_objects
+            s3_client.delete_objects(
+                Bucket=S3_BUCKET_NAME,
+                Delete={'Objects': [{'Key': key} for key in concluidos[inicio:inicio + 1000]], 'Quiet': True}
+            )
+        invalidar_cache(S3_EVENTOS_PATH)
+    return contagem
     
 def ler_jsons_s3(prefix):
     """
@@ -402,4 +1293,78 @@ def ler_jsons_s3(prefix):
         st.exception(e) # Mostra o erro completo para debugging
 
     # Retorna o DataFrame, que estará vazio se não houver dados
-    return pd.DataFrame(dados)
\ No newline at end of file
+    return pd.DataFrame(dados)
+
+# =============================================================================
+# CACHE DE DADOS ENTRE SESSÕES
+# =============================================================================
+#
+# As leituras completas de uma pasta/prefixo ficam em st.cache_data, que é
+# compartilhado por todas as sessões do processo. A chave inclui um contador
+# de versão por pasta: toda gravação (salvar_dados*, e por tabela encerrar/
+# reabrir vaga, mudança de status, fila de jobs) incrementa o contador e a
+# próxima leitura vai ao disco/S3. O TTL cobre gravações feitas por fora
+# (outro processo, upload manual no bucket).
+
+TTL_CACHE_DADOS = 300  # segundos
+
+_versoes_cache = {}
+_versoes_cache_lock = threading.Lock()
+
+def _chave_cache(pasta):
+    return pasta.rstrip('/')
+
+def versao_cache(pasta):
+    """Versão atual dos dados de uma pasta/prefixo (muda a cada gravação)"""
+    return _versoes_cache.get(_chave_cache(pasta), 0)
+
+def invalidar_cache(pasta):
+    """Descarta as leituras em cache de uma pasta/prefixo (chamar após gravar)"""
+    chave = _chave_cache(pasta)
+    with _versoes_cache_lock:
+        _versoes_cache[chave] = _versoes_cache.get(chave, 0) + 1
+
+@st.cache_data(ttl=TTL_CACHE_DADOS, show_spinner=False)
+def _carregar_dados_versao(pasta, versao, tipo):
+    return carregar_dados(pasta, tipo)
+
+@st.cache_data(ttl=TTL_CACHE_DADOS, show_spinner=False)
+def _carregar_dados_versao_s3(prefix, versao, tipo):
+    return carregar_dados_s3(prefix, tipo)
+
+@st.cache_data(ttl=TTL_CACHE_DADOS, show_spinner=False)
+def _carregar_estatisticas_versao(caminho, versao):
+    return carregar_estatisticas(caminho)
+
+@st.cache_data(ttl=TTL_CACHE_DADOS, show_spinner=False)
+def _carregar_estatisticas_versao_s3(versao):
+    return carregar_estatisticas_s3()
+
+@st.cache_data(ttl=TTL_CACHE_DADOS, show_spinner=False)
+def _ler_eventos_versao(pasta_eventos, versao):
+    return ler_eventos(pasta_eventos)
+
+@st.cache_data(ttl=TTL_CACHE_DADOS, show_spinner=False)
+def _ler_eventos_versao_s3(versao):
+    return ler_eventos_s3()
+
+def carregar_dados_cache(pasta, tipo=None):
+    """carregar_dados com cache entre sessões (cada chamada recebe uma cópia)"""
+    return _carregar_dados_versao(pasta, versao_cache(pasta), tipo)
+
+def carregar_dados_cache_s3(prefix, tipo=None):
+    """carregar_dados_s3 com cache entre sessões (cada chamada recebe uma cópia)"""
+    return _carregar_dados_versao_s3(prefix, versao_cache(prefix), tipo)
+
+def carregar_estatisticas_cache(caminho):
+    return _carregar_estatisticas_versao(caminho, versao_cache(caminho))
+
+def carregar_estatisticas_cache_s3():
+    return _carregar_estatisticas_versao_s3(versao_cache(S3_ESTATISTICAS_KEY))
+
+def ler_eventos_cache(pasta_eventos):
+    """Todos os eventos pendentes, com cache entre sessões"""
+    return _ler_eventos_versao(pasta_eventos, versao_cache(pasta_eventos))
+
+def ler_eventos_cache_s3():
+    return _ler_eventos_versao_s3(versao_cache(S3_EVENTOS_PATH))
@@ -0,0 +1,40 @@
+from shared.exportacao import arquivos_curriculos, linhas_exportacao
+
+
+def _tabela(candidatos, vagas, curriculos):
+    linhas = linhas_exportacao(candidatos, vagas, curriculos, ["id_vaga", "cv_file", "cv_pt"])
+    next(linhas)
+    return [tuple(valores) for valores in linhas]
+
+
+def test_cada_candidatura_exporta_o_proprio_curriculo():
+    candidatos = [
+        {"codigo_candidato": "CAND1", "id_vaga": "v1", "cv_file": "CAND1_v1.pdf"},
+        {"codigo_candidato": "CAND1", "id_vaga": "v2", "cv_file": "CAND1_v2.pdf"},
+    ]
+    vagas = [{"id": "v1"}, {"id": "v2"}]
+    curriculos = [
+        ("CAND1", "cv da vaga 1", {"arquivo": "CAND1_v1.pdf"}),
+        ("CAND1", "cv da vaga 2", {"arquivo": "CAND1_v2.pdf"}),
+    ]
+
+    assert _tabela(candidatos, vagas, curriculos) == [
+        ("v1", "CAND1_v1.pdf", "cv da vaga 1"),
+        ("v2", "CAND1_v2.pdf", "cv da vaga 2"),
+    ]
+    # A ordem em que os currículos chegam não muda o resultado
+    assert _tabela(candidatos, vagas, curriculos[::-1]) == _tabela(candidatos, vagas, curriculos)
+
+
+def test_curriculos_fora_da_exportacao_sao_ignorados():
+    candidatos = [{"codigo_candidato": "CAND1", "id_vaga": "v1", "cv_file": "CAND1_v1.pdf"}, {"id_vaga": "v1"}]
+    curriculos = [
+        ("CAND1", "cv", {"arquivo": "CAND1_v1.pdf"}),
+        ("CAND2", "outro", {"arquivo": "CAND2_v1.pdf"}),
+    ]
+
+    assert arquivos_curriculos(candidatos) == {"CAND1_v1.pdf"}
+    assert _tabela(candidatos, [{"id": "v1"}], curriculos) == [
+        ("v1", "CAND1_v1.pdf", "cv"),
+        ("v1", None, None),
+    ]